@@ -39,6 +39,9 @@ class sfp_creditcard(SpiderFootPlugin):
     # has failed and you don't wish to process any more events.
     errorState = False
 
+    # Content analysis is CPU-bound, so is done in a separate process
+    _cpuBound = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
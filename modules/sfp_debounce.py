@@ -47,6 +47,9 @@ class sfp_debounce(SpiderFootPlugin):
     results = None
     errorState = False
 
+    # Events are handled asynchronously, so many can be handled at once
+    _maxInFlight = 20
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
@@ -65,8 +68,8 @@ class sfp_debounce(SpiderFootPlugin):
             "RAW_RIR_DATA"
         ]
 
-    def queryEmailAddr(self, qry):
-        res = self.sf.fetchUrl(
+    async def queryEmailAddr(self, qry):
+        res = await self.sf.fetchUrlInExecutor(
             f"https://disposable.debounce.io?email={qry}",
             timeout=self.opts['_fetchtimeout'],
             useragent="SpiderFoot"
@@ -84,7 +87,7 @@ class sfp_debounce(SpiderFootPlugin):
         return None
 
     # Handle events sent to this module
-    def handleEvent(self, event):
+    async def handleEventAsync(self, event):
         eventName = event.eventType
         srcModuleName = event.module
         eventData = event.data
@@ -96,7 +99,7 @@ class sfp_debounce(SpiderFootPlugin):
 
         self.results[eventData] = True
 
-        data = self.queryEmailAddr(eventData)
+        data = await self.queryEmailAddr(eventData)
 
         if data is None:
             return
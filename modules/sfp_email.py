@@ -32,6 +32,9 @@ class sfp_email(SpiderFootPlugin):
     optdescs = {
     }
 
+    # Content analysis is CPU-bound, so is done in a separate process
+    _cpuBound = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
 
@@ -50,6 +50,9 @@ class sfp_errors(SpiderFootPlugin):
     # Target
     results = None
 
+    # Content analysis is CPU-bound, so is done in a separate process
+    _cpuBound = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
@@ -33,6 +33,9 @@ class sfp_hashes(SpiderFootPlugin):
     optdescs = {
     }
 
+    # Content analysis is CPU-bound, so is done in a separate process
+    _cpuBound = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
 
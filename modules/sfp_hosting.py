@@ -34,12 +34,11 @@ class sfp_hosting(SpiderFootPlugin):
     optdescs = {
     }
 
-    # Target
-    results = None
+    # Only handle each IP address once
+    _dedupEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.results = self.tempStorage()
         self.__dataSource__ = "DNS"
 
         for opt in list(userOpts.keys()):
@@ -93,11 +92,6 @@ class sfp_hosting(SpiderFootPlugin):
 
         self.sf.debug(f"Received event, {eventName}, from {srcModuleName}")
 
-        if eventData in self.results:
-            return
-
-        self.results[eventData] = True
-
         ret = self.queryAddr(eventData)
         if ret:
             evt = SpiderFootEvent("PROVIDER_HOSTING", ret[0] + ": " + ret[1],
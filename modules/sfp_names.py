@@ -43,6 +43,9 @@ class sfp_names(SpiderFootPlugin):
     d = None
     n = None
 
+    # Content analysis is CPU-bound, so is done in a separate process
+    _cpuBound = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
@@ -19,6 +19,7 @@ import os.path
 import random
 import signal
 import sys
+import threading
 import time
 from copy import deepcopy
 from logging import handlers
@@ -29,7 +30,7 @@ from cherrypy.lib import auth_digest
 from sflib import SpiderFoot
 from sfscan import SpiderFootScanner
 from sfwebui import SpiderFootWebUi
-from spiderfoot import SpiderFootDb
+from spiderfoot import SpiderFootBrokerWorker, SpiderFootDb, SpiderFootModuleManifest, SpiderFootSqliteBroker
 
 log = logging.getLogger()
 log.setLevel(logging.DEBUG)
@@ -68,7 +69,8 @@ def main():
     sfWebUiConfig = {
         'host': '127.0.0.1',
         'port': 5001,
-        'root': '/'
+        'root': '/',
+        'scanworkers': 3  # number of scans run at the same time, further scans are queued
     }
 
     # 'Global' configuration options
@@ -92,7 +94,21 @@ def main():
         '_socks3port': '',
         '_socks4user': '',
         '_socks5pwd': '',
-        '_torctlport': 9051
+        '_torctlport': 9051,
+        '_queuesize': 1000,
+        '_dedupbloomsize': 0,
+        '_asyncthreads': 100,
+        '_maxworkers': 100,
+        '_eventspillsize': 1024,
+        '_eventbatchsize': 500,
+        '_eventbatchinterval': 1,
+        '_blobthreshold': 1024,
+        '_logbacklog': 10000,
+        '_logoverflow': 'sample',
+        '_checkpointinterval': 300,
+        '_cpuprocesses': 4,
+        '_broker': '',
+        '_tracescan': False
     }
 
     sfOptdescs = {
@@ -109,6 +125,20 @@ def main():
         '_socks4user': 'SOCKS Username. Valid only for SOCKS4 and SOCKS5 servers.',
         '_socks5pwd': "SOCKS Password. Valid only for SOCKS5 servers.",
         '_torctlport': "The port TOR is taking control commands on. This is necessary for SpiderFoot to tell TOR to re-circuit when it suspects anonymity is compromised.",
+        '_queuesize': "Maximum number of events queued for each module before further events for it are held back until it catches up (0 = unlimited).",
+        '_dedupbloomsize': "Number of events to size the duplicate event filter for, using less memory at the cost of occasionally skipping a new event (0 = track events exactly).",
+        '_asyncthreads': "Number of threads on which modules that handle events asynchronously make blocking calls, such as network requests. This is the most such calls made at the same time.",
+        '_maxworkers': "Maximum number of events handled at the same time across all modules. When more are waiting, modules with a smaller priority number run first (0 = unlimited).",
+        '_eventspillsize': "Event data of this many bytes or more is moved out of memory to a temporary file once all modules have handled the event (0 = keep all event data in memory).",
+        '_eventbatchsize': "Maximum number of scan results written to the database in one transaction. Larger batches store results faster, at the cost of them showing up in the UI a little later (1 = write each result as it is found).",
+        '_eventbatchinterval': "Maximum number of seconds a scan result waits to be written to the database along with others.",
+        '_blobthreshold': "Size in bytes from which scan result data is stored compressed, once for all results with the same data. 0 = never.",
+        '_logbacklog': "Maximum number of debug and info messages waiting to be written to a scan's log. Further messages are handled according to the log overflow policy (0 = unlimited).",
+        '_logoverflow': "What to do with debug and info messages when many are waiting to be written to a scan's log: 'drop' them once the backlog is full, or 'sample' one in ten of them once it is half full. Status and error messages are always written.",
+        '_checkpointinterval': "Number of seconds between checkpoints of a running scan, from which the scan can be resumed if it is interrupted (0 = no checkpoints).",
+        '_cpuprocesses': "Maximum number of processes in which modules doing CPU-bound work, such as content analysis, handle events. Each module handles its events in one process (0 = handle them in worker threads like other modules).",
+        '_broker': "SQLite broker database to publish the events of modules to, for module workers started with --worker to handle. Storage modules still run in the scan (blank = run all modules in the scan).",
+        '_tracescan': "Record a timeline of each scan's execution (module event handling, HTTP requests, database writes and event dispatch), which can be downloaded from the scan's settings and viewed in Perfetto or chrome://tracing.",
         '_modulesenabled': "Modules enabled for the scan."  # This is a hack to get a description for an option not actually available.
     }
 
@@ -132,6 +162,9 @@ def main():
     p.add_argument("-F", metavar="type1,type2,...", type=str, help="Show only a set of event types, comma-separated.")
     p.add_argument("-x", action='store_true', help="STRICT MODE. Will only enable modules that can directly consume your target, and if -t was specified only those events will be consumed by modules. This overrides -t and -m options.")
     p.add_argument("-q", action='store_true', help="Disable logging. This will also hide errors!")
+    p.add_argument("--scan-workers", metavar="COUNT", type=int, help="Number of scans the web server runs at the same time. Further scans are queued. Default is 3.")
+    p.add_argument("--worker", metavar="BROKER", type=str, help="Run a module worker, handling the events of distributed scans published to the SQLite broker database.")
+    p.add_argument("--worker-threads", metavar="COUNT", type=int, default=4, help="Number of events a module worker handles at the same time. Default is 4.")
     args = p.parse_args()
 
     if args.debug:
@@ -145,7 +178,6 @@ def main():
         log.setLevel(logging.NOTSET)
         sfConfig['__logging'] = False
 
-    sfModules = dict()
     sft = SpiderFoot(sfConfig)
 
     # Load each module in the modules directory with a .py extension
@@ -155,38 +187,13 @@ def main():
         log.critical(f"Modules directory does not exist: {mod_dir}")
         sys.exit(-1)
 
-    for filename in os.listdir(mod_dir):
-        if not filename.endswith(".py"):
-            continue
-        if not filename.startswith("sfp_"):
-            continue
-
-        # Skip the module template and debugging modules
-        if filename in ('sfp_template.py', 'sfp_stor_print.py'):
-            continue
-
-        modName = filename.split('.')[0]
-
-        # Load and instantiate the module
-        sfModules[modName] = dict()
-        mod = __import__('modules.' + modName, globals(), locals(), [modName])
-        sfModules[modName]['object'] = getattr(mod, modName)()
-        try:
-            sfModules[modName]['name'] = sfModules[modName]['object'].meta['name']
-            sfModules[modName]['cats'] = sfModules[modName]['object'].meta.get('categories', list())
-            sfModules[modName]['group'] = sfModules[modName]['object'].meta.get('useCases', list())
-            sfModules[modName]['labels'] = sfModules[modName]['object'].meta.get('flags', list())
-            sfModules[modName]['descr'] = sfModules[modName]['object'].meta['summary']
-            sfModules[modName]['provides'] = sfModules[modName]['object'].producedEvents()
-            sfModules[modName]['consumes'] = sfModules[modName]['object'].watchedEvents()
-            sfModules[modName]['meta'] = sfModules[modName]['object'].meta
-            if hasattr(sfModules[modName]['object'], 'opts'):
-                sfModules[modName]['opts'] = sfModules[modName]['object'].opts
-            if hasattr(sfModules[modName]['object'], 'optdescs'):
-                sfModules[modName]['optdescs'] = sfModules[modName]['object'].optdescs
-        except BaseException as e:
-            log.critical(f"Failed to load {modName}: {e}")
-            sys.exit(-1)
+    # Module details are read from a cached manifest, so module code is
+    # only imported for modules which changed since it was last cached.
+    try:
+        sfModules = SpiderFootModuleManifest(mod_dir, sft.cachePath() + '/modules.json').load()
+    except BaseException as e:
+        log.critical(f"Failed to load modules: {e}")
+        sys.exit(-1)
 
     if not sfModules:
         log.critical(f"No modules found in modules directory: {mod_dir}")
@@ -217,6 +224,10 @@ def main():
             print(('{0:45}  {1}'.format(t, types[t])))
         sys.exit(0)
 
+    if args.worker:
+        start_module_worker(args.worker, args.worker_threads)
+        sys.exit(0)
+
     if args.l:
         try:
             (host, port) = args.l.split(":")
@@ -227,6 +238,12 @@ def main():
         sfWebUiConfig['host'] = host
         sfWebUiConfig['port'] = port
 
+        if args.scan_workers is not None:
+            if args.scan_workers < 1:
+                log.critical("Invalid number of scan workers.")
+                sys.exit(-1)
+            sfWebUiConfig['scanworkers'] = args.scan_workers
+
         start_web_server(sfWebUiConfig, sfConfig)
         exit(0)
 
@@ -416,8 +433,8 @@ def start_scan(sfConfig, sfModules, args):
     scanName = target
     scanId = sf.genScanInstanceId()
     try:
+        # Not daemonic, so the scan can start processes for CPU-bound modules
         p = mp.Process(target=SpiderFootScanner, args=(scanName, scanId, target, targetType, modlist, cfg))
-        p.daemon = True
         p.start()
     except BaseException as e:
         log.error(f"Scan [{scanId}] failed: {e}")
@@ -439,6 +456,31 @@ def start_scan(sfConfig, sfModules, args):
     return
 
 
+def start_module_worker(brokerPath, threads):
+    """Handle the events of distributed scans published to a broker, until interrupted.
+
+    Args:
+        brokerPath (str): SQLite broker database
+        threads (int): number of events handled at the same time
+    """
+
+    try:
+        broker = SpiderFootSqliteBroker(brokerPath)
+        worker = SpiderFootBrokerWorker(broker, threads=threads)
+    except (TypeError, ValueError, IOError) as e:
+        log.critical(f"Failed to start module worker: {e}")
+        sys.exit(-1)
+
+    log.info(f"Module worker {worker.workerId} handling events from broker {brokerPath}")
+
+    try:
+        worker.run(threading.Event())
+    except KeyboardInterrupt:
+        log.info(f"Module worker {worker.workerId} stopped.")
+    finally:
+        broker.close()
+
+
 def start_web_server(sfWebUiConfig, sfConfig):
     """Start the web server so you can start looking at results
 
@@ -1028,6 +1028,46 @@ class SpiderFootCli(cmd.Cmd):
 
         self.send_output(d, line, titles, total=False)
 
+    # Runtime statistics of the modules of a scan
+    def do_modulestats(self, line):
+        """modulestats <sid>
+        Show where the modules of a scan with scan ID, <sid>, spent
+        their time, and the requests they made."""
+        c = self.myparseline(line)
+        if len(c[0]) < 1:
+            self.edprint("Invalid syntax.")
+            return
+
+        sid = c[0][0]
+
+        titles = {
+            "0": "Module",
+            "1": "Events Handled",
+            "2": "Wall Time (s)",
+            "3": "CPU Time (s)",
+            "4": "Queue Wait (s)",
+            "6": "Events Emitted",
+            "7": "HTTP Requests",
+            "8": "HTTP Bytes",
+            "9": "DNS Queries"
+        }
+
+        d = self.request(self.ownopts['cli.server_baseurl'] + "/scanmodulestats?id=" + sid)
+        if not d:
+            return
+
+        j = json.loads(d)
+
+        if not j:
+            self.dprint("No module statistics found.")
+            return
+
+        # Times are shown to the millisecond in tables
+        if self.ownopts['cli.output'] == "pretty":
+            d = json.dumps([[f"{v:.3f}" if isinstance(v, float) else v for v in row] for row in j])
+
+        self.send_output(d, line, titles, total=False)
+
     # Delete a scan
     def do_delete(self, line):
         """delete <sid>
@@ -1073,6 +1113,7 @@ class SpiderFootCli(cmd.Cmd):
             ["scaninfo", "Scan information."],
             ["data", "Show data from a scan's results."],
             ["summary", "Scan result summary."],
+            ["modulestats", "Scan module runtime statistics."],
             ["find", "Search for data within scan results."],
             ["query", "Run SQL against the SpiderFoot SQLite database."],
             ["logs", "View/watch logs from a scan."]
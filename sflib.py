@@ -10,6 +10,9 @@
 # Licence:     GPL
 # -------------------------------------------------------------------------------
 
+import asyncio
+import contextvars
+import functools
 import hashlib
 import html
 import inspect
@@ -45,6 +48,8 @@ from publicsuffixlist import PublicSuffixList
 from stem import Signal
 from stem.control import Controller
 
+from spiderfoot import SpiderFootModuleStats, SpiderFootTracer
+
 # For hiding the SSL warnings coming from the requests lib
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)  # noqa: DUO131
 
@@ -62,9 +67,13 @@ class SpiderFoot:
     _dbh = None
     _scanId = None
     _socksProxy = None
+    _scanLogWriter = None
     opts = dict()
     log = logging.getLogger(__name__)
 
+    # Words of the dictionaries loaded by this process, by dictionary names
+    _dictionaryWords = dict()
+
     def __init__(self, options):
         """Initialize SpiderFoot object.
 
@@ -115,6 +124,15 @@ class SpiderFoot:
         """
         return self._socksProxy
 
+    @property
+    def scanLogWriter(self):
+        """Writer of log events to the database in the background
+
+        Returns:
+            SpiderFootScanLogWriter: scan log writer
+        """
+        return self._scanLogWriter
+
     @dbh.setter
     def dbh(self, dbh):
         """Called usually some time after instantiation
@@ -148,6 +166,16 @@ class SpiderFoot:
         """
         self._socksProxy = socksProxy
 
+    @scanLogWriter.setter
+    def scanLogWriter(self, scanLogWriter):
+        """Set the writer log events are queued to, rather than being
+        written to the database handle by the thread logging them.
+
+        Args:
+            scanLogWriter (SpiderFootScanLogWriter): scan log writer, or None to write log events directly
+        """
+        self._scanLogWriter = scanLogWriter
+
     def refreshTorIdent(self):
         """Tell TOR to re-circuit."""
 
@@ -415,6 +443,9 @@ class SpiderFoot:
             BaseException: internal error encountered attempting to access the database handler
         """
 
+        if self.scanLogWriter is not None:
+            return self.scanLogWriter.logEvent(self.scanId, level, message, component)
+
         if not self.dbh:
             self.log.exception(f"No database handle. Could not log event to database: {message}")
             raise BaseException(f"Internal Error Encountered: {message}")
@@ -467,6 +498,25 @@ class SpiderFoot:
 
         self.log.info(message)
 
+    def _callerModuleName(self):
+        """Name of the module which called info() or debug(), or of the
+        module which called the SpiderFoot helper which called them.
+
+        The caller's frame is looked up directly rather than with
+        inspect.stack(), which reads the source of every frame on the stack.
+
+        Returns:
+            str: module name
+        """
+        frame = sys._getframe(2)
+        modName = frame.f_globals.get('__name__')
+
+        if modName == __name__:
+            frame = frame.f_back
+            modName = frame.f_globals.get('__name__') if frame is not None else None
+
+        return modName or "Unknown"
+
     def info(self, message):
         """Log and print an info message.
 
@@ -477,21 +527,7 @@ class SpiderFoot:
         if not self.opts['__logging']:
             return
 
-        frm = inspect.stack()[1]
-        mod = inspect.getmodule(frm[0])
-
-        if mod is None:
-            modName = "Unknown"
-        else:
-            if mod.__name__ == "sflib":
-                frm = inspect.stack()[2]
-                mod = inspect.getmodule(frm[0])
-                if mod is None:
-                    modName = "Unknown"
-                else:
-                    modName = mod.__name__
-            else:
-                modName = mod.__name__
+        modName = self._callerModuleName()
 
         if self.dbh:
             self._dblog("INFO", message, modName)
@@ -509,21 +545,7 @@ class SpiderFoot:
             return
         if not self.opts['__logging']:
             return
-        frm = inspect.stack()[1]
-        mod = inspect.getmodule(frm[0])
-
-        if mod is None:
-            modName = "Unknown"
-        else:
-            if mod.__name__ == "sflib":
-                frm = inspect.stack()[2]
-                mod = inspect.getmodule(frm[0])
-                if mod is None:
-                    modName = "Unknown"
-                else:
-                    modName = mod.__name__
-            else:
-                modName = mod.__name__
+        modName = self._callerModuleName()
 
         if self.dbh:
             self._dblog("DEBUG", message, modName)
@@ -551,6 +573,30 @@ class SpiderFoot:
         path = os.environ.get('SPIDERFOOT_DATA')
         return path if path is not None else cls.myPath()
 
+    @classmethod
+    def tracePath(cls, scanId):
+        """Returns the file system location of the execution trace of a scan.
+
+        Args:
+            scanId (str): scan ID
+
+        Returns:
+            str: trace file path
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        # Scan IDs come from requests, so must not lead out of the directory
+        if not scanId or os.path.basename(scanId) != scanId or scanId.startswith('.'):
+            raise ValueError(f"Invalid scan ID: {scanId}")
+
+        return os.path.join(cls.dataPath(), 'traces', f"{scanId}.json")
+
     def hashstring(self, string):
         """Returns a SHA256 hash of the specified input.
 
@@ -1374,49 +1420,52 @@ class SpiderFoot:
             list: words and names from dictionaries
         """
 
-        wd = dict()
+        return self.loadDictionaries(["english", "german", "french", "spanish"])
 
-        dicts = ["english", "german", "french", "spanish"]
+    def dictnames(self):
+        """Return names of available dictionary files.
 
-        for d in dicts:
-            try:
-                with io.open(self.myPath() + "/dicts/ispell/" + d + ".dict", 'r', encoding='utf8', errors='ignore') as wdct:
-                    dlines = wdct.readlines()
-            except BaseException as e:
-                self.debug(f"Could not read dictionary: {e}")
-                continue
+        Returns:
+            list: list of dictionary file names.
+        """
 
-            for w in dlines:
-                w = w.strip().lower()
-                wd[w.split('/')[0]] = True
+        return self.loadDictionaries(["names"])
 
-        return list(wd.keys())
+    def loadDictionaries(self, dicts):
+        """Return the unique words in ispell dictionaries. Dictionaries are
+        only read once per process, and shared by all scans the process
+        runs, e.g. in a scan worker.
 
-    def dictnames(self):
-        """Return names of available dictionary files.
+        Args:
+            dicts (list): dictionary names
 
         Returns:
-            list: list of dictionary file names.
+            list: words from the dictionaries
         """
 
-        wd = dict()
+        key = tuple(dicts)
 
-        dicts = ["names"]
+        words = SpiderFoot._dictionaryWords.get(key)
+        if words is None:
+            wd = dict()
 
-        for d in dicts:
-            try:
-                wdct = open(self.myPath() + "/dicts/ispell/" + d + ".dict", 'r')
-                dlines = wdct.readlines()
-                wdct.close()
-            except BaseException as e:
-                self.debug("Could not read dictionary: " + str(e))
-                continue
+            for d in dicts:
+                try:
+                    with io.open(self.myPath() + "/dicts/ispell/" + d + ".dict", 'r', encoding='utf8', errors='ignore') as wdct:
+                        dlines = wdct.readlines()
+                except BaseException as e:
+                    self.debug(f"Could not read dictionary: {e}")
+                    continue
 
-            for w in dlines:
-                w = w.strip().lower()
-                wd[w.split('/')[0]] = True
+                for w in dlines:
+                    w = w.strip().lower()
+                    wd[w.split('/')[0]] = True
 
-        return list(wd.keys())
+            words = list(wd.keys())
+            SpiderFoot._dictionaryWords[key] = words
+
+        # Callers may modify the list they get
+        return list(words)
 
     def dataParentChildToTree(self, data):
         """Converts a dictionary of k -> array to a nested
@@ -1483,6 +1532,8 @@ class SpiderFoot:
             self.error(f"Unable to resolve host: {host} (Invalid host)")
             return list()
 
+        self._countDnsQuery()
+
         try:
             addrs = self.normalizeDNS(socket.gethostbyname_ex(host))
         except BaseException as e:
@@ -1513,6 +1564,8 @@ class SpiderFoot:
 
         self.debug(f"Performing reverse resolve of {ipaddr}")
 
+        self._countDnsQuery()
+
         try:
             addrs = self.normalizeDNS(socket.gethostbyaddr(ipaddr))
         except BaseException as e:
@@ -1543,6 +1596,8 @@ class SpiderFoot:
             self.error("Unable to resolve %s (Invalid hostname)" % hostname)
             return addrs
 
+        self._countDnsQuery()
+
         try:
             res = socket.getaddrinfo(hostname, None, socket.AF_INET6)
             for addr in res:
@@ -1556,6 +1611,70 @@ class SpiderFoot:
 
         return list(set(addrs))
 
+    async def runInExecutor(self, func, *args, **kwargs):
+        """Run a blocking function on a thread of the event loop's executor,
+        so that asynchronous modules can wait for it without blocking the
+        event loop.
+
+        This is not asynchronous I/O: the function still blocks an executor
+        thread, so no more calls run at the same time than the executor has
+        threads (_asyncthreads during a scan). What it saves is a worker
+        thread per event handled concurrently by each module.
+
+        Args:
+            func (callable): function to run
+            args: function arguments
+            kwargs: function keyword arguments
+
+        Returns:
+            object: function return value
+        """
+
+        # The function runs in the context of the calling task, so that
+        # its work is counted against the statistics of the module.
+        loop = asyncio.get_event_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+
+    async def resolveHostInExecutor(self, host):
+        """Return a normalised resolution of a hostname, resolved on the
+        event loop's executor (see runInExecutor()).
+
+        Args:
+            host (str): host to resolve
+
+        Returns:
+            list: IP addresses
+        """
+
+        return await self.runInExecutor(self.resolveHost, host)
+
+    async def resolveIPInExecutor(self, ipaddr):
+        """Return a normalised resolution of an IPv4 address, resolved on
+        the event loop's executor (see runInExecutor()).
+
+        Args:
+            ipaddr (str): IP address to reverse resolve
+
+        Returns:
+            list: list of domain names
+        """
+
+        return await self.runInExecutor(self.resolveIP, ipaddr)
+
+    async def resolveHost6InExecutor(self, hostname):
+        """Return a normalised resolution of an IPv6 address, resolved on
+        the event loop's executor (see runInExecutor()).
+
+        Args:
+            hostname (str): hostname to reverse resolve
+
+        Returns:
+            list
+        """
+
+        return await self.runInExecutor(self.resolveHost6, hostname)
+
     def validateIP(self, host, ip):
         """Verify a host resolves to a given IP.
 
@@ -2461,6 +2580,31 @@ class SpiderFoot:
             }
         return session
 
+    def _countHttpRequest(self):
+        """Count an HTTP request against the statistics of the module
+        handling an event, if any."""
+        stats = SpiderFootModuleStats.current()
+        if stats is not None:
+            stats.httpRequest()
+
+    def _countHttpReceived(self, contentSize):
+        """Count HTTP content received against the statistics of the
+        module handling an event, if any.
+
+        Args:
+            contentSize (int): bytes of content received
+        """
+        stats = SpiderFootModuleStats.current()
+        if stats is not None:
+            stats.httpReceived(contentSize)
+
+    def _countDnsQuery(self):
+        """Count a DNS query against the statistics of the module
+        handling an event, if any."""
+        stats = SpiderFootModuleStats.current()
+        if stats is not None:
+            stats.dnsQuery()
+
     def removeUrlCreds(self, url):
         """Remove key= and others from URLs to avoid credentials in logs.
 
@@ -2618,13 +2762,15 @@ class SpiderFoot:
                 self.info(f"Fetching (HEAD only): {self.removeUrlCreds(url)} [user-agent: {header['User-Agent']}] [timeout: {timeout}]")
 
             try:
-                hdr = self.getSession().head(
-                    url,
-                    headers=header,
-                    proxies=proxies,
-                    verify=verify,
-                    timeout=timeout
-                )
+                self._countHttpRequest()
+                with SpiderFootTracer.traced("HEAD", "http", {'url': self.removeUrlCreds(url)}):
+                    hdr = self.getSession().head(
+                        url,
+                        headers=header,
+                        proxies=proxies,
+                        verify=verify,
+                        timeout=timeout
+                    )
             except Exception as e:
                 if not noLog:
                     self.error(f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {url}")
@@ -2655,13 +2801,15 @@ class SpiderFoot:
                     self.info(f"Fetching (HEAD only): {self.removeUrlCreds(result['realurl'])} [user-agent: {header['User-Agent']}] [timeout: {timeout}]")
 
                 try:
-                    hdr = self.getSession().head(
-                        result['realurl'],
-                        headers=header,
-                        proxies=proxies,
-                        verify=verify,
-                        timeout=timeout
-                    )
+                    self._countHttpRequest()
+                    with SpiderFootTracer.traced("HEAD", "http", {'url': self.removeUrlCreds(result['realurl'])}):
+                        hdr = self.getSession().head(
+                            result['realurl'],
+                            headers=header,
+                            proxies=proxies,
+                            verify=verify,
+                            timeout=timeout
+                        )
                     size = int(hdr.headers.get('content-length', 0))
                     result['realurl'] = hdr.headers.get('location', result['realurl'])
                     result['code'] = str(hdr.status_code)
@@ -2685,28 +2833,32 @@ class SpiderFoot:
             else:
                 self.info(f"Fetching: {self.removeUrlCreds(url)} [user-agent: {header['User-Agent']}] [timeout: {timeout}]")
 
+        self._countHttpRequest()
+
         try:
             if postData:
-                res = self.getSession().post(
-                    url,
-                    data=postData,
-                    headers=header,
-                    proxies=proxies,
-                    allow_redirects=True,
-                    cookies=cookies,
-                    timeout=timeout,
-                    verify=verify
-                )
+                with SpiderFootTracer.traced("POST", "http", {'url': self.removeUrlCreds(url)}):
+                    res = self.getSession().post(
+                        url,
+                        data=postData,
+                        headers=header,
+                        proxies=proxies,
+                        allow_redirects=True,
+                        cookies=cookies,
+                        timeout=timeout,
+                        verify=verify
+                    )
             else:
-                res = self.getSession().get(
-                    url,
-                    headers=header,
-                    proxies=proxies,
-                    allow_redirects=True,
-                    cookies=cookies,
-                    timeout=timeout,
-                    verify=verify
-                )
+                with SpiderFootTracer.traced("GET", "http", {'url': self.removeUrlCreds(url)}):
+                    res = self.getSession().get(
+                        url,
+                        headers=header,
+                        proxies=proxies,
+                        allow_redirects=True,
+                        cookies=cookies,
+                        timeout=timeout,
+                        verify=verify
+                    )
         except requests.exceptions.RequestException:
             self.error(f"Failed to connect to {url}")
             return result
@@ -2721,6 +2873,7 @@ class SpiderFoot:
             return result
 
         try:
+            self._countHttpReceived(len(res.content))
             result['headers'] = dict()
 
             for header, value in res.headers.items():
@@ -2793,6 +2946,21 @@ class SpiderFoot:
         self.info(f"Fetched {self.removeUrlCreds(url)} ({len(result['content'] or '')} bytes in {t}s)")
         return result
 
+    async def fetchUrlInExecutor(self, url, **kwargs):
+        """Fetch a URL on the event loop's executor (see runInExecutor()),
+        for use by asynchronous modules. Takes the same arguments as
+        fetchUrl().
+
+        Args:
+            url (str): URL to fetch
+            kwargs: fetchUrl() arguments
+
+        Returns:
+            dict: HTTP response
+        """
+
+        return await self.runInExecutor(self.fetchUrl, url, **kwargs)
+
     def checkDnsWildcard(self, target):
         """Check if wildcard DNS is enabled by looking up a random hostname
 
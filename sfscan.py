@@ -9,16 +9,25 @@
 # Copyright:    (c) Steve Micallef 2013
 # License:      GPL
 # -----------------------------------------------------------------
+import asyncio
+import json
+import multiprocessing as mp
+import queue
 import socket
 import sys
+import threading
 import time
 import traceback
+from collections import ChainMap, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from copy import deepcopy
+from types import MappingProxyType
 
 import dns.resolver
 
 from sflib import SpiderFoot
-from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget
+from spiderfoot import SpiderFootBrokerPool, SpiderFootDb, SpiderFootDedupIndex, SpiderFootEvent, SpiderFootEventStore, SpiderFootModuleStats, SpiderFootPlugin, SpiderFootProcessPool, SpiderFootScanLogWriter, SpiderFootSqliteBroker, SpiderFootTarget, SpiderFootTracer, SpiderFootWorkerBudget
 
 
 class SpiderFootScanner():
@@ -41,8 +50,27 @@ class SpiderFootScanner():
     __moduleInstances = dict()
     __modconfig = dict()
     __scanName = None
-
-    def __init__(self, scanName, scanId, targetValue, targetType, moduleList, globalOpts, start=True):
+    __eventQueue = None
+    __stopEvent = None
+    __lastStopCheck = 0
+    __eventRouting = dict()
+    __wildcardListeners = list()
+    __dedupIndex = None
+    __pendingEvents = dict()
+    __workerBudget = None
+    __eventStore = None
+    __eventLoop = None
+    __eventLoopThread = None
+    __eventLoopExecutor = None
+    __checkpoint = None
+    __lastCheckpoint = 0
+    __processPool = None
+    __brokerPool = None
+    __moduleStats = dict()
+    __tracer = None
+    __scanLogWriter = None
+
+    def __init__(self, scanName, scanId, targetValue, targetType, moduleList, globalOpts, start=True, stopEvent=None, resume=False):
         """Initialize SpiderFootScanner object.
 
         Args:
@@ -53,6 +81,8 @@ class SpiderFootScanner():
             moduleList (list): list of modules to run
             globalOpts (dict): scan options
             start (bool): start the scan immediately
+            stopEvent (multiprocessing.Event): set by the controller to abort the scan
+            resume (bool): resume the existing scan scanId from its last checkpoint
 
         Raises:
             TypeError: arg type was invalid
@@ -68,6 +98,13 @@ class SpiderFootScanner():
 
         self.__config = deepcopy(globalOpts)
         self.__dbh = SpiderFootDb(self.__config)
+        self.__moduleInstances = dict()
+        self.__modconfig = dict()
+
+        # Shared by all modules to check whether the scan has been aborted
+        if stopEvent is None:
+            stopEvent = threading.Event()
+        self.__stopEvent = stopEvent
 
         if not isinstance(scanName, str):
             raise TypeError(f"scanName is {type(scanName)}; expected str()")
@@ -112,7 +149,14 @@ class SpiderFootScanner():
             self.__scanId = self.__sf.genScanInstanceId()
 
         self.__sf.scanId = self.__scanId
-        self.__dbh.scanInstanceCreate(self.__scanId, self.__scanName, self.__targetValue)
+
+        if resume:
+            self.__checkpoint = self.__dbh.scanCheckpointGet(self.__scanId)
+            if not self.__checkpoint:
+                raise ValueError(f"No checkpoint to resume scan {self.__scanId} from")
+        elif self.__dbh.scanInstanceGet(self.__scanId) is None:
+            # Scans queued by the web UI are created when they are queued
+            self.__dbh.scanInstanceCreate(self.__scanId, self.__scanName, self.__targetValue)
 
         # Create our target
         try:
@@ -124,7 +168,8 @@ class SpiderFootScanner():
 
         # Save the config current set for this scan
         self.__config['_modulesenabled'] = self.__moduleList
-        self.__dbh.scanConfigSet(self.__scanId, self.__sf.configSerialize(deepcopy(self.__config)))
+        if not resume:
+            self.__dbh.scanConfigSet(self.__scanId, self.__sf.configSerialize(deepcopy(self.__config)))
 
         # Process global options that point to other places for data
 
@@ -168,17 +213,19 @@ class SpiderFootScanner():
         # Set the user agent
         self.__config['_useragent'] = self.__sf.optValueToData(self.__config['_useragent'])
 
-        # Get internet TLDs
-        tlddata = self.__sf.cacheGet("internet_tlds", self.__config['_internettlds_cache'])
+        # Get internet TLDs, unless they have already been loaded by the caller
+        if not isinstance(self.__config['_internettlds'], list):
+            tlddata = self.__sf.cacheGet("internet_tlds", self.__config['_internettlds_cache'])
 
-        # If it wasn't loadable from cache, load it from scratch
-        if tlddata is None:
-            self.__config['_internettlds'] = self.__sf.optValueToData(self.__config['_internettlds'])
-            self.__sf.cachePut("internet_tlds", self.__config['_internettlds'])
-        else:
-            self.__config["_internettlds"] = tlddata.splitlines()
+            # If it wasn't loadable from cache, load it from scratch
+            if tlddata is None:
+                self.__config['_internettlds'] = self.__sf.optValueToData(self.__config['_internettlds'])
+                self.__sf.cachePut("internet_tlds", self.__config['_internettlds'])
+            else:
+                self.__config["_internettlds"] = tlddata.splitlines()
 
-        self.__setStatus("INITIALIZING", time.time() * 1000, None)
+        # A resumed scan keeps its original start time
+        self.__setStatus("INITIALIZING", None if resume else time.time() * 1000, None)
 
         if start:
             self.__startScan()
@@ -222,15 +269,492 @@ class SpiderFootScanner():
         self.__status = status
         self.__dbh.scanInstanceSet(self.__scanId, started, ended, status)
 
+    def __checkForStop(self):
+        """Check whether the user has requested the scan to be aborted.
+
+        The scan's stop event is set by the controller, or by this method
+        when the scan status in the database is "ABORT-REQUESTED", for scans
+        stopped from another process. The database is checked at most once
+        per second.
+
+        Returns:
+            bool: scan abort was requested
+        """
+        if self.__stopEvent.is_set():
+            return True
+
+        if time.time() - self.__lastStopCheck < 1:
+            return False
+
+        self.__lastStopCheck = time.time()
+
+        scanstatus = self.__dbh.scanInstanceGet(self.__scanId)
+        if scanstatus and scanstatus[5] == "ABORT-REQUESTED":
+            self.__stopEvent.set()
+
+        return self.__stopEvent.is_set()
+
+    def __buildEventRouting(self):
+        """Build the index of listener modules for each event type, in the
+        order of module priority. Event types not in the index are only
+        dispatched to modules watching all events (i.e. '*').
+
+        Note the absence of a check for whether a module can listen to
+        itself. That is intentional because some modules will act on their
+        own notifications (e.g. sfp_dns)!
+        """
+        self.__eventRouting = dict()
+        self.__wildcardListeners = list()
+
+        listeners = list()
+        for module in sorted(self.__moduleInstances.values(), key=lambda m: m._priority):
+            watchedEvents = module.watchedEvents()
+            if watchedEvents is None:
+                continue
+
+            listeners.append((module, set(watchedEvents)))
+            if '*' in watchedEvents:
+                self.__wildcardListeners.append(module)
+
+        for module, watchedEvents in listeners:
+            for eventType in watchedEvents:
+                if eventType == '*' or eventType in self.__eventRouting:
+                    continue
+
+                self.__eventRouting[eventType] = [
+                    m for m, w in listeners if eventType in w or '*' in w
+                ]
+
+    def __queueEvent(self, module, sfEvent):
+        """Put an event on a module's incoming event queue. If the queue is
+        full, the event is held back until the module catches up, so that
+        one busy module does not hold up dispatching events to the others.
+
+        Args:
+            module (SpiderFootPlugin): module to handle the event
+            sfEvent (SpiderFootEvent): event
+        """
+        self.__eventStore.queued(sfEvent)
+
+        # Modules count the time the event waits to be handled from here
+        if sfEvent._dispatched is None:
+            sfEvent._dispatched = time.monotonic()
+
+        pending = self.__pendingEvents.get(module.__name__)
+
+        if not pending:
+            try:
+                module.incomingEventQueue.put_nowait(sfEvent)
+                return
+            except queue.Full:
+                pass
+
+        if self.__tracer is not None:
+            self.__tracer.instant("held back", "dispatch", {'module': module.__name__, 'eventType': sfEvent.eventType})
+
+        self.__pendingEvents.setdefault(module.__name__, deque()).append(sfEvent)
+
+    def __queuePendingEvents(self):
+        """Put events held back for modules on their incoming event queues,
+        as far as space allows.
+
+        Returns:
+            bool: events are still held back for some modules
+        """
+        for modName in sorted(self.__pendingEvents, key=lambda m: self.__moduleInstances[m]._priority):
+            module = self.__moduleInstances[modName]
+            pending = self.__pendingEvents[modName]
+
+            while pending:
+                try:
+                    module.incomingEventQueue.put_nowait(pending[0])
+                except queue.Full:
+                    break
+                pending.popleft()
+
+            if not pending:
+                del self.__pendingEvents[modName]
+
+        return bool(self.__pendingEvents)
+
+    def __startBrokerPool(self):
+        """Publish the events of the scan's modules to the broker set with
+        the _broker option, for module workers to handle. The storage
+        modules, and asynchronous modules, still handle their events in
+        the scan process."""
+
+        if not self.__config.get('_broker'):
+            return
+
+        modules = [m for m in self.__moduleInstances.values() if "__stor" not in m.__name__ and not m.isAsync]
+        if not modules:
+            return
+
+        broker = SpiderFootSqliteBroker(self.__config['_broker'])
+        self.__brokerPool = SpiderFootBrokerPool(broker, self.__config, self.__scanId, self.__target, self.__stopEvent, self.__sf.socksProxy)
+
+        for module in modules:
+            modName = module.__name__
+
+            tempStorage = None
+            if self.__checkpoint and modName in self.__checkpoint['moduleStates']:
+                tempStorage = json.loads(self.__checkpoint['moduleStates'][modName])
+
+            self.__brokerPool.addModule(modName, tempStorage)
+            module.setProcessPool(self.__brokerPool)
+
+            # Events are sent on while workers handle the previous ones
+            module._maxInFlight = max(module._maxInFlight, self.__brokerPool.jobsInFlight)
+
+        self.__sf.status(f"{len(modules)} modules will handle events in module workers.")
+
+    def __startProcessPool(self):
+        """Start the pool of processes in which CPU-bound modules handle
+        events, and add the CPU-bound modules to it. Modules are only set
+        up in their process once they are sent an event."""
+
+        size = self.__config.get('_cpuprocesses', 4)
+        if size <= 0:
+            return
+
+        modules = [m for m in self.__moduleInstances.values() if m._cpuBound and not m.isAsync and m.__processPool__ is None]
+        if not modules:
+            return
+
+        if not SpiderFootProcessPool.available():
+            self.__sf.debug("CPU-bound modules will handle events in worker threads, as the scan is running in a daemonic process.")
+            return
+
+        self.__processPool = SpiderFootProcessPool(self.__config, self.__scanId, self.__target, size, self.__sf.socksProxy)
+
+        for module in modules:
+            modName = module.__name__
+
+            tempStorage = None
+            if self.__checkpoint and modName in self.__checkpoint['moduleStates']:
+                tempStorage = json.loads(self.__checkpoint['moduleStates'][modName])
+
+            self.__processPool.addModule(modName, self.__config['__modules__'][modName]['opts'], tempStorage)
+            module.setProcessPool(self.__processPool)
+
+    def __startEventLoop(self):
+        """Start the event loop shared by asynchronous modules, running on
+        its own thread. Blocking calls made by the modules through the
+        SpiderFoot async helpers run on the event loop's executor."""
+
+        self.__eventLoop = asyncio.new_event_loop()
+        self.__eventLoopExecutor = ThreadPoolExecutor(
+            max_workers=self.__config.get('_asyncthreads', 100),
+            thread_name_prefix=f"{self.__scanId}_async"
+        )
+        self.__eventLoop.set_default_executor(self.__eventLoopExecutor)
+
+        self.__eventLoopThread = threading.Thread(
+            target=self.__eventLoop.run_forever,
+            name=f"{self.__scanId}_eventloop"
+        )
+        self.__eventLoopThread.daemon = True
+        self.__eventLoopThread.start()
+
+    def __stopEventLoop(self):
+        """Stop the event loop shared by asynchronous modules, cancelling
+        any events still being handled."""
+
+        loop = self.__eventLoop
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        self.__eventLoopThread.join()
+
+        # asyncio.all_tasks() is not available before Python 3.7
+        allTasks = getattr(asyncio, 'all_tasks', None) or asyncio.Task.all_tasks
+        tasks = allTasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+
+        # Don't wait for requests still running on the executor
+        self.__eventLoopExecutor.shutdown(wait=False)
+        loop.close()
+
+        self.__eventLoop = None
+        self.__eventLoopThread = None
+        self.__eventLoopExecutor = None
+
+    def __saveCheckpoint(self, modules):
+        """Save a checkpoint of the scan, from which it can be resumed.
+
+        Modules are paused while the checkpoint is taken, so that their
+        temporary storage is consistent with the events waiting to be
+        handled. If modules are busy handling events for too long, the
+        checkpoint is skipped until next time.
+
+        Args:
+            modules (list): module instances
+        """
+        self.__lastCheckpoint = time.time()
+        deadline = self.__lastCheckpoint + 10
+        paused = list()
+
+        try:
+            for module in modules:
+                paused.append(module)
+                if not module.pause(max(0, deadline - time.time())):
+                    self.__sf.debug(f"Skipped checkpoint of scan {self.__scanId}, {module.__name__} is busy.")
+                    return
+
+            # Events waiting to be dispatched, and waiting to be handled by each module
+            queuedEvents = list()
+            with self.__eventQueue.mutex:
+                queuedEvents.extend((sfEvent, '', storeOnly) for sfEvent, storeOnly in self.__eventQueue.queue)
+
+            for module in modules:
+                with module.incomingEventQueue.mutex:
+                    queuedEvents.extend((sfEvent, module.__name__, False) for sfEvent in module.incomingEventQueue.queue)
+                queuedEvents.extend((sfEvent, module.__name__, False) for sfEvent in self.__pendingEvents.get(module.__name__, []))
+
+            # Source events are saved before the events which they are the source of
+            events = list()
+            saved = set()
+            for sfEvent, modName, storeOnly in queuedEvents:
+                sources = list()
+                while sfEvent is not None and sfEvent.hash not in saved:
+                    saved.add(sfEvent.hash)
+                    sources.append(sfEvent)
+                    sfEvent = sfEvent.sourceEvent
+                events.extend(reversed(sources))
+
+            moduleStates = dict()
+            for module in modules:
+                try:
+                    moduleStates[module.__name__] = json.dumps(module.getTempStorage())
+                except (TypeError, ValueError, IOError) as e:
+                    self.__sf.debug(f"Unable to save the state of {module.__name__} in the checkpoint: {e}")
+
+            self.__dbh.scanCheckpointSet(
+                self.__scanId,
+                moduleStates,
+                events,
+                [(sfEvent.hash, modName, storeOnly) for sfEvent, modName, storeOnly in queuedEvents],
+                json.dumps(self.__dedupIndex.getState())
+            )
+        finally:
+            for module in paused:
+                module.unpause()
+
+    def __traceSpan(self, name, cat, args=None):
+        """Record a span on the scan's timeline, if the scan is traced.
+
+        Args:
+            name (str): span name
+            cat (str): span category
+            args (dict): span details
+
+        Returns:
+            contextmanager: context which the span covers
+        """
+        if self.__tracer is None:
+            return ExitStack()
+
+        return self.__tracer.span(name, cat, args)
+
+    def __saveModuleStats(self):
+        """Save the runtime statistics of the scan's modules."""
+        try:
+            self.__dbh.scanModuleStatsSet(
+                self.__scanId,
+                {modName: stats.asDict() for modName, stats in self.__moduleStats.items()}
+            )
+        except IOError as e:
+            self.__sf.error(f"Unable to save module statistics of scan {self.__scanId}: {e}")
+
+    def __restoreCheckpoint(self):
+        """Queue the events which were waiting to be handled when the
+        checkpoint the scan is resumed from was saved."""
+
+        # Results found after the checkpoint will be found again
+        self.__dbh.scanResultDeleteAfter(self.__scanId, self.__checkpoint['lastResultRowId'])
+
+        events = dict()
+        for eventHash, eventType, generated, confidence, visibility, risk, module, data, sourceEventHash in self.__checkpoint['events']:
+            if eventType == "ROOT":
+                sfEvent = SpiderFootEvent(eventType, data, module, None)
+            else:
+                sourceEvent = events.get(sourceEventHash, events.get("ROOT"))
+                if sourceEvent is None:
+                    self.__sf.error(f"Source event of {eventType} event missing from checkpoint, skipping.")
+                    continue
+                sfEvent = SpiderFootEvent(eventType, data, module, sourceEvent, confidence, visibility, risk)
+
+            # Keep the identity of the event, which stored results refer to
+            sfEvent._generated = generated
+            sfEvent._hash = eventHash
+            events[eventHash] = sfEvent
+
+        for eventHash, modName, storeOnly in self.__checkpoint['queuedEvents']:
+            sfEvent = events.get(eventHash)
+            if sfEvent is None:
+                continue
+
+            if not modName:
+                self.__eventQueue.put((sfEvent, storeOnly))
+                continue
+
+            module = self.__moduleInstances.get(modName)
+            if module is None:
+                continue
+
+            self.__eventStore.add(sfEvent)
+            self.__queueEvent(module, sfEvent)
+            self.__eventStore.handled(sfEvent)
+
+    def __waitForThreads(self):
+        """Dispatch events produced by modules to the incoming event queues
+        of the modules watching for them, until all modules are idle or
+        the scan is aborted.
+
+        Returns:
+            bool: scan was aborted
+
+        Raises:
+            AssertionError: a module requested the scan to stop
+        """
+        modules = sorted(self.__moduleInstances.values(), key=lambda m: m._priority)
+
+        for module in modules:
+            module.start()
+
+        checkpointInterval = self.__config.get('_checkpointinterval', 300)
+        self.__lastCheckpoint = time.time()
+
+        try:
+            while True:
+                if self.__checkForStop():
+                    return True
+
+                if checkpointInterval > 0 and time.time() - self.__lastCheckpoint >= checkpointInterval:
+                    with self.__traceSpan("checkpoint", "checkpoint"):
+                        self.__saveCheckpoint(modules)
+                        self.__saveModuleStats()
+
+                for module in modules:
+                    if module._stopScanning:
+                        raise AssertionError(f"{module.__name__} requested the scan to stop")
+
+                # Write results buffered while the storage modules are idle
+                self.__flushStoredEvents(due=True)
+
+                # Check more often while modules are catching up
+                pending = self.__queuePendingEvents()
+
+                try:
+                    sfEvent, storeOnly = self.__eventQueue.get(timeout=0.01 if pending else 0.1)
+                except queue.Empty:
+                    # Only modules with unfinished events can produce new
+                    # events, so modules must be checked before the queue.
+                    if not pending and not any(module.running for module in modules) and self.__eventQueue.empty():
+                        return False
+                    continue
+
+                with self.__traceSpan("dispatch", "dispatch", {'eventType': sfEvent.eventType, 'module': sfEvent.module}):
+                    # Modules reference the event's source event by hash from now on
+                    self.__eventStore.add(sfEvent)
+
+                    for module in self.__eventRouting.get(sfEvent.eventType, self.__wildcardListeners):
+                        if storeOnly and "__stor" not in module.__module__:
+                            continue
+
+                        if module._dedupEvents and not self.__dedupIndex.add(module.__name__, sfEvent):
+                            continue
+
+                        self.__queueEvent(module, sfEvent)
+
+                    self.__eventStore.handled(sfEvent)
+                self.__eventQueue.task_done()
+        finally:
+            # Tell the module worker threads to stop and wait for them
+            # to finish handling their current event.
+            for module in modules:
+                module._stopScanning = True
+            if self.__processPool is not None:
+                self.__processPool.stop()
+
+            for module in modules:
+                for thread in module._threads:
+                    thread.join()
+
+            self.__stopEventLoop()
+            if self.__processPool is not None:
+                self.__processPool.shutdown()
+            if self.__brokerPool is not None:
+                self.__brokerPool.shutdown()
+                self.__brokerPool.broker.close()
+            self.__eventStore.close()
+            self.__flushStoredEvents()
+            self.__saveModuleStats()
+
+    def __flushStoredEvents(self, due=False):
+        """Write the results buffered by the storage modules to the database.
+
+        Args:
+            due (bool): only write them if they have waited for the batch interval
+        """
+        try:
+            self.__dbh.scanEventFlush(due)
+        except IOError as e:
+            self.__sf.error(f"Failed to store scan results: {e}")
+
     def __startScan(self):
         """Start running a scan."""
 
         aborted = False
 
-        self.__setStatus("STARTING", time.time() * 1000, None)
-        self.__sf.status(f"Scan [{self.__scanId}] initiated.")
+        self.__eventQueue = queue.Queue()
+        self.__dedupIndex = SpiderFootDedupIndex(self.__config.get('_dedupbloomsize', 0))
+        if self.__checkpoint and self.__checkpoint.get('dedupState'):
+            try:
+                self.__dedupIndex.restoreState(json.loads(self.__checkpoint['dedupState']))
+            except (TypeError, ValueError) as e:
+                self.__sf.error(f"Unable to restore the duplicate event index from the checkpoint, modules may receive duplicate events: {e}")
+        self.__pendingEvents = dict()
+        self.__eventStore = SpiderFootEventStore(self.__config.get('_eventspillsize', 1024))
+        self.__moduleStats = dict()
+
+        # Record a timeline of the scan's execution if requested
+        self.__tracer = None
+        if self.__config.get('_tracescan', False):
+            try:
+                self.__tracer = SpiderFootTracer(SpiderFoot.tracePath(self.__scanId), f"SpiderFoot scan {self.__scanId}")
+            except (OSError, ValueError) as e:
+                self.__sf.error(f"Unable to trace scan {self.__scanId}: {e}")
+
+        # Log events are written to the database in the background, so
+        # that logging doesn't hold up modules.
+        try:
+            self.__scanLogWriter = SpiderFootScanLogWriter(self.__dbh, self.__config.get('_logbacklog', 10000),
+                                                           self.__config.get('_logoverflow', 'sample'))
+            self.__sf.scanLogWriter = self.__scanLogWriter
+        except (TypeError, ValueError) as e:
+            self.__sf.error(f"Invalid scan log settings, logging synchronously: {e}")
+
+        # Budget of events handled concurrently across all modules
+        if self.__config.get('_maxworkers', 100) > 0:
+            self.__workerBudget = SpiderFootWorkerBudget(self.__config.get('_maxworkers', 100))
+        if self.__checkpoint:
+            self.__setStatus("STARTING")
+            self.__sf.status(f"Scan [{self.__scanId}] resumed.")
+        else:
+            self.__setStatus("STARTING", time.time() * 1000, None)
+            self.__sf.status(f"Scan [{self.__scanId}] initiated.")
 
         try:
+            globalConfig = MappingProxyType(self.__config)
+
+            # Statistics carry on from where a resumed scan left off
+            savedStats = self.__dbh.scanModuleStatsGet(self.__scanId) if self.__checkpoint else dict()
+
             # moduleList = list of modules the user wants to run
             for modName in self.__moduleList:
                 if modName == '':
@@ -250,15 +774,43 @@ class SpiderFootScanner():
                     continue
 
                 # Set up the module
-                # Configuration is a combined global config with module-specific options
-                self.__modconfig[modName] = deepcopy(self.__config['__modules__'][modName]['opts'])
-                for opt in list(self.__config.keys()):
-                    self.__modconfig[modName][opt] = deepcopy(self.__config[opt])
+                # Configuration is a read-only view of the global config layered
+                # over the module-specific options, which is shared by all modules
+                # rather than copied for each of them. As when the global options
+                # were copied over the module options, global options win.
+                self.__modconfig[modName] = MappingProxyType(ChainMap(globalConfig, self.__config['__modules__'][modName]['opts']))
 
                 mod.clearListeners()  # clear any listener relationships from the past
-                mod.setup(self.__sf, self.__modconfig[modName])
+
+                # Restore the module's state when resuming from a checkpoint
+                if self.__checkpoint and modName in self.__checkpoint['moduleStates']:
+                    mod.restoreTempStorage(json.loads(self.__checkpoint['moduleStates'][modName]))
+
+                # Modules are only set up once they are sent an event, as
+                # many are never sent one for a given target. Modules which
+                # enrich the target are needed before any event is sent.
+                if type(mod).enrichTarget is SpiderFootPlugin.enrichTarget:
+                    mod.deferSetup(self.__sf, self.__modconfig[modName])
+                else:
+                    mod.setup(self.__sf, self.__modconfig[modName])
                 mod.setDbh(self.__dbh)
                 mod.setScanId(self.__scanId)
+                mod.setStopEvent(self.__stopEvent)
+
+                # Scheduling options default to the module's own settings
+                mod._maxInFlight = max(1, int(self.__modconfig[modName].get('maxinflight', mod._maxInFlight)))
+                mod._priority = int(self.__modconfig[modName].get('priority', mod._priority))
+                if self.__workerBudget is not None:
+                    mod.setWorkerBudget(self.__workerBudget)
+                mod.setEventStore(self.__eventStore)
+                self.__moduleStats[modName] = SpiderFootModuleStats(savedStats.get(modName))
+                mod.setStats(self.__moduleStats[modName])
+                if self.__tracer is not None:
+                    mod.setTracer(self.__tracer)
+
+                # Events are handled by each module's own worker thread
+                mod.incomingEventQueue = queue.Queue(maxsize=self.__config.get('_queuesize', 1000))
+                mod.outgoingEventQueue = self.__eventQueue
 
                 # Give modules a chance to 'enrich' the original target with
                 # aliases of that target.
@@ -278,59 +830,60 @@ class SpiderFootScanner():
 
                 self.__sf.status(modName + " module loaded.")
 
-            # Register listener modules and then start all modules sequentially
+            # Register the target with each module
             for module in list(self.__moduleInstances.values()):
-                # Register the target with the module
                 module.setTarget(self.__target)
 
-                for listenerModule in list(self.__moduleInstances.values()):
-                    # Careful not to register twice or you will get duplicate events
-                    if listenerModule in module._listenerModules:
-                        continue
-                    # Note the absence of a check for whether a module can register
-                    # to itself. That is intentional because some modules will
-                    # act on their own notifications (e.g. sfp_dns)!
-                    if listenerModule.watchedEvents() is not None:
-                        module.registerListener(listenerModule)
+            # Modules handle events in module workers when the scan is
+            # distributed, and CPU-bound modules in processes of their own.
+            self.__startBrokerPool()
+            self.__startProcessPool()
+
+            # Asynchronous modules share an event loop, run alongside
+            # the worker threads of the other modules.
+            asyncModules = [m for m in self.__moduleInstances.values() if m.isAsync]
+            if asyncModules:
+                self.__startEventLoop()
+                for module in asyncModules:
+                    module.setEventLoop(self.__eventLoop)
+
+            # Work out once which modules each event type is dispatched to
+            self.__buildEventRouting()
 
             # Now we are ready to roll..
             self.__setStatus("RUNNING")
 
-            # Create a pseudo module for the root event to originate from
-            psMod = SpiderFootPlugin()
-            psMod.__name__ = "SpiderFoot UI"
-            psMod.setTarget(self.__target)
-            psMod.setDbh(self.__dbh)
-            psMod.clearListeners()
-            for mod in list(self.__moduleInstances.values()):
-                if mod.watchedEvents() is not None:
-                    psMod.registerListener(mod)
-
-            # Create the "ROOT" event which un-triggered modules will link events to
-            rootEvent = SpiderFootEvent("ROOT", self.__targetValue, "", None)
-            psMod.notifyListeners(rootEvent)
-            firstEvent = SpiderFootEvent(self.__targetType, self.__targetValue,
-                                         "SpiderFoot UI", rootEvent)
-            psMod.notifyListeners(firstEvent)
-
-            # Special case.. check if an INTERNET_NAME is also a domain
-            if self.__targetType == 'INTERNET_NAME':
-                if self.__sf.isDomain(self.__targetValue, self.__config['_internettlds']):
-                    firstEvent = SpiderFootEvent('DOMAIN_NAME', self.__targetValue,
-                                                 "SpiderFoot UI", rootEvent)
-                    psMod.notifyListeners(firstEvent)
-
-            # If in interactive mode, loop through this shared global variable
-            # waiting for inputs, and process them until my status is set to
-            # FINISHED.
-
-            # Check in case the user requested to stop the scan between modules
-            # initializing
-            for module in list(self.__moduleInstances.values()):
-                if module.checkForStop():
-                    self.__setStatus('ABORTING')
-                    aborted = True
-                    break
+            if self.__checkpoint:
+                # Carry on from the events waiting to be handled
+                self.__restoreCheckpoint()
+            else:
+                # Create a pseudo module for the root event to originate from
+                psMod = SpiderFootPlugin()
+                psMod.__name__ = "SpiderFoot UI"
+                psMod.setTarget(self.__target)
+                psMod.setDbh(self.__dbh)
+                psMod.clearListeners()
+                psMod.outgoingEventQueue = self.__eventQueue
+
+                # Create the "ROOT" event which un-triggered modules will link events to
+                rootEvent = SpiderFootEvent("ROOT", self.__targetValue, "", None)
+                psMod.notifyListeners(rootEvent)
+                firstEvent = SpiderFootEvent(self.__targetType, self.__targetValue,
+                                             "SpiderFoot UI", rootEvent)
+                psMod.notifyListeners(firstEvent)
+
+                # Special case.. check if an INTERNET_NAME is also a domain
+                if self.__targetType == 'INTERNET_NAME':
+                    if self.__sf.isDomain(self.__targetValue, self.__config['_internettlds']):
+                        firstEvent = SpiderFootEvent('DOMAIN_NAME', self.__targetValue,
+                                                     "SpiderFoot UI", rootEvent)
+                        psMod.notifyListeners(firstEvent)
+
+            # Dispatch events to the modules until they are all idle, or
+            # the user requests the scan to be stopped.
+            if self.__waitForThreads():
+                self.__setStatus('ABORTING')
+                aborted = True
 
             if aborted:
                 self.__sf.status(f"Scan [{self.__scanId}] aborted.")
@@ -338,6 +891,7 @@ class SpiderFootScanner():
             else:
                 self.__sf.status(f"Scan [{self.__scanId}] completed.")
                 self.__setStatus("FINISHED", None, time.time() * 1000)
+                self.__dbh.scanCheckpointDelete(self.__scanId)
         except BaseException as e:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             self.__sf.error(f"Unhandled exception ({e.__class__.__name__}) encountered during scan."
@@ -346,4 +900,262 @@ class SpiderFootScanner():
             self.__sf.status(f"Scan [{self.__scanId}] failed: {e}")
             self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
 
+        if self.__scanLogWriter is not None:
+            self.__sf.scanLogWriter = None
+            self.__scanLogWriter.close()
+
+        if self.__tracer is not None:
+            self.__tracer.close()
+
         self.__dbh.close()
+
+
+class SpiderFootScanWorkerPool():
+    """Pool of long-lived worker processes which run the scans queued in
+    the database with SpiderFootDb.scanQueueAdd(), one scan per worker at
+    a time, oldest first.
+
+    Where the platform supports it, workers are forked from a forkserver
+    process which has already imported the scanner and the code of all
+    modules, so workers start warm and share the module code. Otherwise
+    workers are spawned, and import the module code before taking scans.
+
+    Attributes:
+        size (int): number of worker processes
+        startMethod (str): multiprocessing start method of the workers
+    """
+
+    __size = 0
+    __config = None
+    __context = None
+    __workers = list()
+    __stopEvents = list()
+    __stopScanIds = list()
+    __shutdownEvent = None
+
+    def __init__(self, config, size):
+        """Initialize the pool.
+
+        Args:
+            config (dict): SpiderFoot config, which the saved config of each scan is applied to
+            size (int): number of worker processes
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(config, dict):
+            raise TypeError(f"config is {type(config)}; expected dict()")
+        if not config:
+            raise ValueError("config is empty")
+
+        if not isinstance(size, int):
+            raise TypeError(f"size is {type(size)}; expected int()")
+        if size < 1:
+            raise ValueError(f"size value is {size}; expected 1 or more")
+
+        self.__config = deepcopy(config)
+        self.__size = size
+        self.__workers = list()
+        self.__stopEvents = list()
+        self.__stopScanIds = list()
+
+        if 'forkserver' in mp.get_all_start_methods():
+            self.__context = mp.get_context('forkserver')
+            self.__context.set_forkserver_preload(['sfscan'] + [f"modules.{modName}" for modName in self.__modules()])
+        else:
+            self.__context = mp.get_context('spawn')
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def startMethod(self):
+        return self.__context.get_start_method()
+
+    def __modules(self):
+        """Names of the modules the workers preload.
+
+        Returns:
+            list: module names
+        """
+        return sorted((self.__config.get('__modules__') or dict()).keys())
+
+    def start(self):
+        """Start the worker processes.
+
+        Scans taken by workers which are no longer running, e.g. because
+        the web server was restarted during the scan, are marked as aborted
+        so they can be resumed.
+        """
+        if self.__workers:
+            return
+
+        dbh = SpiderFootDb(self.__config)
+        for scanId in dbh.scanQueueReset():
+            dbh.scanLogEvent(scanId, "STATUS", "Scan aborted as the worker running it stopped.")
+        dbh.close()
+
+        self.__shutdownEvent = self.__context.Event()
+
+        for workerId in range(self.__size):
+            stopEvent = self.__context.Event()
+            stopScanId = self.__context.Array('c', 64)
+            # Not daemonic, so scans can start processes for CPU-bound modules
+            p = self.__context.Process(target=runScanWorker, args=(str(workerId), self.__config, stopEvent, self.__shutdownEvent, stopScanId),
+                                       name=f"SpiderFootScanWorker-{workerId}")
+            p.start()
+            self.__workers.append(p)
+            self.__stopEvents.append(stopEvent)
+            self.__stopScanIds.append(stopScanId)
+
+    def stop(self):
+        """Stop the worker processes, aborting the scans they are running."""
+        if not self.__workers:
+            return
+
+        self.__shutdownEvent.set()
+        for stopEvent in self.__stopEvents:
+            stopEvent.set()
+
+        for p in self.__workers:
+            p.join(10)
+            if p.is_alive():
+                p.terminate()
+
+        self.__workers = list()
+        self.__stopEvents = list()
+        self.__stopScanIds = list()
+
+    def stopScan(self, scanId):
+        """Signal the worker running a scan to abort it immediately.
+
+        The worker is told which scan to abort, so a request for a scan it
+        finished meanwhile does not abort the next scan it took.
+
+        Args:
+            scanId (str): scan instance ID
+
+        Returns:
+            bool: a worker in this pool was running the scan
+        """
+        if not self.__workers:
+            return False
+
+        dbh = SpiderFootDb(self.__config)
+        job = dbh.scanQueueGet(scanId)
+        dbh.close()
+
+        if not job or not job[3] or job[4] is None:
+            return False
+
+        workerId = int(job[4])
+        if workerId >= len(self.__stopEvents):
+            return False
+
+        stopScanId = self.__stopScanIds[workerId]
+        if len(scanId.encode()) >= len(stopScanId):
+            return False
+
+        with stopScanId.get_lock():
+            stopScanId.value = scanId.encode()
+            self.__stopEvents[workerId].set()
+        return True
+
+# end of SpiderFootScanWorkerPool class
+
+
+def runScanWorker(workerId, config, stopEvent, shutdownEvent, stopScanId):
+    """Run the scans in the scan queue, one at a time, until shutdownEvent
+    is set. Runs in a scan worker process of SpiderFootScanWorkerPool.
+
+    Each scan is given its own stop event, which is only set when the scan
+    the pool asks to abort is the scan the worker is running.
+
+    Args:
+        workerId (str): scan worker ID
+        config (dict): SpiderFoot config, which the saved config of each scan is applied to
+        stopEvent (multiprocessing.Event): set by the pool to abort the scan in stopScanId
+        shutdownEvent (multiprocessing.Event): set by the pool to stop the worker
+        stopScanId (multiprocessing.Array): ID of the scan to abort, set by the pool
+                                            with its lock held before setting stopEvent
+    """
+    dbh = SpiderFootDb(config)
+    sf = SpiderFoot(config)
+
+    # Stop event of the scan being run, by scan ID
+    running = dict()
+    runningLock = threading.Lock()
+
+    def relayStopRequests():
+        while not shutdownEvent.is_set():
+            if not stopEvent.wait(1):
+                continue
+            with stopScanId.get_lock():
+                scanId = stopScanId.value.decode()
+                stopEvent.clear()
+            with runningLock:
+                if scanId in running:
+                    running[scanId].set()
+
+        with runningLock:
+            for scanStopEvent in running.values():
+                scanStopEvent.set()
+
+    relay = threading.Thread(target=relayStopRequests, name=f"SpiderFootScanWorkerStop-{workerId}", daemon=True)
+    relay.start()
+
+    # Warm up, so scans don't wait for module code or static data to load.
+    # Modules already imported by the forkserver are not imported again.
+    for modName in (config.get('__modules__') or dict()):
+        try:
+            __import__('modules.' + modName, globals(), locals(), [modName])
+        except ImportError:
+            continue
+
+    sf.dictwords()
+    sf.dictnames()
+
+    while not shutdownEvent.is_set():
+        # Cleared before taking a scan, so a scan is only aborted by a
+        # request made after the worker took it.
+        with stopScanId.get_lock():
+            stopScanId.value = b''
+
+        job = dbh.scanQueueNext(workerId)
+        if job is None:
+            shutdownEvent.wait(1)
+            continue
+
+        scanId, targetType, resume = job
+
+        # A request made before the stop event was registered is kept in
+        # stopScanId
+        scanStopEvent = threading.Event()
+        with stopScanId.get_lock(), runningLock:
+            running[scanId] = scanStopEvent
+            if stopScanId.value.decode() == scanId or shutdownEvent.is_set():
+                scanStopEvent.set()
+
+        try:
+            info = dbh.scanInstanceGet(scanId)
+            scanconfig = dbh.scanConfigGet(scanId)
+            if not info or not scanconfig:
+                continue
+
+            modlist = scanconfig['_modulesenabled'].split(',')
+            cfg = sf.configUnserialize(scanconfig, deepcopy(config))
+
+            SpiderFootScanner(info[0], scanId, info[1], targetType, modlist, cfg, stopEvent=scanStopEvent, resume=resume)
+        except Exception as e:
+            dbh.scanLogEvent(scanId, "ERROR", f"Scan [{scanId}] failed: {e}")
+            dbh.scanInstanceSet(scanId, None, time.time() * 1000, "ERROR-FAILED")
+        finally:
+            with runningLock:
+                running.pop(scanId, None)
+            dbh.scanQueueRemove(scanId)
+
+    relay.join()
+    dbh.close()
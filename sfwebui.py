@@ -14,6 +14,7 @@ import html
 import json
 import logging
 import multiprocessing as mp
+import os
 import random
 import time
 from copy import deepcopy
@@ -28,7 +29,7 @@ from secure import SecureHeaders
 
 from spiderfoot import SpiderFootDb
 from sflib import SpiderFoot
-from sfscan import SpiderFootScanner
+from sfscan import SpiderFootScanWorkerPool
 
 mp.set_start_method("spawn", force=True)
 
@@ -39,6 +40,7 @@ class SpiderFootWebUi:
     config = dict()
     token = None
     docroot = ''
+    scanWorkers = None
     log = logging.getLogger(__name__)
 
     def __init__(self, web_config, config):
@@ -72,6 +74,12 @@ class SpiderFootWebUi:
         sf = SpiderFoot(self.defaultConfig)
         self.config = sf.configUnserialize(dbh.configGet(), self.defaultConfig)
 
+        # Scans are queued in the database and run by a fixed number of
+        # worker processes, started and stopped with the web server.
+        self.scanWorkers = SpiderFootScanWorkerPool(self.config, web_config.get('scanworkers', 3))
+        cherrypy.engine.subscribe('start', self.scanWorkers.start)
+        cherrypy.engine.subscribe('stop', self.scanWorkers.stop)
+
         cherrypy.config.update({
             'error_page.401': self.error_page_401,
             'error_page.404': self.error_page_404,
@@ -421,11 +429,39 @@ class SpiderFootWebUi:
         else:
             finished = "Not yet"
         ret['meta'] = [meta[0], meta[1], meta[2], started, finished, meta[5]]
+        ret['trace'] = os.path.isfile(SpiderFoot.tracePath(id))
 
         return json.dumps(ret).encode('utf-8')
 
     scanopts.exposed = True
 
+    def scantrace(self, id):
+        """Execution trace of a scan, in the Trace Event Format
+
+        Args:
+            id (str): scan ID
+
+        Returns:
+            bytes: trace as JSON
+        """
+
+        dbh = SpiderFootDb(self.config)
+        if not dbh.scanInstanceGet(id):
+            return self.error("Scan ID not found.")
+
+        try:
+            with open(SpiderFoot.tracePath(id), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return self.error("No execution trace was recorded for this scan. Enable tracing of scans in the settings to record one.")
+
+        cherrypy.response.headers['Content-Disposition'] = f"attachment; filename=SpiderFoot-{id}-trace.json"
+        cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
+        cherrypy.response.headers['Pragma'] = "no-cache"
+        return data
+
+    scantrace.exposed = True
+
     def rerunscan(self, id):
         """Rerun a scan
 
@@ -470,25 +506,70 @@ class SpiderFootWebUi:
         if targetType not in ["HUMAN_NAME", "BITCOIN_ADDRESS"]:
             scantarget = scantarget.lower()
 
-        # Start running a new scan
+        # Queue a new scan
         scanId = sf.genScanInstanceId()
         try:
-            p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-            p.daemon = True
-            p.start()
+            self.queueScan(scanname, scanId, scantarget, targetType, modlist, cfg)
         except Exception as e:
             self.log.error(f"[-] Scan [{scanId}] failed: {e}")
             return self.error(f"[-] Scan [{scanId}] failed: {e}")
 
-        # Wait until the scan has initialized
-        while dbh.scanInstanceGet(scanId) is None:
-            self.log.info("Waiting for the scan to initialize...")
-            time.sleep(1)
-
         raise cherrypy.HTTPRedirect(f"{self.docroot}/scaninfo?id={scanId}", status=302)
 
     rerunscan.exposed = True
 
+    def resumescan(self, id):
+        """Resume an interrupted scan from its last checkpoint
+
+        Args:
+            id (str): scan ID
+
+        Returns:
+            None
+
+        Raises:
+            HTTPRedirect: redirect to info page for the scan
+        """
+
+        sf = SpiderFoot(self.config)
+        dbh = SpiderFootDb(self.config)
+        info = dbh.scanInstanceGet(id)
+
+        if not info:
+            return self.error("Invalid scan ID.")
+
+        scantarget = info[1]
+        scanstatus = info[5]
+
+        # Scans in any other state are finished, or may still be running,
+        # e.g. when started from the command line.
+        if scanstatus not in ["ABORTED", "ERROR-FAILED"]:
+            return self.error(f"Only aborted or failed scans can be resumed. The scan is {scanstatus}.")
+
+        if dbh.scanQueueGet(id):
+            return self.error("The scan is already queued or running.")
+
+        if not dbh.scanCheckpointGet(id):
+            return self.error("No checkpoint was saved for this scan, so it can't be resumed.")
+
+        # The scan is resumed with the config it was started with
+        if not dbh.scanConfigGet(id):
+            return self.error(f"Error loading config from scan: {id}")
+
+        targetType = sf.targetType(scantarget)
+        if not targetType:
+            targetType = sf.targetType(f'"{scantarget}"')
+
+        try:
+            dbh.scanQueueAdd(id, targetType, resume=True)
+        except Exception as e:
+            self.log.error(f"[-] Scan [{id}] failed: {e}")
+            return self.error(f"[-] Scan [{id}] failed: {e}")
+
+        raise cherrypy.HTTPRedirect(f"{self.docroot}/scaninfo?id={id}", status=302)
+
+    resumescan.exposed = True
+
     def rerunscanmulti(self, ids):
         """Rerun scans
 
@@ -524,21 +605,14 @@ class SpiderFootWebUi:
                 # Should never be triggered for a re-run scan..
                 return self.error("Invalid target type. Could not recognize it as a target SpiderFoot supports.")
 
-            # Start running a new scan
+            # Queue a new scan
             scanId = sf.genScanInstanceId()
             try:
-                p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-                p.daemon = True
-                p.start()
+                self.queueScan(scanname, scanId, scantarget, targetType, modlist, cfg)
             except Exception as e:
                 self.log.error(f"[-] Scan [{scanId}] failed: {e}")
                 return self.error(f"[-] Scan [{scanId}] failed: {e}")
 
-            # Wait until the scan has initialized
-            while dbh.scanInstanceGet(scanId) is None:
-                self.log.info("Waiting for the scan to initialize...")
-                time.sleep(1)
-
         templ = Template(filename='dyn/scanlist.tmpl', lookup=self.lookup)
         return templ.render(rerunscans=True, docroot=self.docroot, pageid="SCANLIST")
 
@@ -722,6 +796,19 @@ class SpiderFootWebUi:
         templ = Template(filename='dyn/error.tmpl', lookup=self.lookup)
         return templ.render(message=message, docroot=self.docroot)
 
+    def deletetrace(self, id):
+        """Delete the execution trace of a scan, if one was recorded. Not
+        exposed as not called directly.
+
+        Args:
+            id (str): scan ID
+        """
+
+        try:
+            os.remove(SpiderFoot.tracePath(id))
+        except (OSError, TypeError, ValueError):
+            pass
+
     def scandelete(self, id, confirm=None):
         """Delete a scan
 
@@ -748,6 +835,7 @@ class SpiderFootWebUi:
 
         if confirm:
             dbh.scanInstanceDelete(id)
+            self.deletetrace(id)
 
             if cherrypy.request.headers and 'application/json' in cherrypy.request.headers.get('Accept'):
                 cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
@@ -787,12 +875,13 @@ class SpiderFootWebUi:
             if res is None:
                 return self.error("Scan ID not found (" + id + ").")
 
-            if res[5] in ["RUNNING", "STARTING", "STARTED"]:
+            if res[5] in ["QUEUED", "RUNNING", "STARTING", "STARTED"]:
                 return self.error("You cannot delete running scans.")
 
         if confirm:
             for id in ids.split(','):
                 dbh.scanInstanceDelete(id)
+                self.deletetrace(id)
             raise cherrypy.HTTPRedirect(f"{self.docroot}/")
 
         templ = Template(filename='dyn/scandelete.tmpl', lookup=self.lookup)
@@ -1092,9 +1181,6 @@ class SpiderFootWebUi:
             HTTPRedirect: redirect to new scan info page
         """
 
-        # Swap the globalscantable for the database handler
-        dbh = SpiderFootDb(self.config)
-
         # Snapshot the current configuration to be used by the scan
         cfg = deepcopy(self.config)
         modlist = list()
@@ -1169,22 +1255,14 @@ class SpiderFootWebUi:
         else:
             scantarget = scantarget.lower()
 
-        # Start running a new scan
+        # Queue a new scan
         scanId = sf.genScanInstanceId()
         try:
-            p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-            p.daemon = True
-            p.start()
+            self.queueScan(scanname, scanId, scantarget, targetType, modlist, cfg)
         except Exception as e:
             self.log.error(f"[-] Scan [{scanId}] failed: {e}")
             return self.error(f"[-] Scan [{scanId}] failed: {e}")
 
-        # Wait until the scan has initialized
-        # Check the database for the scan status results
-        while dbh.scanInstanceGet(scanId) is None:
-            self.log.info("Waiting for the scan to initialize...")
-            time.sleep(1)
-
         if cherrypy.request.headers and 'application/json' in cherrypy.request.headers.get('Accept'):
             cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
             return json.dumps(["SUCCESS", scanId]).encode('utf-8')
@@ -1193,6 +1271,40 @@ class SpiderFootWebUi:
 
     startscan.exposed = True
 
+    def queueScan(self, scanname, scanId, scantarget, targetType, modlist, cfg):
+        """Create a scan and queue it to be run by a scan worker.
+
+        Args:
+            scanname (str): scan name
+            scanId (str): scan ID
+            scantarget (str): scan target
+            targetType (str): scan target type
+            modlist (list): modules to run
+            cfg (dict): snapshot of the configuration to be used by the scan
+        """
+
+        dbh = SpiderFootDb(cfg)
+        sf = SpiderFoot(cfg)
+
+        # Save the config for the scan worker to run the scan with
+        scanConfig = deepcopy(cfg)
+        scanConfig['_modulesenabled'] = modlist
+
+        dbh.scanInstanceCreate(scanId, scanname, scantarget)
+        dbh.scanConfigSet(scanId, sf.configSerialize(scanConfig))
+        dbh.scanQueueAdd(scanId, targetType)
+
+    def signalScanStop(self, id):
+        """Signal a scan run by a scan worker of this web server to stop
+        immediately. Scans run elsewhere will stop once they notice their
+        status in the database has been set to "ABORT-REQUESTED".
+
+        Args:
+            id (str): scan ID
+        """
+
+        self.scanWorkers.stopScan(id)
+
     def stopscanmulti(self, ids):
         """Stop a scan
 
@@ -1229,7 +1341,13 @@ class SpiderFootWebUi:
                 error.append("Scan '" + scanname + "' is already aborted.")
                 continue
 
+            # Scans still waiting in the queue are simply taken out of it
+            if scanstatus == "QUEUED" and dbh.scanQueueRemove(id, waitingOnly=True):
+                dbh.scanInstanceSet(id, status="ABORTED")
+                continue
+
             dbh.scanInstanceSet(id, status="ABORT-REQUESTED")
+            self.signalScanStop(id)
 
         raise cherrypy.HTTPRedirect(f"{self.docroot}/")
 
@@ -1267,6 +1385,16 @@ class SpiderFootWebUi:
 
             return self.error("The scan is already aborted.")
 
+        # Scans still waiting in the queue are simply taken out of it
+        if scanstatus == "QUEUED" and dbh.scanQueueRemove(id, waitingOnly=True):
+            dbh.scanInstanceSet(id, status="ABORTED")
+
+            if cherrypy.request.headers and 'application/json' in cherrypy.request.headers.get('Accept'):
+                cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
+                return json.dumps(["SUCCESS", ""]).encode('utf-8')
+
+            raise cherrypy.HTTPRedirect(f"{self.docroot}/")
+
         if not scanstatus == "RUNNING":
             if cherrypy.request.headers and 'application/json' in cherrypy.request.headers.get('Accept'):
                 cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
@@ -1275,6 +1403,7 @@ class SpiderFootWebUi:
             return self.error("The running scan is currently in the state '%s', please try again later or restart SpiderFoot." % scanstatus)
 
         dbh.scanInstanceSet(id, status="ABORT-REQUESTED")
+        self.signalScanStop(id)
 
         if 'application/json' in cherrypy.request.headers.get('Accept'):
             cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
@@ -1442,6 +1571,47 @@ class SpiderFootWebUi:
 
     scansummary.exposed = True
 
+    def scanmodulestats(self, id):
+        """Runtime statistics of the modules of a scan, the modules
+        which spent the most time handling events first.
+
+        Args:
+            id (str): scan ID
+
+        Returns:
+            module statistics as JSON
+        """
+
+        cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
+
+        retdata = []
+
+        dbh = SpiderFootDb(self.config)
+
+        try:
+            moduleStats = dbh.scanModuleStatsGet(id)
+        except Exception:
+            return json.dumps(retdata).encode('utf-8')
+
+        for module, stats in sorted(moduleStats.items(), key=lambda m: m[1]['wallTime'], reverse=True):
+            retdata.append([
+                module,
+                stats['handled'],
+                round(stats['wallTime'], 3),
+                round(stats['cpuTime'], 3),
+                round(stats['queueWait'], 3),
+                sum(stats['received'].values()),
+                sum(stats['emitted'].values()),
+                stats['httpRequests'],
+                stats['httpBytes'],
+                stats['dnsQueries'],
+                stats['received'],
+                stats['emitted']
+            ])
+        return json.dumps(retdata).encode('utf-8')
+
+    scanmodulestats.exposed = True
+
     def scaneventresults(self, id, eventType, filterfp=False):
         """Event results for a scan
 
@@ -1,4 +1,13 @@
+from .broker import SpiderFootBroker, SpiderFootBrokerPool, SpiderFootBrokerWorker, SpiderFootSqliteBroker
+from .budget import SpiderFootWorkerBudget
 from .db import SpiderFootDb
+from .dedup import SpiderFootDedupIndex
 from .event import SpiderFootEvent
+from .eventstore import SpiderFootEventStore
+from .manifest import SpiderFootModuleManifest
 from .plugin import SpiderFootPlugin
+from .processpool import SpiderFootProcessPool
+from .scanlog import SpiderFootScanLogWriter
+from .stats import SpiderFootModuleStats
 from .target import SpiderFootTarget
+from .trace import SpiderFootTracer
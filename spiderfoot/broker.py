@@ -0,0 +1,813 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+from .event import SpiderFootEvent
+from .processpool import _createModule, _eventTuple, _eventsProduced, _runModule
+from .stats import SpiderFootModuleStats
+from .target import SpiderFootTarget
+
+
+class SpiderFootBroker(ABC):
+    """Broker through which a scan coordinator publishes the events sent to
+    its modules, for module workers in other processes or on other hosts
+    to handle, and collects the events the modules produce.
+
+    Brokers implement this interface. Events are published as jobs, each
+    for one module to handle one event, and are taken by one worker only.
+    The jobs of a module of a scan are all taken by the worker which took
+    the first of them, so that the module's state is kept by one worker,
+    until that worker is released. Jobs which are not completed within a
+    lease of being taken, e.g. because their worker died, are put back
+    for another worker to take.
+    """
+
+    @abstractmethod
+    def openScan(self, scanId, config, target, socksProxy=None):
+        """Open a scan for workers to handle the events of.
+
+        Args:
+            scanId (str): scan instance ID
+            config (dict): scan config, which workers set modules up with
+            target (SpiderFootTarget): scan target
+            socksProxy (str): SOCKS proxy modules make requests through
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def closeScan(self, scanId):
+        """Close a scan, discarding events which are still waiting.
+
+        Args:
+            scanId (str): scan instance ID
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def scanGet(self, scanId):
+        """Get what workers need to set modules up for a scan.
+
+        Args:
+            scanId (str): scan instance ID
+
+        Returns:
+            list: scan config, target and SOCKS proxy, or None if the scan is not open
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish(self, scanId, modName, eventArgs, tempStorage=None):
+        """Publish an event for a module to handle.
+
+        Args:
+            scanId (str): scan instance ID
+            modName (str): module name
+            eventArgs (list): details of the event and its source event, or None to get the module's temporary storage
+            tempStorage (list): module temporary storage to restore when the module is set up
+
+        Returns:
+            int: job ID
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def consume(self, workerId):
+        """Take the job which has been waiting the longest.
+
+        Args:
+            workerId (str): worker ID
+
+        Returns:
+            list: job ID, scan instance ID, module name, event details and temporary storage to restore, or None if no jobs are waiting
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, jobId, result):
+        """Return the result of a job.
+
+        Args:
+            jobId (int): job ID
+            result (list): events produced by the module, its error state, the error handling the event and the resources used handling it
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def result(self, jobId):
+        """Collect the result of a job, once it is complete.
+
+        Args:
+            jobId (int): job ID
+
+        Returns:
+            list: job result, or None if the job is not complete
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, workerId):
+        """Put the jobs taken by a worker back to wait for another worker,
+        e.g. when the worker is stopped. The modules which the worker
+        handled events for are set up again by the worker taking their
+        next job, without the state they had.
+
+        Args:
+            workerId (str): worker ID
+        """
+        raise NotImplementedError
+
+# end of SpiderFootBroker class
+
+
+class SpiderFootSqliteBroker(SpiderFootBroker):
+    """Broker using a SQLite database shared by the scan coordinator and
+    the module workers on the same host. Workers on other hosts need a
+    broker reachable over the network, implementing SpiderFootBroker.
+
+    Attributes:
+        path (str): broker database file
+    """
+
+    # Seconds after which a job taken by a worker, and not completed, is
+    # put back for another worker to take
+    jobLease = 600
+
+    createSchemaQueries = [
+        "CREATE TABLE IF NOT EXISTS tbl_broker_scan ( \
+            scan_instance_id    VARCHAR NOT NULL PRIMARY KEY, \
+            config              TEXT NOT NULL, \
+            target              TEXT NOT NULL, \
+            socks_proxy         VARCHAR \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_broker_job ( \
+            id                  INTEGER PRIMARY KEY AUTOINCREMENT, \
+            scan_instance_id    VARCHAR NOT NULL, \
+            module              VARCHAR NOT NULL, \
+            event               TEXT NOT NULL, \
+            published           INT NOT NULL, \
+            worker              VARCHAR, \
+            claim               VARCHAR, \
+            claimed             INT, \
+            result              TEXT, \
+            temp_storage        TEXT \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_broker_module ( \
+            scan_instance_id    VARCHAR NOT NULL, \
+            module              VARCHAR NOT NULL, \
+            worker              VARCHAR NOT NULL, \
+            PRIMARY KEY (scan_instance_id, module) \
+        )",
+        "CREATE INDEX IF NOT EXISTS idx_broker_job_claim ON tbl_broker_job (claim)"
+    ]
+
+    _path = None
+    _conn = None
+    _lock = None
+
+    def __init__(self, path):
+        """Connect to the broker database, creating it if it doesn't exist.
+
+        Args:
+            path (str): broker database file
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(path, str):
+            raise TypeError(f"path is {type(path)}; expected str()")
+        if not path:
+            raise ValueError("path is empty")
+
+        self._path = path
+        self._lock = threading.RLock()
+
+        try:
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # Workers and the coordinator read and write at the same time
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for qry in self.createSchemaQueries:
+                self._conn.execute(qry)
+
+            # Add columns introduced since the database was created
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tbl_broker_job)")]
+            for column, columnType in (('claimed', 'INT'), ('temp_storage', 'TEXT')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE tbl_broker_job ADD COLUMN {column} {columnType}")
+
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise IOError(f"Error connecting to broker database {path}: {e}")
+
+    @property
+    def path(self):
+        return self._path
+
+    def _execute(self, qry, params=None, commit=False):
+        """Run a query.
+
+        Args:
+            qry (str): query
+            params (list): query parameters
+            commit (bool): commit the query
+
+        Returns:
+            sqlite3.Cursor: cursor
+
+        Raises:
+            IOError: database I/O failed
+        """
+        with self._lock:
+            try:
+                cursor = self._conn.execute(qry, params or [])
+                if commit:
+                    self._conn.commit()
+                return cursor
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered in broker database: {e.args[0]}")
+
+    def _commit(self):
+        """Commit the queries run since the last commit.
+
+        Raises:
+            IOError: database I/O failed
+        """
+        with self._lock:
+            try:
+                self._conn.commit()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered in broker database: {e.args[0]}")
+
+    def openScan(self, scanId, config, target, socksProxy=None):
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        if not isinstance(config, dict):
+            raise TypeError(f"config is {type(config)}; expected dict()")
+
+        if not isinstance(target, SpiderFootTarget):
+            raise TypeError(f"target is {type(target)}; expected SpiderFootTarget()")
+
+        targetInfo = {
+            'value': target.targetValue,
+            'type': target.targetType,
+            'aliases': target.targetAliases
+        }
+
+        qry = "REPLACE INTO tbl_broker_scan (scan_instance_id, config, target, socks_proxy) VALUES (?, ?, ?, ?)"
+        self._execute(qry, [scanId, json.dumps(config), json.dumps(targetInfo), socksProxy], commit=True)
+
+    def closeScan(self, scanId):
+        with self._lock:
+            self._execute("DELETE FROM tbl_broker_job WHERE scan_instance_id = ?", [scanId])
+            self._execute("DELETE FROM tbl_broker_module WHERE scan_instance_id = ?", [scanId])
+            self._execute("DELETE FROM tbl_broker_scan WHERE scan_instance_id = ?", [scanId], commit=True)
+
+    def scanGet(self, scanId):
+        qry = "SELECT config, target, socks_proxy FROM tbl_broker_scan WHERE scan_instance_id = ?"
+        row = self._execute(qry, [scanId]).fetchone()
+        if not row:
+            return None
+
+        targetInfo = json.loads(row[1])
+        target = SpiderFootTarget(targetInfo['value'], targetInfo['type'])
+        target.targetAliases = targetInfo['aliases']
+
+        return [json.loads(row[0]), target, row[2]]
+
+    def publish(self, scanId, modName, eventArgs, tempStorage=None):
+        qry = "INSERT INTO tbl_broker_job (scan_instance_id, module, event, published, temp_storage) VALUES (?, ?, ?, ?, ?)"
+        params = [scanId, modName, json.dumps(eventArgs), time.time() * 1000, None]
+        if tempStorage is not None:
+            params[4] = json.dumps(tempStorage)
+        return self._execute(qry, params, commit=True).lastrowid
+
+    def consume(self, workerId):
+        # Jobs of modules assigned to other workers are left for them,
+        # unless their lease has expired, in which case the module is
+        # assigned to this worker instead. The job is taken and its module
+        # assigned in one transaction, so jobs and modules are taken by one
+        # worker only, even when workers in other processes share the
+        # database.
+        claim = str(uuid.uuid4())
+        now = time.time() * 1000
+        qry = "UPDATE tbl_broker_job SET worker = ?, claim = ?, claimed = ? \
+            WHERE id = ( \
+            SELECT j.id FROM tbl_broker_job j \
+            LEFT JOIN tbl_broker_module m \
+            ON m.scan_instance_id = j.scan_instance_id AND m.module = j.module \
+            WHERE j.result IS NULL AND ( \
+            (j.claim IS NULL AND (m.worker IS NULL OR m.worker = ?)) \
+            OR j.claimed < ?) \
+            ORDER BY j.id LIMIT 1)"
+
+        with self._lock:
+            try:
+                if self._execute(qry, [workerId, claim, now, workerId, now - self.jobLease * 1000]).rowcount < 1:
+                    self._commit()
+                    return None
+
+                qry = "SELECT id, scan_instance_id, module, event, temp_storage FROM tbl_broker_job WHERE claim = ?"
+                row = self._execute(qry, [claim]).fetchone()
+
+                if row:
+                    qry = "REPLACE INTO tbl_broker_module (scan_instance_id, module, worker) VALUES (?, ?, ?)"
+                    self._execute(qry, [row[1], row[2], workerId])
+
+                self._commit()
+            except IOError:
+                self._conn.rollback()
+                raise
+
+        if not row:
+            return None
+
+        tempStorage = None
+        if row[4] is not None:
+            tempStorage = json.loads(row[4])
+
+        return [row[0], row[1], row[2], json.loads(row[3]), tempStorage]
+
+    def complete(self, jobId, result):
+        qry = "UPDATE tbl_broker_job SET result = ? WHERE id = ?"
+        self._execute(qry, [json.dumps(result), jobId], commit=True)
+
+    def result(self, jobId):
+        with self._lock:
+            row = self._execute("SELECT result FROM tbl_broker_job WHERE id = ?", [jobId]).fetchone()
+            if not row or row[0] is None:
+                return None
+
+            self._execute("DELETE FROM tbl_broker_job WHERE id = ?", [jobId], commit=True)
+
+        return json.loads(row[0])
+
+    def release(self, workerId):
+        with self._lock:
+            qry = "UPDATE tbl_broker_job SET worker = NULL, claim = NULL, claimed = NULL WHERE worker = ? AND result IS NULL"
+            self._execute(qry, [workerId])
+            self._execute("DELETE FROM tbl_broker_module WHERE worker = ?", [workerId], commit=True)
+
+    def close(self):
+        """Close the broker database."""
+        with self._lock:
+            self._conn.close()
+
+# end of SpiderFootSqliteBroker class
+
+
+class SpiderFootBrokerPool():
+    """Modules of a scan which handle events in module workers, through
+    a broker, rather than in the scan process.
+
+    The scan coordinator keeps the storage modules, so the events the
+    workers' modules produce are stored by the coordinator. Each module
+    handles its events in one worker, which keeps the module's state. The
+    state is collected from the worker for scan checkpoints, and given to
+    the worker which sets the module up when the scan is resumed. If the
+    worker is stopped during the scan, the module is set up again by
+    another worker, without the state it had.
+
+    Attributes:
+        broker (SpiderFootBroker): broker
+        modules (list): names of the modules in the pool
+    """
+
+    log = logging.getLogger(__name__)
+
+    # Seconds between checks for the result of a job, starting from
+    # pollIntervalMin and doubling up to pollInterval while it is waited for
+    pollInterval = 0.05
+    pollIntervalMin = 0.001
+
+    # Events each module may have waiting for or being handled by a worker,
+    # so that workers are not left idle between the events of a module
+    jobsInFlight = 4
+
+    # Seconds to wait for a worker to return the state of a module
+    stateTimeout = 10
+
+    __broker = None
+    __scanId = None
+    __stopEvent = None
+    __modules = list()
+    __pendingSetup = dict()
+    __lock = None
+
+    def __init__(self, broker, config, scanId, target, stopEvent, socksProxy=None):
+        """Initialize the pool, opening the scan on the broker.
+
+        Args:
+            broker (SpiderFootBroker): broker
+            config (dict): scan config
+            scanId (str): scan instance ID
+            target (SpiderFootTarget): scan target
+            stopEvent (threading.Event): set when the scan is stopped
+            socksProxy (str): SOCKS proxy modules make requests through
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(broker, SpiderFootBroker):
+            raise TypeError(f"broker is {type(broker)}; expected SpiderFootBroker()")
+
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        self.__broker = broker
+        self.__scanId = scanId
+        self.__stopEvent = stopEvent
+        self.__modules = list()
+        self.__pendingSetup = dict()
+        self.__lock = threading.Lock()
+
+        broker.openScan(scanId, config, target, socksProxy)
+
+    @property
+    def broker(self):
+        return self.__broker
+
+    @property
+    def modules(self):
+        return list(self.__modules)
+
+    def addModule(self, modName, tempStorage=None):
+        """Have a module handle events in the module workers.
+
+        Args:
+            modName (str): module name
+            tempStorage (list): module temporary storage to restore when resuming a scan
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(modName, str):
+            raise TypeError(f"modName is {type(modName)}; expected str()")
+
+        if tempStorage is not None and not isinstance(tempStorage, list):
+            raise TypeError(f"tempStorage is {type(tempStorage)}; expected list()")
+
+        if modName not in self.__modules:
+            self.__modules.append(modName)
+            self.__pendingSetup[modName] = list(tempStorage or [])
+
+    def __publish(self, modName, eventArgs):
+        """Publish a job for a module, with the temporary storage to restore
+        if it is the module's first job.
+
+        Args:
+            modName (str): module name
+            eventArgs (list): details of the event and its source event, or None to get the module's temporary storage
+
+        Returns:
+            int: job ID
+        """
+        # Published with the lock held, so the worker taking the module's
+        # first job is given its storage.
+        with self.__lock:
+            tempStorage = self.__pendingSetup.pop(modName, None)
+            return self.__broker.publish(self.__scanId, modName, eventArgs, tempStorage)
+
+    def handleEvent(self, modName, sfEvent):
+        """Have a module handle an event in a module worker, waiting for
+        the worker to finish.
+
+        Args:
+            modName (str): module name
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            tuple: events produced by the module, linked to their source events, and the module's error state
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        if modName not in self.__modules:
+            raise ValueError(f"Module {modName} is not in the pool")
+
+        sourceEvent = sfEvent.sourceEvent
+        eventArgs = [
+            _eventTuple(sfEvent),
+            _eventTuple(sourceEvent) if sourceEvent is not None else None
+        ]
+
+        jobId = self.__publish(modName, eventArgs)
+
+        interval = self.pollIntervalMin
+        while True:
+            result = self.__broker.result(jobId)
+            if result is not None:
+                break
+
+            if self.__stopEvent.wait(interval):
+                return list(), False
+            interval = min(interval * 2, self.pollInterval)
+
+        produced, errorState, error = result[:3]
+
+        if error:
+            self.log.error(f"Module ({modName}) encountered an error: {error}")
+
+        # Count the work done by the module worker against the
+        # statistics of the module in the scan.
+        stats = SpiderFootModuleStats.current()
+        if stats is not None and len(result) > 3:
+            stats.addUsage(result[3])
+
+        return _eventsProduced(produced, sfEvent), errorState
+
+    def getTempStorage(self, modName):
+        """Get the temporary storage of a module, from the worker which
+        handles its events.
+
+        Args:
+            modName (str): module name
+
+        Returns:
+            list: dictionaries returned by the module's tempStorage(), in the order they were created
+
+        Raises:
+            ValueError: arg value was invalid
+            IOError: the worker did not return the storage in time
+        """
+
+        if modName not in self.__modules:
+            raise ValueError(f"Module {modName} is not in the pool")
+
+        with self.__lock:
+            # Not set up yet, so the storage to restore is still to be used
+            if modName in self.__pendingSetup:
+                return list(self.__pendingSetup[modName])
+
+        jobId = self.__publish(modName, None)
+
+        deadline = time.time() + self.stateTimeout
+        interval = self.pollIntervalMin
+        while True:
+            result = self.__broker.result(jobId)
+            if result is not None:
+                return result[0]
+
+            if self.__stopEvent.wait(interval) or time.time() > deadline:
+                raise IOError(f"Module {modName} state was not returned by a module worker")
+            interval = min(interval * 2, self.pollInterval)
+
+    def shutdown(self):
+        """Close the scan on the broker, discarding events still waiting."""
+        self.__broker.closeScan(self.__scanId)
+
+# end of SpiderFootBrokerPool class
+
+
+class SpiderFootBrokerWorker():
+    """Module worker, handling the events published to a broker by scan
+    coordinators. Modules are set up for each scan the first time they are
+    sent an event, and kept until the scan is closed. Jobs taken for a
+    module which is already handling an event are handled after it, by the
+    same thread, leaving the other threads free to take other jobs.
+
+    Attributes:
+        workerId (str): worker ID
+        threads (int): number of events handled at the same time
+    """
+
+    log = logging.getLogger(__name__)
+
+    # Seconds between checks for jobs while there are none, starting from
+    # pollIntervalMin and doubling up to pollInterval
+    pollInterval = 0.5
+    pollIntervalMin = 0.001
+
+    __broker = None
+    __workerId = None
+    __threads = 1
+    __modules = dict()
+    __scans = dict()
+    __backlogs = dict()
+    __lock = None
+
+    def __init__(self, broker, workerId=None, threads=4):
+        """Initialize the worker.
+
+        Args:
+            broker (SpiderFootBroker): broker
+            workerId (str): worker ID, unique among the broker's workers
+            threads (int): number of events handled at the same time
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(broker, SpiderFootBroker):
+            raise TypeError(f"broker is {type(broker)}; expected SpiderFootBroker()")
+
+        if workerId is None:
+            workerId = str(uuid.uuid4())
+
+        if not isinstance(workerId, str):
+            raise TypeError(f"workerId is {type(workerId)}; expected str()")
+
+        if not isinstance(threads, int):
+            raise TypeError(f"threads is {type(threads)}; expected int()")
+        if threads < 1:
+            raise ValueError(f"threads value is {threads}; expected 1 or more")
+
+        self.__broker = broker
+        self.__workerId = workerId
+        self.__threads = threads
+        self.__modules = dict()
+        self.__scans = dict()
+        self.__backlogs = dict()
+        self.__lock = threading.Lock()
+
+    @property
+    def workerId(self):
+        return self.__workerId
+
+    @property
+    def threads(self):
+        return self.__threads
+
+    def __module(self, scanId, modName, tempStorage=None):
+        """Get the worker's instance of a module for a scan, setting it up
+        the first time.
+
+        Args:
+            scanId (str): scan instance ID
+            modName (str): module name
+            tempStorage (list): module temporary storage to restore when setting it up
+
+        Returns:
+            list: module, or None if the scan is not open, and the lock held while it handles an event
+        """
+        with self.__lock:
+            entry = self.__modules.get((scanId, modName))
+            if entry is not None:
+                return entry
+
+            scan = self.__broker.scanGet(scanId)
+            if scan is None:
+                return [None, None]
+
+            config, target, socksProxy = scan
+
+            # Modules of a scan are stopped when the scan is closed
+            stopEvent = self.__scans.setdefault(scanId, threading.Event())
+            modOpts = ((config.get('__modules__') or dict()).get(modName) or dict()).get('opts') or dict()
+
+            mod = _createModule(modName, config, modOpts, scanId, target, socksProxy, stopEvent=stopEvent, tempStorage=tempStorage)
+            entry = [mod, threading.Lock()]
+            self.__modules[(scanId, modName)] = entry
+
+            return entry
+
+    def __closeScans(self):
+        """Stop and drop the modules of scans which have been closed."""
+        with self.__lock:
+            for scanId in list(self.__scans.keys()):
+                if self.__broker.scanGet(scanId) is not None:
+                    continue
+
+                self.__scans.pop(scanId).set()
+                for key in [key for key in self.__modules if key[0] == scanId]:
+                    del self.__modules[key]
+
+    def handleJob(self, job):
+        """Have a module handle the event of a job.
+
+        Args:
+            job (list): job taken from the broker
+
+        Returns:
+            list: events produced by the module, its error state, the error handling the event and the resources used handling it,
+                  or the module's temporary storage for jobs without an event
+        """
+        jobId, scanId, modName, eventArgs, tempStorage = job
+
+        try:
+            mod, lock = self.__module(scanId, modName, tempStorage)
+        except BaseException as e:
+            # Not set up again for the rest of the scan
+            with self.__lock:
+                self.__modules[(scanId, modName)] = [None, None]
+            if eventArgs is None:
+                return [list()]
+            return [list(), True, f"failed to set up: {e}", None]
+
+        if eventArgs is None:
+            if mod is None:
+                return [list()]
+            with lock:
+                return [mod.getTempStorage()]
+
+        if mod is None:
+            return [list(), False, None, None]
+
+        # Modules handle one event at a time
+        with lock:
+            return list(_runModule(mod, eventArgs))
+
+    def __handleJobs(self, job, stopEvent):
+        """Handle a job, and the jobs taken for its module meanwhile, unless
+        the module is already handling a job in another thread, which then
+        handles this one next.
+
+        Args:
+            job (list): job taken from the broker
+            stopEvent (threading.Event): set to stop the worker
+        """
+        key = (job[1], job[2])
+        with self.__lock:
+            backlog = self.__backlogs.get(key)
+            if backlog is not None:
+                backlog.append(job)
+                return
+            backlog = self.__backlogs[key] = deque()
+
+        while True:
+            result = self.handleJob(job)
+
+            try:
+                self.__broker.complete(job[0], result)
+            except IOError as e:
+                # Taken again by a worker once its lease expires
+                self.log.error(f"Worker ({self.__workerId}) failed to complete job {job[0]}: {e}")
+
+            with self.__lock:
+                # Jobs left in the backlog are put back on the broker by run()
+                if not backlog or stopEvent.is_set():
+                    del self.__backlogs[key]
+                    return
+                job = backlog.popleft()
+
+    def __run(self, stopEvent):
+        """Take jobs from the broker and handle them until stopEvent is set.
+
+        Args:
+            stopEvent (threading.Event): set to stop the worker
+        """
+        interval = self.pollIntervalMin
+        while not stopEvent.is_set():
+            try:
+                job = self.__broker.consume(self.__workerId)
+            except IOError as e:
+                self.log.error(f"Worker ({self.__workerId}) failed to take a job: {e}")
+                stopEvent.wait(1)
+                continue
+
+            if job is None:
+                # Closed scans are checked for once the worker is idle
+                if interval >= self.pollInterval:
+                    try:
+                        self.__closeScans()
+                    except IOError as e:
+                        self.log.error(f"Worker ({self.__workerId}) failed to check for closed scans: {e}")
+                stopEvent.wait(interval)
+                interval = min(interval * 2, self.pollInterval)
+                continue
+
+            interval = self.pollIntervalMin
+            self.__handleJobs(job, stopEvent)
+
+    def run(self, stopEvent):
+        """Handle events published to the broker until stopEvent is set.
+        Events the worker was still handling are put back on the broker.
+
+        Args:
+            stopEvent (threading.Event): set to stop the worker
+        """
+        threads = list()
+        for i in range(self.__threads):
+            t = threading.Thread(target=self.__run, args=(stopEvent,), name=f"SpiderFootBrokerWorker-{i}")
+            t.start()
+            threads.append(t)
+
+        try:
+            for t in threads:
+                t.join()
+        finally:
+            stopEvent.set()
+            for t in threads:
+                t.join()
+
+            self.__broker.release(self.__workerId)
+
+            for scanStopEvent in self.__scans.values():
+                scanStopEvent.set()
+
+# end of SpiderFootBrokerWorker class
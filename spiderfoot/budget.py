@@ -0,0 +1,116 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class SpiderFootWorkerBudget():
+    """Scan-wide budget of events which may be handled at the same time
+    across all modules. When the budget is exhausted, waiting modules are
+    granted a slot in order of priority (smaller numbers first), and then
+    in the order they started waiting.
+
+    Each waiter is queued once, and a released slot is handed over to the
+    first waiter directly, so that it can't be taken by another thread
+    before the waiter wakes up.
+
+    Attributes:
+        size (int): maximum number of events handled at the same time
+        inUse (int): number of events currently being handled
+    """
+
+    # Number of seconds between checks of whether a waiter was cancelled
+    pollInterval = 0.1
+
+    _size = 0
+    _inUse = 0
+    _waiting = None
+    _counter = None
+    _lock = None
+
+    def __init__(self, size):
+        """Initialize the budget.
+
+        Args:
+            size (int): maximum number of events handled at the same time
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(size, int):
+            raise TypeError(f"size is {type(size)}; expected int()")
+
+        if size < 1:
+            raise ValueError(f"size value is {size}; expected 1 or more")
+
+        self._size = size
+        self._inUse = 0
+        self._waiting = list()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def inUse(self):
+        return self._inUse
+
+    def acquire(self, priority=1, timeout=None, cancelled=None):
+        """Wait for a slot in the budget.
+
+        Args:
+            priority (int): priority of the module, smaller numbers are granted a slot first
+            timeout (float): seconds to wait, or None to wait indefinitely
+            cancelled (callable): returns True when the caller should stop waiting, checked while waiting
+
+        Returns:
+            bool: a slot was acquired, and must be released with release()
+        """
+
+        with self._lock:
+            if self._inUse < self._size and not self._waiting:
+                self._inUse += 1
+                return True
+
+            if timeout is not None and timeout <= 0:
+                return False
+
+            granted = threading.Event()
+            waiter = (priority, next(self._counter), granted)
+            heapq.heappush(self._waiting, waiter)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = self.pollInterval if cancelled is not None else None
+            if deadline is not None:
+                remaining = max(0, deadline - time.monotonic())
+                wait = remaining if wait is None else min(wait, remaining)
+
+            if granted.wait(wait):
+                return True
+
+            if (deadline is not None and time.monotonic() >= deadline) or (cancelled is not None and cancelled()):
+                with self._lock:
+                    # The slot may have been handed over meanwhile
+                    if granted.is_set():
+                        return True
+                    self._waiting.remove(waiter)
+                    heapq.heapify(self._waiting)
+                return False
+
+    def release(self):
+        """Release a slot acquired with acquire(), handing it over to the
+        first waiter if there is one."""
+
+        with self._lock:
+            if self._waiting:
+                heapq.heappop(self._waiting)[2].set()
+            else:
+                self._inUse -= 1
+
+# end of SpiderFootWorkerBudget class
@@ -10,10 +10,16 @@
 # Licence:     GPL
 # -------------------------------------------------------------------------------
 
+import hashlib
+import json
 import re
 import sqlite3
+import sys
 import threading
 import time
+import zlib
+
+from .trace import SpiderFootTracer
 
 
 class SpiderFootDb:
@@ -23,6 +29,9 @@ class SpiderFootDb:
         conn: SQLite connect() connection
         dbh: SQLite cursor() database handle
         dbhLock (_thread.RLock): thread lock on database handle
+        blobThreshold (int): size of event data from which it is stored in the blob table
+        eventBatchSize (int): maximum number of events buffered by scanEventStore()
+        eventBatchInterval (int): maximum number of seconds events are buffered by scanEventStore()
     """
 
     dbh = None
@@ -31,6 +40,21 @@ class SpiderFootDb:
     # Prevent multithread access to sqlite database
     dbhLock = threading.RLock()
 
+    # Maximum number of events scanEventStore() buffers before writing them
+    # in one transaction, and seconds the first of them may wait
+    eventBatchSize = 1
+    eventBatchInterval = 0
+
+    # Event data of this many bytes or more is stored compressed in the blob
+    # table, once for all results with the same data (0 = store all data
+    # with the results)
+    blobThreshold = 1024
+
+    _eventBuffer = None
+    _eventBlobs = None
+    _eventBufferLock = None
+    _eventBufferStart = None
+
     # Queries for creating the SpiderFoot database
     createSchemaQueries = [
         "PRAGMA journal_mode=WAL",
@@ -79,14 +103,97 @@ class SpiderFootDb:
             module              VARCHAR NOT NULL, \
             data                VARCHAR, \
             false_positive      INT NOT NULL DEFAULT 0, \
-            source_event_hash  VARCHAR DEFAULT 'ROOT' \
+            source_event_hash  VARCHAR DEFAULT 'ROOT', \
+            blob_hash           VARCHAR \
         )",
         "CREATE INDEX idx_scan_results_id ON tbl_scan_results (scan_instance_id)",
         "CREATE INDEX idx_scan_results_type ON tbl_scan_results (scan_instance_id, type)",
         "CREATE INDEX idx_scan_results_hash ON tbl_scan_results (scan_instance_id, hash)",
         "CREATE INDEX idx_scan_results_srchash ON tbl_scan_results (scan_instance_id, source_event_hash)",
-        "CREATE INDEX idx_scan_logs ON tbl_scan_log (scan_instance_id)"
-
+        "CREATE INDEX idx_scan_logs ON tbl_scan_log (scan_instance_id)",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_checkpoint ( \
+            scan_instance_id    VARCHAR NOT NULL PRIMARY KEY REFERENCES tbl_scan_instance(guid), \
+            created             INT NOT NULL, \
+            last_result_rowid   INT NOT NULL DEFAULT 0, \
+            dedup_state         VARCHAR \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_checkpoint_state ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            module              VARCHAR NOT NULL, \
+            state               VARCHAR NOT NULL \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_checkpoint_events ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            hash                VARCHAR NOT NULL, \
+            type                VARCHAR NOT NULL, \
+            generated           INT NOT NULL, \
+            confidence          INT NOT NULL DEFAULT 100, \
+            visibility          INT NOT NULL DEFAULT 100, \
+            risk                INT NOT NULL DEFAULT 0, \
+            module              VARCHAR NOT NULL, \
+            data                VARCHAR, \
+            source_event_hash   VARCHAR DEFAULT 'ROOT' \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_checkpoint_queue ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            hash                VARCHAR NOT NULL, \
+            module              VARCHAR NOT NULL, \
+            store_only          INT NOT NULL DEFAULT 0 \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_blobs ( \
+            hash                VARCHAR NOT NULL PRIMARY KEY, \
+            data                BLOB NOT NULL \
+        )",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_blob ON tbl_scan_results (blob_hash)",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            summary_by          VARCHAR NOT NULL, \
+            name                VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            unique_total        INT NOT NULL DEFAULT 0, \
+            last_in             INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, summary_by, name) \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_summary_values ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            summary_by          VARCHAR NOT NULL, \
+            name                VARCHAR NOT NULL, \
+            value_hash          BLOB NOT NULL, \
+            PRIMARY KEY (scan_instance_id, summary_by, name, value_hash) \
+        ) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_summary_pending ( \
+            scan_instance_id    VARCHAR NOT NULL PRIMARY KEY \
+        )",
+        "CREATE TRIGGER IF NOT EXISTS trg_scan_summary_values AFTER INSERT ON tbl_scan_summary_values \
+        BEGIN \
+            UPDATE tbl_scan_summary SET unique_total = unique_total + 1 \
+            WHERE scan_instance_id = NEW.scan_instance_id AND summary_by = NEW.summary_by AND name = NEW.name; \
+        END",
+        "CREATE INDEX IF NOT EXISTS idx_scan_checkpoint_state ON tbl_scan_checkpoint_state (scan_instance_id)",
+        "CREATE INDEX IF NOT EXISTS idx_scan_checkpoint_events ON tbl_scan_checkpoint_events (scan_instance_id)",
+        "CREATE INDEX IF NOT EXISTS idx_scan_checkpoint_queue ON tbl_scan_checkpoint_queue (scan_instance_id)",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_queue ( \
+            scan_instance_id    VARCHAR NOT NULL PRIMARY KEY REFERENCES tbl_scan_instance(guid), \
+            target_type         VARCHAR NOT NULL, \
+            resume              INT NOT NULL DEFAULT 0, \
+            queued              INT NOT NULL, \
+            started             INT NOT NULL DEFAULT 0, \
+            worker              VARCHAR \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_module_stats ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            module              VARCHAR NOT NULL, \
+            handled             INT NOT NULL DEFAULT 0, \
+            wall_time           REAL NOT NULL DEFAULT 0, \
+            cpu_time            REAL NOT NULL DEFAULT 0, \
+            queue_wait          REAL NOT NULL DEFAULT 0, \
+            http_requests       INT NOT NULL DEFAULT 0, \
+            http_bytes          INT NOT NULL DEFAULT 0, \
+            dns_queries         INT NOT NULL DEFAULT 0, \
+            received            VARCHAR NOT NULL DEFAULT '{}', \
+            emitted             VARCHAR NOT NULL DEFAULT '{}', \
+            PRIMARY KEY (scan_instance_id, module) \
+        )"
     ]
 
     eventDetails = [
@@ -270,8 +377,10 @@ class SpiderFootDb:
         # connect() will create the database file if it doesn't exist, but
         # at least we can use this opportunity to ensure we have permissions to
         # read and write to such a file.
+        # The handle is shared between module threads during a scan. All access
+        # to it is serialized with dbhLock.
         try:
-            dbh = sqlite3.connect(database_path)
+            dbh = sqlite3.connect(database_path, check_same_thread=False)
         except Exception as e:
             raise IOError(f"Error connecting to internal database {database_path}: {e}")
 
@@ -283,6 +392,13 @@ class SpiderFootDb:
         self.conn = dbh
         self.dbh = dbh.cursor()
 
+        self.eventBatchSize = max(1, int(opts.get('_eventbatchsize', self.eventBatchSize)))
+        self.eventBatchInterval = max(0, opts.get('_eventbatchinterval', self.eventBatchInterval))
+        self._eventBuffer = list()
+        self._eventBlobs = dict()
+        self._eventBufferLock = threading.Lock()
+        self.blobThreshold = max(0, int(opts.get('_blobthreshold', self.blobThreshold)))
+
         # SQLite doesn't support regex queries, so we create
         # a custom function to do so..
         def __dbregex__(qry, data):
@@ -293,6 +409,22 @@ class SpiderFootDb:
                 return False
             return ret is not None
 
+        # Event data stored in the blob table is decompressed in queries
+        def __dbinflate__(data):
+            if data is None:
+                return None
+            try:
+                return zlib.decompress(data).decode('utf-8')
+            except (zlib.error, UnicodeDecodeError):
+                return None
+
+        # Deterministic functions can be optimised by SQLite 3.8.3+, but
+        # can only be declared from Python 3.8.
+        if sys.version_info >= (3, 8) and sqlite3.sqlite_version_info >= (3, 8, 3):
+            self.conn.create_function("INFLATE", 1, __dbinflate__, deterministic=True)
+        else:
+            self.conn.create_function("INFLATE", 1, __dbinflate__)
+
         # Now we actually check to ensure the database file has the schema set
         # up correctly.
         with self.dbhLock:
@@ -307,6 +439,15 @@ class SpiderFootDb:
                 except Exception as e:
                     raise IOError(f"Tried to set up the SpiderFoot database schema, but failed: {e.args[0]}")
 
+            # Migrate a database set up by an earlier version. This is kept
+            # apart from the check above, so that a failure (e.g. a lock held
+            # by a running scan) never attempts to set up the schema again.
+            if not init:
+                try:
+                    self.upgrade()
+                except Exception as e:
+                    raise IOError(f"Tried to upgrade the SpiderFoot database schema, but failed: {e.args[0]}")
+
             if init:
                 for row in self.eventDetails:
                     event = row[0]
@@ -354,11 +495,63 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when setting up database: {e.args[0]}")
 
+    def upgrade(self):
+        """Add the columns and tables introduced since the database schema
+        was set up. The scans stored before the scan summary was maintained
+        are marked to be counted when their summary is first read.
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        with self.dbhLock:
+            try:
+                for table, column, columnType in (('tbl_scan_results', 'blob_hash', 'VARCHAR'), ('tbl_scan_checkpoint', 'dedup_state', 'VARCHAR')):
+                    self.dbh.execute(f"PRAGMA table_info({table})")
+                    columns = [row[1] for row in self.dbh.fetchall()]
+                    if columns and column not in columns:
+                        self.dbh.execute(f"ALTER TABLE {table} ADD COLUMN {column} {columnType}")
+
+                self.dbh.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_summary'")
+                summarized = self.dbh.fetchone()[0] > 0
+
+                for qry in self.createSchemaQueries:
+                    if "IF NOT EXISTS" in qry:
+                        self.dbh.execute(qry)
+
+                if not summarized:
+                    self.dbh.execute("INSERT OR IGNORE INTO tbl_scan_summary_pending (scan_instance_id) \
+                        SELECT guid FROM tbl_scan_instance")
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when upgrading database: {e.args[0]}")
+
     def close(self):
-        """Close the database handle."""
+        """Write any buffered events and close the database handle.
+
+        Raises:
+            IOError: database I/O failed writing the buffered events
+        """
 
         with self.dbhLock:
-            self.dbh.close()
+            try:
+                self.scanEventFlush()
+            finally:
+                self.dbh.close()
+
+    @staticmethod
+    def _eventData(table):
+        """SQL expression for the data of the results in a table alias,
+        whether stored with the results or in the blob table.
+
+        Args:
+            table (str): alias of tbl_scan_results in the query
+
+        Returns:
+            str: SQL expression
+        """
+        return f"COALESCE({table}.data, (SELECT INFLATE(b.data) FROM tbl_scan_blobs b WHERE b.hash = {table}.blob_hash))"
 
     def search(self, criteria, filterFp=False):
         """Search database.
@@ -404,8 +597,8 @@ class SpiderFootDb:
             raise ValueError("Only one search criteria provided; expected at least two")
 
         qvars = list()
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = f"SELECT ROUND(c.generated) AS generated, {self._eventData('c')}, \
+            {self._eventData('s')} as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, c.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp' \
@@ -425,16 +618,16 @@ class SpiderFootDb:
             qvars.append(criteria['type'])
 
         if criteria.get('value') is not None:
-            qry += " AND (c.data LIKE ? OR s.data LIKE ?) "
+            qry += f" AND ({self._eventData('c')} LIKE ? OR {self._eventData('s')} LIKE ?) "
             qvars.append(criteria['value'])
             qvars.append(criteria['value'])
 
         if criteria.get('regex') is not None:
-            qry += " AND (c.data REGEXP ? OR s.data REGEXP ?) "
+            qry += f" AND ({self._eventData('c')} REGEXP ? OR {self._eventData('s')} REGEXP ?) "
             qvars.append(criteria['regex'])
             qvars.append(criteria['regex'])
 
-        qry += " ORDER BY c.data"
+        qry += " ORDER BY 2"
 
         with self.dbhLock:
             try:
@@ -508,6 +701,32 @@ class SpiderFootDb:
                 else:
                     raise IOError(f"Unable to log scan event in DB: {e.args[0]}")
 
+    def scanLogEvents(self, logEvents):
+        """Log events to the database in one transaction.
+
+        Args:
+            logEvents (list): (scan instance ID, time generated in milliseconds, component, classification, message) of each event
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(logEvents, list):
+            raise TypeError(f"logEvents is {type(logEvents)}; expected list()")
+
+        qry = "INSERT INTO tbl_scan_log \
+            (scan_instance_id, generated, component, type, message) \
+            VALUES (?, ?, ?, ?, ?)"
+
+        with self.dbhLock:
+            try:
+                self.dbh.executemany(qry, logEvents)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"Unable to log scan events in DB: {e.args[0]}")
+
     def scanInstanceCreate(self, instanceId, scanName, scanTarget):
         """Store a scan instance in the database.
 
@@ -641,30 +860,31 @@ class SpiderFootDb:
         if by not in ["type", "module", "entity"]:
             raise ValueError(f"Invalid filter by value: {by}")
 
+        # Results by type and module are counted as they are stored
         if by == "type":
-            qry = "SELECT r.type, e.event_descr, MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.type ORDER BY e.event_descr"
+            qry = "SELECT s.name, e.event_descr, s.last_in, s.total, s.unique_total FROM \
+                tbl_scan_summary s, tbl_event_types e WHERE e.event = s.name \
+                AND s.scan_instance_id = ? AND s.summary_by = 'type' ORDER BY e.event_descr"
 
         if by == "module":
-            qry = "SELECT r.module, '', MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.module ORDER BY r.module DESC"
+            qry = "SELECT s.name, '', s.last_in, s.total, s.unique_total FROM \
+                tbl_scan_summary s WHERE s.scan_instance_id = ? \
+                AND s.summary_by = 'module' ORDER BY s.name DESC"
 
         if by == "entity":
-            qry = "SELECT r.data, e.event_descr, MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
+            qry = f"SELECT {self._eventData('r')}, e.event_descr, MAX(ROUND(generated)) AS last_in, \
+                count(*) AS total, count(DISTINCT COALESCE(r.data, r.blob_hash)) as utotal FROM \
                 tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
                 AND r.scan_instance_id = ? \
                 AND e.event_type in ('ENTITY') \
-                GROUP BY r.data, e.event_descr ORDER BY total DESC limit 50"
+                GROUP BY 1, e.event_descr ORDER BY total DESC limit 50"
 
         qvars = [instanceId]
 
         with self.dbhLock:
             try:
+                if by != "entity":
+                    self.__scanSummaryBackfill(instanceId)
                 self.dbh.execute(qry, qvars)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
@@ -692,8 +912,8 @@ class SpiderFootDb:
         if not isinstance(eventType, str):
             raise TypeError(f"eventType is {type(eventType)}; expected str()")
 
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = f"SELECT ROUND(c.generated) AS generated, {self._eventData('c')}, \
+            {self._eventData('s')} as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp' \
@@ -711,7 +931,7 @@ class SpiderFootDb:
         if filterFp:
             qry += " AND c.false_positive <> 1"
 
-        qry += " ORDER BY c.data"
+        qry += " ORDER BY 2"
 
         with self.dbhLock:
             try:
@@ -742,18 +962,18 @@ class SpiderFootDb:
         if not isinstance(eventType, str):
             raise TypeError(f"eventType is {type(eventType)}; expected str()")
 
-        qry = "SELECT DISTINCT data, type, COUNT(*) FROM tbl_scan_results \
-            WHERE scan_instance_id = ?"
+        qry = f"SELECT DISTINCT {self._eventData('r')}, r.type, COUNT(*) FROM tbl_scan_results r \
+            WHERE r.scan_instance_id = ?"
         qvars = [instanceId]
 
         if eventType != "ALL":
-            qry += " AND type = ?"
+            qry += " AND r.type = ?"
             qvars.append(eventType)
 
         if filterFp:
-            qry += " AND false_positive <> 1"
+            qry += " AND r.false_positive <> 1"
 
-        qry += " GROUP BY type, data ORDER BY COUNT(*)"
+        qry += " GROUP BY r.type, 1 ORDER BY COUNT(*)"
 
         with self.dbhLock:
             try:
@@ -762,6 +982,36 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when fetching unique result events: {e.args[0]}")
 
+    def scanResultEventStream(self, instanceId):
+        """Obtain the events of a scan in the order they were stored, each
+        after its source event, so the scan's event stream can be
+        reconstructed.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            list: (hash, type, generated, confidence, visibility, risk, module, data, source event hash) of each event
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        qry = f"SELECT r.hash, r.type, r.generated, r.confidence, r.visibility, r.risk, r.module, \
+            {self._eventData('r')}, r.source_event_hash \
+            FROM tbl_scan_results r WHERE r.scan_instance_id = ? ORDER BY r.rowid"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId])
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching result event stream: {e.args[0]}")
+
     def scanLogs(self, instanceId, limit=None, fromRowId=None, reverse=False):
         """Get scan logs.
 
@@ -869,6 +1119,14 @@ class SpiderFootDb:
                 self.dbh.execute(qry2, qvars)
                 self.dbh.execute(qry3, qvars)
                 self.dbh.execute(qry4, qvars)
+                self.__scanCheckpointDelete(instanceId)
+                self.dbh.execute("DELETE FROM tbl_scan_queue WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_module_stats WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_summary WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_summary_values WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_summary_pending WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_blobs WHERE hash NOT IN \
+                    (SELECT blob_hash FROM tbl_scan_results WHERE blob_hash IS NOT NULL)")
                 self.conn.commit()
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when deleting scan: {e.args[0]}")
@@ -1154,22 +1412,625 @@ class SpiderFootDb:
             if truncateSize > 0:
                 storeData = storeData[0:truncateSize]
 
-        # retrieve scan results
+        # Large data is compressed and stored once in the blob table, by
+        # its hash, for all the results with the same data.
+        blobHash = None
+        blob = None
+        if self.blobThreshold and len(storeData) >= self.blobThreshold:
+            blobData = storeData.encode('utf-8')
+            blobHash = hashlib.sha256(blobData).hexdigest()
+            blob = zlib.compress(blobData)
+            storeData = None
+
+        qvals = [instanceId, sfEvent.hash, sfEvent.eventType, sfEvent.generated,
+                 sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
+                 sfEvent.module, storeData, sfEvent.sourceEventHash, blobHash]
+
+        # Events are buffered without waiting for the database handle, and
+        # written in one transaction once enough of them have been buffered.
+        with self._eventBufferLock:
+            if not self._eventBuffer:
+                self._eventBufferStart = time.monotonic()
+            self._eventBuffer.append(qvals)
+            if blobHash:
+                self._eventBlobs[blobHash] = blob
+            full = len(self._eventBuffer) >= self.eventBatchSize
+
+        self.scanEventFlush(due=not full)
+
+    def scanEventFlush(self, due=False):
+        """Write the events buffered by scanEventStore() in one transaction.
+
+        Args:
+            due (bool): only write them if the first has waited for the batch interval
+
+        Raises:
+            IOError: database I/O failed, and the buffered events were lost
+        """
+
+        start = self._eventBufferStart
+        if start is None:
+            return
+
+        if due and time.monotonic() - start < self.eventBatchInterval:
+            return
+
+        # Traced including the wait for the database handle
+        with SpiderFootTracer.traced("scanEventStore", "db", {'events': len(self._eventBuffer)}), self.dbhLock:
+            try:
+                self.__scanEventBufferWrite()
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when storing event data ({self.dbh}): {e.args[0]}")
+
+    def __scanEventBufferWrite(self):
+        """Write the events buffered by scanEventStore(), without
+        committing. Must be called with dbhLock held, so that batches are
+        written in the order they were buffered."""
+        with self._eventBufferLock:
+            events = self._eventBuffer
+            blobs = self._eventBlobs
+            self._eventBuffer = list()
+            self._eventBlobs = dict()
+            self._eventBufferStart = None
+
+        if not events:
+            return
+
+        if blobs:
+            self.dbh.executemany("INSERT OR IGNORE INTO tbl_scan_blobs (hash, data) VALUES (?, ?)", blobs.items())
+
         qry = "INSERT INTO tbl_scan_results \
+            (scan_instance_id, hash, type, generated, confidence, \
+            visibility, risk, module, data, source_event_hash, blob_hash) \
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+        self.dbh.executemany(qry, events)
+        self.__scanSummaryUpdate(events)
+
+    @staticmethod
+    def _valueHash(data, blobHash):
+        """Hash identifying the data of a result, whether stored with the
+        result or in the blob table.
+
+        Args:
+            data (str): data stored with the result
+            blobHash (str): hash of the data stored in the blob table
+
+        Returns:
+            bytes: SHA-256 hash of the data
+        """
+        if blobHash:
+            return bytes.fromhex(blobHash)
+        return hashlib.sha256((data or "").encode('utf-8')).digest()
+
+    def __scanSummaryUpdate(self, events):
+        """Count stored results in the scan summary, by type and by module.
+        Must be called with dbhLock held, in the transaction storing them.
+
+        Args:
+            events (list): scanEventStore() values of the stored results
+        """
+        counts = dict()
+        values = set()
+        for instanceId, _, eventType, generated, _, _, _, module, data, _, blobHash in events:
+            valueHash = self._valueHash(data, blobHash)
+            for by, name in (('type', eventType), ('module', module)):
+                count = counts.get((instanceId, by, name))
+                if count is None:
+                    counts[(instanceId, by, name)] = [1, generated]
+                else:
+                    count[0] += 1
+                    count[1] = max(count[1], generated)
+                values.add((instanceId, by, name, valueHash))
+
+        # Rows are created before being added to, rather than upserted,
+        # which SQLite only supports from 3.24.
+        self.dbh.executemany("INSERT OR IGNORE INTO tbl_scan_summary (scan_instance_id, summary_by, name) \
+            VALUES (?, ?, ?)", counts.keys())
+
+        qry = "UPDATE tbl_scan_summary SET total = total + ?, last_in = MAX(last_in, ROUND(?)) \
+            WHERE scan_instance_id = ? AND summary_by = ? AND name = ?"
+        self.dbh.executemany(qry, [tuple(count) + key for key, count in counts.items()])
+
+        # Unique results are counted by trg_scan_summary_values
+        self.dbh.executemany("INSERT OR IGNORE INTO tbl_scan_summary_values \
+            (scan_instance_id, summary_by, name, value_hash) VALUES (?, ?, ?, ?)", values)
+
+    def __scanSummaryRebuild(self, instanceId):
+        """Count the stored results of a scan in the scan summary again,
+        without committing. Must be called with dbhLock held.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        self.dbh.execute("DELETE FROM tbl_scan_summary WHERE scan_instance_id = ?", [instanceId])
+        self.dbh.execute("DELETE FROM tbl_scan_summary_values WHERE scan_instance_id = ?", [instanceId])
+        self.dbh.execute("DELETE FROM tbl_scan_summary_pending WHERE scan_instance_id = ?", [instanceId])
+
+        for by, column in (('type', 'type'), ('module', 'module')):
+            self.dbh.execute(f"INSERT INTO tbl_scan_summary (scan_instance_id, summary_by, name, total, last_in) \
+                SELECT scan_instance_id, ?, {column}, COUNT(*), MAX(ROUND(generated)) FROM tbl_scan_results \
+                WHERE scan_instance_id = ? GROUP BY {column}", [by, instanceId])
+
+        def values():
+            results = self.conn.execute("SELECT type, module, data, blob_hash FROM tbl_scan_results \
+                WHERE scan_instance_id = ?", [instanceId])
+            for eventType, module, data, blobHash in results:
+                valueHash = self._valueHash(data, blobHash)
+                yield (instanceId, 'type', eventType, valueHash)
+                yield (instanceId, 'module', module, valueHash)
+
+        self.dbh.executemany("INSERT OR IGNORE INTO tbl_scan_summary_values \
+            (scan_instance_id, summary_by, name, value_hash) VALUES (?, ?, ?, ?)", values())
+
+    def __scanSummaryBackfill(self, instanceId=None):
+        """Count the results of the scans stored before the scan summary
+        was maintained. Must be called with dbhLock held.
+
+        Args:
+            instanceId (str): scan instance ID, or None for all scans
+        """
+        if instanceId is None:
+            self.dbh.execute("SELECT scan_instance_id FROM tbl_scan_summary_pending")
+        else:
+            self.dbh.execute("SELECT scan_instance_id FROM tbl_scan_summary_pending \
+                WHERE scan_instance_id = ?", [instanceId])
+        pending = [row[0] for row in self.dbh.fetchall()]
+        if not pending:
+            return
+
+        try:
+            for scanId in pending:
+                self.__scanSummaryRebuild(scanId)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+
+    def scanCheckpointSet(self, instanceId, moduleStates, events, queuedEvents, dedupState=None):
+        """Save a checkpoint of a running scan, replacing any previous
+        checkpoint. Must be called while no events are being handled, so
+        that the checkpoint is consistent with the stored results.
+
+        Args:
+            instanceId (str): scan instance ID
+            moduleStates (dict): serialized temporary storage of each module, by module name
+            events (list): events pending to be handled, preceded by their source events
+            queuedEvents (list): (event hash, module name, store only) tuples of events waiting
+                                 to be handled. An empty module name means all modules listening.
+            dedupState (str): serialized index of the events already dispatched to each module
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(moduleStates, dict):
+            raise TypeError(f"moduleStates is {type(moduleStates)}; expected dict()")
+
+        if not isinstance(events, list):
+            raise TypeError(f"events is {type(events)}; expected list()")
+
+        if not isinstance(queuedEvents, list):
+            raise TypeError(f"queuedEvents is {type(queuedEvents)}; expected list()")
+
+        if dedupState is not None and not isinstance(dedupState, str):
+            raise TypeError(f"dedupState is {type(dedupState)}; expected str()")
+
+        eventQry = "INSERT INTO tbl_scan_checkpoint_events \
             (scan_instance_id, hash, type, generated, confidence, \
             visibility, risk, module, data, source_event_hash) \
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
 
-        qvals = [instanceId, sfEvent.hash, sfEvent.eventType, sfEvent.generated,
-                 sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
-                 sfEvent.module, storeData, sfEvent.sourceEventHash]
+        eventVals = [
+            [instanceId, e.hash, e.eventType, e.generated, e.confidence,
+             e.visibility, e.risk, e.module, e.data, e.sourceEventHash]
+            for e in events
+        ]
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvals)
+                self.__scanCheckpointDelete(instanceId)
+
+                # Results still buffered were stored before the checkpoint
+                self.__scanEventBufferWrite()
+
+                # Results stored after the checkpoint are deleted on resume,
+                # as they will be found again.
+                self.dbh.execute("SELECT COALESCE(MAX(rowid), 0) FROM tbl_scan_results WHERE scan_instance_id = ?", [instanceId])
+                lastResultRowId = self.dbh.fetchone()[0]
+
+                self.dbh.execute("INSERT INTO tbl_scan_checkpoint (scan_instance_id, created, last_result_rowid, dedup_state) VALUES (?, ?, ?, ?)",
+                                 [instanceId, time.time() * 1000, lastResultRowId, dedupState])
+                self.dbh.executemany("INSERT INTO tbl_scan_checkpoint_state (scan_instance_id, module, state) VALUES (?, ?, ?)",
+                                     [[instanceId, module, state] for module, state in moduleStates.items()])
+                self.dbh.executemany(eventQry, eventVals)
+                self.dbh.executemany("INSERT INTO tbl_scan_checkpoint_queue (scan_instance_id, hash, module, store_only) VALUES (?, ?, ?, ?)",
+                                     [[instanceId, h, module, int(storeOnly)] for h, module, storeOnly in queuedEvents])
                 self.conn.commit()
             except sqlite3.Error as e:
-                raise IOError(f"SQL error encountered when storing event data ({self.dbh}): {e.args[0]}")
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when saving scan checkpoint: {e.args[0]}")
+
+    def scanCheckpointGet(self, instanceId):
+        """Get the last checkpoint saved for a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            dict: checkpoint, with the time it was created, the last result stored before
+                  it (lastResultRowId), the module states (moduleStates), the index of
+                  events already dispatched to each module (dedupState), the events
+                  (events) and the events waiting to be handled (queuedEvents),
+                  or None if there is no checkpoint for the scan
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        qvars = [instanceId]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute("SELECT created, last_result_rowid, dedup_state FROM tbl_scan_checkpoint WHERE scan_instance_id = ?", qvars)
+                row = self.dbh.fetchone()
+                if not row:
+                    return None
+
+                checkpoint = {
+                    'created': row[0],
+                    'lastResultRowId': row[1],
+                    'dedupState': row[2]
+                }
+
+                self.dbh.execute("SELECT module, state FROM tbl_scan_checkpoint_state WHERE scan_instance_id = ?", qvars)
+                checkpoint['moduleStates'] = dict(self.dbh.fetchall())
+
+                self.dbh.execute("SELECT hash, type, generated, confidence, visibility, risk, module, data, source_event_hash \
+                    FROM tbl_scan_checkpoint_events WHERE scan_instance_id = ? ORDER BY rowid", qvars)
+                checkpoint['events'] = self.dbh.fetchall()
+
+                self.dbh.execute("SELECT hash, module, store_only FROM tbl_scan_checkpoint_queue \
+                    WHERE scan_instance_id = ? ORDER BY rowid", qvars)
+                checkpoint['queuedEvents'] = [(h, module, bool(storeOnly)) for h, module, storeOnly in self.dbh.fetchall()]
+
+                return checkpoint
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching scan checkpoint: {e.args[0]}")
+
+    def scanCheckpointDelete(self, instanceId):
+        """Delete the checkpoint saved for a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        with self.dbhLock:
+            try:
+                self.__scanCheckpointDelete(instanceId)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when deleting scan checkpoint: {e.args[0]}")
+
+    def __scanCheckpointDelete(self, instanceId):
+        """Delete the checkpoint saved for a scan, without committing.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        for table in ["tbl_scan_checkpoint", "tbl_scan_checkpoint_state",
+                      "tbl_scan_checkpoint_events", "tbl_scan_checkpoint_queue"]:
+            self.dbh.execute(f"DELETE FROM {table} WHERE scan_instance_id = ?", [instanceId])
+
+    def scanResultDeleteAfter(self, instanceId, lastResultRowId):
+        """Delete the results of a scan stored after a checkpoint.
+
+        Args:
+            instanceId (str): scan instance ID
+            lastResultRowId (int): row ID of the last result stored before the checkpoint
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(lastResultRowId, int):
+            raise TypeError(f"lastResultRowId is {type(lastResultRowId)}; expected int()")
+
+        qry = "DELETE FROM tbl_scan_results WHERE scan_instance_id = ? AND rowid > ?"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId, lastResultRowId])
+                self.__scanSummaryRebuild(instanceId)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when deleting scan results: {e.args[0]}")
+
+    def scanModuleStatsSet(self, instanceId, moduleStats):
+        """Save the runtime statistics of the modules of a scan, replacing
+        those previously saved for the same modules.
+
+        Args:
+            instanceId (str): scan instance ID
+            moduleStats (dict): statistics of each module, as returned by SpiderFootModuleStats.asDict(), by module name
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(moduleStats, dict):
+            raise TypeError(f"moduleStats is {type(moduleStats)}; expected dict()")
+
+        qry = "REPLACE INTO tbl_scan_module_stats \
+            (scan_instance_id, module, handled, wall_time, cpu_time, queue_wait, \
+            http_requests, http_bytes, dns_queries, received, emitted) \
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+        qvals = [
+            [instanceId, module, stats['handled'], stats['wallTime'], stats['cpuTime'], stats['queueWait'],
+             stats['httpRequests'], stats['httpBytes'], stats['dnsQueries'],
+             json.dumps(stats['received']), json.dumps(stats['emitted'])]
+            for module, stats in moduleStats.items()
+        ]
+
+        with self.dbhLock:
+            try:
+                self.dbh.executemany(qry, qvals)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when saving scan module statistics: {e.args[0]}")
+
+    def scanModuleStatsGet(self, instanceId):
+        """Get the runtime statistics of the modules of a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            dict: statistics of each module, in the form returned by SpiderFootModuleStats.asDict(), by module name
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        qry = "SELECT module, handled, wall_time, cpu_time, queue_wait, \
+            http_requests, http_bytes, dns_queries, received, emitted \
+            FROM tbl_scan_module_stats WHERE scan_instance_id = ? ORDER BY module"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId])
+                rows = self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching scan module statistics: {e.args[0]}")
+
+        moduleStats = dict()
+        for module, handled, wallTime, cpuTime, queueWait, httpRequests, httpBytes, dnsQueries, received, emitted in rows:
+            moduleStats[module] = {
+                'handled': handled,
+                'wallTime': wallTime,
+                'cpuTime': cpuTime,
+                'queueWait': queueWait,
+                'received': json.loads(received),
+                'emitted': json.loads(emitted),
+                'httpRequests': httpRequests,
+                'httpBytes': httpBytes,
+                'dnsQueries': dnsQueries
+            }
+
+        return moduleStats
+
+    def scanQueueAdd(self, instanceId, targetType, resume=False):
+        """Queue a scan to be run by a scan worker.
+
+        Args:
+            instanceId (str): scan instance ID
+            targetType (str): scan target type
+            resume (bool): resume the scan from its last checkpoint
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(targetType, str):
+            raise TypeError(f"targetType is {type(targetType)}; expected str()")
+
+        if not isinstance(resume, bool):
+            raise TypeError(f"resume is {type(resume)}; expected bool()")
+
+        qry = "INSERT INTO tbl_scan_queue (scan_instance_id, target_type, resume, queued) VALUES (?, ?, ?, ?)"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId, targetType, int(resume), time.time() * 1000])
+                self.dbh.execute("UPDATE tbl_scan_instance SET status = 'QUEUED' WHERE guid = ?", [instanceId])
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when queuing scan: {e.args[0]}")
+
+    def scanQueueNext(self, workerId):
+        """Take the scan which has been waiting in the scan queue the
+        longest, to be run by a scan worker.
+
+        Args:
+            workerId (str): scan worker ID
+
+        Returns:
+            list: scan instance ID, target type and whether to resume the scan,
+                  or None if no scans are waiting
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(workerId, str):
+            raise TypeError(f"workerId is {type(workerId)}; expected str()")
+
+        # A single statement, so scans are taken by one worker only, even
+        # when workers in other processes share the database.
+        qry = "UPDATE tbl_scan_queue SET started = ?, worker = ? \
+            WHERE scan_instance_id = ( \
+            SELECT scan_instance_id FROM tbl_scan_queue WHERE started = 0 \
+            ORDER BY queued, rowid LIMIT 1)"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [time.time() * 1000, workerId])
+                self.conn.commit()
+                if self.dbh.rowcount < 1:
+                    return None
+
+                self.dbh.execute("SELECT scan_instance_id, target_type, resume FROM tbl_scan_queue \
+                    WHERE worker = ? AND started > 0 ORDER BY started DESC LIMIT 1", [workerId])
+                row = self.dbh.fetchone()
+                if not row:
+                    return None
+
+                return [row[0], row[1], bool(row[2])]
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching queued scan: {e.args[0]}")
+
+    def scanQueueGet(self, instanceId):
+        """Get the scan queue entry of a scan.
+
+        Args:
+            instanceId (str): scan instance ID
+
+        Returns:
+            list: target type, resume, time queued, time started (0 if still
+                  waiting) and ID of the worker running the scan, or None if
+                  the scan is not in the queue
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        qry = "SELECT target_type, resume, queued, started, worker FROM tbl_scan_queue WHERE scan_instance_id = ?"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId])
+                return self.dbh.fetchone()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching queued scan: {e.args[0]}")
+
+    def scanQueueList(self):
+        """List the scans in the scan queue, in the order they were queued.
+
+        Returns:
+            list: scan instance ID, target type, resume, time queued,
+                  time started (0 if still waiting) and worker ID of each scan
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        qry = "SELECT scan_instance_id, target_type, resume, queued, started, worker \
+            FROM tbl_scan_queue ORDER BY queued, rowid"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry)
+                return self.dbh.fetchall()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when fetching scan queue: {e.args[0]}")
+
+    def scanQueueRemove(self, instanceId, waitingOnly=False):
+        """Remove a scan from the scan queue.
+
+        Args:
+            instanceId (str): scan instance ID
+            waitingOnly (bool): only remove the scan if no worker has taken it yet
+
+        Returns:
+            bool: the scan was removed
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        qry = "DELETE FROM tbl_scan_queue WHERE scan_instance_id = ?"
+        if waitingOnly:
+            qry += " AND started = 0"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, [instanceId])
+                self.conn.commit()
+                return self.dbh.rowcount > 0
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when removing queued scan: {e.args[0]}")
+
+    def scanQueueReset(self):
+        """Remove the scans taken by scan workers which are no longer
+        running, e.g. after the web server was restarted, and mark the
+        scans as aborted, so they can be resumed.
+
+        Returns:
+            list: scan instance IDs of the scans removed from the queue
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute("SELECT scan_instance_id FROM tbl_scan_queue WHERE started > 0")
+                instanceIds = [row[0] for row in self.dbh.fetchall()]
+
+                self.dbh.execute("UPDATE tbl_scan_instance SET status = 'ABORTED' \
+                    WHERE guid IN (SELECT scan_instance_id FROM tbl_scan_queue WHERE started > 0) \
+                    AND status NOT IN ('FINISHED', 'ABORTED', 'ERROR-FAILED')")
+                self.dbh.execute("DELETE FROM tbl_scan_queue WHERE started > 0")
+                self.conn.commit()
+                return instanceIds
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise IOError(f"SQL error encountered when resetting scan queue: {e.args[0]}")
 
     def scanInstanceList(self):
         """List all previously run scans.
@@ -1181,22 +2042,16 @@ class SpiderFootDb:
             IOError: database I/O failed
         """
 
-        # SQLite doesn't support OUTER JOINs, so we need a work-around that
-        # does a UNION of scans with results and scans without results to
-        # get a complete listing.
+        # The results of each scan are counted as they are stored
         qry = "SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, COUNT(r.type) \
-            FROM tbl_scan_instance i, tbl_scan_results r WHERE i.guid = r.scan_instance_id \
-            AND r.type <> 'ROOT' GROUP BY i.guid \
-            UNION ALL \
-            SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, '0' \
-            FROM tbl_scan_instance i  WHERE i.guid NOT IN ( \
-            SELECT distinct scan_instance_id FROM tbl_scan_results WHERE type <> 'ROOT') \
-            ORDER BY started DESC"
+            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, \
+            (SELECT COALESCE(SUM(s.total), 0) FROM tbl_scan_summary s \
+            WHERE s.scan_instance_id = i.guid AND s.summary_by = 'type' AND s.name <> 'ROOT') \
+            FROM tbl_scan_instance i ORDER BY started DESC"
 
         with self.dbhLock:
             try:
+                self.__scanSummaryBackfill()
                 self.dbh.execute(qry)
                 return self.dbh.fetchall()
             except sqlite3.Error as e:
@@ -1262,8 +2117,8 @@ class SpiderFootDb:
 
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = f"SELECT ROUND(c.generated) AS generated, {self._eventData('c')}, \
+            {self._eventData('s')} as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp' \
@@ -1311,8 +2166,8 @@ class SpiderFootDb:
 
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+        qry = f"SELECT ROUND(c.generated) AS generated, {self._eventData('c')}, \
+            {self._eventData('s')} as 'source_data', \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
             c.false_positive as 'fp', s.false_positive as 'parent_fp' \
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import math
+import threading
+
+from .event import SpiderFootEvent
+
+
+class SpiderFootDedupIndex():
+    """Scan-wide index of the events already dispatched to each module, used
+    by the scanner to skip duplicate events for modules which opt in by
+    setting _dedupEvents.
+
+    Events are identified by the module name and the event fingerprint
+    (the event type and lower case data). The index is either an exact
+    set of fingerprints, or a Bloom filter using a fixed amount of memory,
+    in which case a small fraction of new events may be mistaken for
+    duplicates.
+
+    Attributes:
+        bloomSize (int): number of events the Bloom filter is sized for, or 0 for an exact index
+        errorRate (float): Bloom filter false positive rate at bloomSize events
+    """
+
+    _bloomSize = 0
+    _errorRate = 0.001
+    _seen = None
+    _bits = None
+    _bitCount = 0
+    _hashCount = 0
+    _moduleSeeds = None
+    _lock = None
+
+    def __init__(self, bloomSize=0, errorRate=0.001):
+        """Initialize the index.
+
+        Args:
+            bloomSize (int): number of events to size the Bloom filter for (0 = exact index)
+            errorRate (float): Bloom filter false positive rate at bloomSize events
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(bloomSize, int):
+            raise TypeError(f"bloomSize is {type(bloomSize)}; expected int()")
+
+        if bloomSize < 0:
+            raise ValueError(f"bloomSize value is {bloomSize}; expected 0 or more")
+
+        if not isinstance(errorRate, float):
+            raise TypeError(f"errorRate is {type(errorRate)}; expected float()")
+
+        if not 0 < errorRate < 1:
+            raise ValueError(f"errorRate value is {errorRate}; expected 0 - 1")
+
+        self._bloomSize = bloomSize
+        self._errorRate = errorRate
+        self._seen = dict()
+        self._moduleSeeds = dict()
+        self._lock = threading.Lock()
+
+        if bloomSize:
+            # Optimal number of bits and hash functions for the error rate
+            self._bitCount = math.ceil(-bloomSize * math.log(errorRate) / math.log(2) ** 2)
+            self._hashCount = max(1, round(self._bitCount / bloomSize * math.log(2)))
+            self._bits = bytearray((self._bitCount + 7) // 8)
+
+    @property
+    def bloomSize(self):
+        return self._bloomSize
+
+    @property
+    def errorRate(self):
+        return self._errorRate
+
+    def _bitPositions(self, moduleName, fingerprint):
+        """Bloom filter bit positions for a module and event fingerprint,
+        derived from the fingerprint with double hashing.
+
+        Args:
+            moduleName (str): module name
+            fingerprint (bytes): event fingerprint
+
+        Returns:
+            list: bit positions
+        """
+        seed = self._moduleSeeds.get(moduleName)
+        if seed is None:
+            seed = int.from_bytes(hashlib.sha256(moduleName.encode('utf-8')).digest()[:8], 'big')
+            self._moduleSeeds[moduleName] = seed
+
+        h1 = int.from_bytes(fingerprint[:8], 'big') ^ seed
+        h2 = int.from_bytes(fingerprint[8:16], 'big') | 1
+
+        return [(h1 + i * h2) % self._bitCount for i in range(self._hashCount)]
+
+    def add(self, moduleName, sfEvent):
+        """Add an event to the index of events dispatched to a module.
+
+        Args:
+            moduleName (str): module name
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            bool: the event was not already in the index for the module
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        if not isinstance(moduleName, str):
+            raise TypeError(f"moduleName is {type(moduleName)}; expected str()")
+
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        fingerprint = sfEvent.fingerprint
+
+        with self._lock:
+            if not self._bloomSize:
+                seen = self._seen.setdefault(moduleName, set())
+                if fingerprint in seen:
+                    return False
+                seen.add(fingerprint)
+                return True
+
+            isNew = False
+            for bit in self._bitPositions(moduleName, fingerprint):
+                if not self._bits[bit >> 3] & (1 << (bit & 7)):
+                    isNew = True
+                    self._bits[bit >> 3] |= 1 << (bit & 7)
+
+            return isNew
+
+    def getState(self):
+        """Get the contents of the index, so that a resumed scan can
+        restore them.
+
+        Returns:
+            dict: JSON serializable contents of the index
+        """
+        with self._lock:
+            if not self._bloomSize:
+                return {
+                    'bloomSize': 0,
+                    'seen': {moduleName: [fingerprint.hex() for fingerprint in seen] for moduleName, seen in self._seen.items()}
+                }
+
+            return {
+                'bloomSize': self._bloomSize,
+                'errorRate': self._errorRate,
+                'bits': base64.b64encode(bytes(self._bits)).decode('ascii')
+            }
+
+    def restoreState(self, state):
+        """Restore the contents of the index saved by getState().
+
+        Args:
+            state (dict): contents of the index
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: the contents are not those of an index of the same size
+        """
+        if not isinstance(state, dict):
+            raise TypeError(f"state is {type(state)}; expected dict()")
+
+        if state.get('bloomSize') != self._bloomSize or (self._bloomSize and state.get('errorRate') != self._errorRate):
+            raise ValueError(f"state is of an index sized for {state.get('bloomSize')} events; expected {self._bloomSize}")
+
+        with self._lock:
+            if not self._bloomSize:
+                self._seen = {moduleName: set(bytes.fromhex(fingerprint) for fingerprint in seen) for moduleName, seen in state.get('seen', dict()).items()}
+                return
+
+            bits = base64.b64decode(state.get('bits', ''))
+            if len(bits) != len(self._bits):
+                raise ValueError(f"state has {len(bits)} bytes of Bloom filter; expected {len(self._bits)}")
+            self._bits = bytearray(bits)
+
+# end of SpiderFootDedupIndex class
@@ -17,6 +17,9 @@ class SpiderFootEvent():
         sourceEvent (SpiderFootEvent): SpiderFootEvent that triggered this event
         sourceEventHash (str): hash of the SpiderFootEvent event that triggered this event
         hash (str): unique SHA256 hash of the event, or "ROOT"
+        fingerprint (bytes): SHA256 hash of the event type and lower case data
+        _eventStore (SpiderFootEventStore): scan event store, once the event has been dispatched
+        _dispatched (float): monotonic time the scanner dispatched the event to the listening modules
         moduleDataSource (str): module data source
         actualSource (str): source data of parent event
         __id: unique ID of the event, generated using eventType, generated, module, and a random integer
@@ -33,8 +36,19 @@ class SpiderFootEvent():
     _sourceEventHash = None
     _moduleDataSource = None
     _actualSource = None
+    _fingerprint = None
+    _fingerprintMask = 0
+    _ancestorMask = 0
+    _hash = None
+    _eventStore = None
+    _spillOffset = None
+    _spillLength = 0
+    _dispatched = None
     __id = None
 
+    # Number of bits in the Bloom filter of an event's ancestors' fingerprints
+    _ancestorMaskBits = 512
+
     def __init__(self, eventType, data, module, sourceEvent, confidence=100, visibility=100, risk=0):
         """Initialize SpiderFoot event object.
 
@@ -100,10 +114,18 @@ class SpiderFootEvent():
 
     @property
     def data(self):
+        # Data of events handled by all modules may have been spilled
+        if self._data is None and self._eventStore is not None:
+            return self._eventStore.loadData(self)
+
         return self._data
 
     @property
     def sourceEvent(self):
+        # Once dispatched, events reference their source event by hash
+        if self._sourceEvent is None and self._eventStore is not None and self.eventType != "ROOT":
+            return self._eventStore.get(self._sourceEventHash)
+
         return self._sourceEvent
 
     @property
@@ -118,6 +140,68 @@ class SpiderFootEvent():
     def moduleDataSource(self):
         return self._moduleDataSource
 
+    @property
+    def fingerprint(self):
+        """Hash of the event type and normalized (lower case) data, identifying
+        the same data found again by other events.
+
+        Returns:
+            bytes: SHA256 digest of the event type and lower case data
+        """
+        if self._fingerprint is None:
+            self.__setFingerprint()
+
+        return self._fingerprint
+
+    def __setFingerprint(self):
+        """Calculate the fingerprint of the event, and the bits it sets in
+        the Bloom filter of the ancestors of this event's descendants."""
+        digestStr = f"{self.eventType}:{self.data.lower()}".encode('raw_unicode_escape')
+        self._fingerprint = hashlib.sha256(digestStr).digest()
+
+        self._fingerprintMask = 0
+        for i in range(0, 6, 2):
+            bit = int.from_bytes(self._fingerprint[i:i + 2], 'big') % self._ancestorMaskBits
+            self._fingerprintMask |= 1 << bit
+
+    def _fingerprintBits(self):
+        """Bits set by this event's fingerprint in a Bloom filter of ancestors.
+
+        Returns:
+            int: bit mask
+        """
+        if self._fingerprint is None:
+            self.__setFingerprint()
+
+        return self._fingerprintMask
+
+    def repeatsAncestor(self):
+        """Check whether an event with the same type and data appears in this
+        event's chain of source events, above its direct source event.
+
+        Each event carries a Bloom filter of its ancestors' fingerprints, so
+        the chain of source events is only walked to rule out a false positive.
+
+        Returns:
+            bool: an ancestor has the same type and data as this event
+        """
+        if self.sourceEvent is None:
+            return False
+
+        fingerprintBits = self._fingerprintBits()
+        if self.sourceEvent._ancestorMask & fingerprintBits != fingerprintBits:
+            return False
+
+        fingerprint = self.fingerprint
+
+        prevEvent = self.sourceEvent.sourceEvent
+        while prevEvent is not None:
+            if prevEvent.fingerprint == fingerprint:
+                return True
+            prevEvent = prevEvent.sourceEvent
+
+        return False
+
     @property
     def hash(self):
         """Unique hash of this event.
@@ -128,8 +212,11 @@ class SpiderFootEvent():
         if self.eventType == "ROOT":
             return "ROOT"
 
-        digestStr = self.__id.encode('raw_unicode_escape')
-        return hashlib.sha256(digestStr).hexdigest()
+        if self._hash is None:
+            digestStr = self.__id.encode('raw_unicode_escape')
+            self._hash = hashlib.sha256(digestStr).hexdigest()
+
+        return self._hash
 
     @eventType.setter
     def eventType(self, eventType):
@@ -149,6 +236,7 @@ class SpiderFootEvent():
             raise ValueError("eventType is empty")
 
         self._eventType = eventType
+        self._fingerprint = None
 
     @confidence.setter
     def confidence(self, confidence):
@@ -246,6 +334,8 @@ class SpiderFootEvent():
             raise ValueError(f"data is empty: '{str(data)}'")
 
         self._data = data
+        self._spillOffset = None
+        self._fingerprint = None
 
     @sourceEvent.setter
     def sourceEvent(self, sourceEvent):
@@ -263,6 +353,7 @@ class SpiderFootEvent():
         if self.eventType == "ROOT":
             self._sourceEvent = None
             self._sourceEventHash = "ROOT"
+            self._ancestorMask = 0
             return
 
         if not isinstance(sourceEvent, SpiderFootEvent):
@@ -271,6 +362,9 @@ class SpiderFootEvent():
         self._sourceEvent = sourceEvent
         self._sourceEventHash = self.sourceEvent.hash
 
+        # Ancestors of this event are the source event and its ancestors
+        self._ancestorMask = sourceEvent._ancestorMask | sourceEvent._fingerprintBits()
+
     @actualSource.setter
     def actualSource(self, actualSource):
         self._actualSource = actualSource
@@ -0,0 +1,222 @@
+import tempfile
+import threading
+
+
+class SpiderFootEventStore():
+    """Scan-wide store of the events dispatched to modules.
+
+    Events added to the store reference their source event by hash, rather
+    than holding on to the whole chain of source events. Once every module
+    an event was dispatched to has handled it, large event data is spilled
+    to a temporary file and released from memory, leaving a small resident
+    event which reads its data back from the file when needed.
+
+    Events are removed from the store once they are handled and no event
+    in the store references them as its source event. An event removed
+    from the store references its source event directly again, so that
+    modules which kept hold of it can still follow its chain of source
+    events, which is released once they let go of it.
+
+    Attributes:
+        spillSize (int): event data of this many bytes or more is spilled once handled, or 0 to keep it in memory
+    """
+
+    _spillSize = 0
+    _events = None
+    _pending = None
+    _children = None
+    _spillFile = None
+    _lock = None
+
+    def __init__(self, spillSize=1024):
+        """Initialize the store.
+
+        Args:
+            spillSize (int): event data of this many bytes or more is spilled once handled (0 = never spill)
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(spillSize, int):
+            raise TypeError(f"spillSize is {type(spillSize)}; expected int()")
+
+        if spillSize < 0:
+            raise ValueError(f"spillSize value is {spillSize}; expected 0 or more")
+
+        self._spillSize = spillSize
+        self._events = dict()
+        self._pending = dict()
+        self._children = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def spillSize(self):
+        return self._spillSize
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, sfEvent):
+        """Add an event to the store, before it is dispatched to modules.
+
+        The event is held by the store until released with handled(), in
+        addition to each module it is queued for with queued().
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+        from spiderfoot import SpiderFootEvent
+
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        eventHash = sfEvent.hash
+
+        with self._lock:
+            added = self._events.get(eventHash) is not sfEvent
+            self._events[eventHash] = sfEvent
+            self._pending[eventHash] = self._pending.get(eventHash, 0) + 1
+            sfEvent._eventStore = self
+
+            # The source event can now be looked up by hash, and is kept in
+            # the store until this event is removed. Source events which are
+            # not in the store are still referenced directly.
+            sourceEventHash = sfEvent.sourceEventHash
+            if added and sfEvent._sourceEvent is not None and sourceEventHash in self._events:
+                sfEvent._sourceEvent = None
+                self._children[sourceEventHash] = self._children.get(sourceEventHash, 0) + 1
+
+    def get(self, eventHash):
+        """Look up an event in the store by hash.
+
+        Args:
+            eventHash (str): event hash
+
+        Returns:
+            SpiderFootEvent: event, or None if the event is not in the store
+        """
+        return self._events.get(eventHash)
+
+    def queued(self, sfEvent):
+        """Record that an event has been queued for a module to handle.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        eventHash = sfEvent.hash
+
+        with self._lock:
+            self._pending[eventHash] = self._pending.get(eventHash, 0) + 1
+
+    def handled(self, sfEvent):
+        """Record that a module has handled an event, spilling the event's
+        data if no other module still has to handle it, and removing it
+        from the store if no event in the store references it either.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        eventHash = sfEvent.hash
+
+        with self._lock:
+            pending = self._pending.get(eventHash, 0) - 1
+            if pending > 0:
+                self._pending[eventHash] = pending
+                return
+
+            self._pending.pop(eventHash, None)
+            self.__spill(sfEvent)
+            self.__remove(sfEvent)
+
+    def __remove(self, sfEvent):
+        """Remove an event from the store if it is handled and no event in
+        the store references it, followed by its source events which are
+        then no longer referenced. Called with the lock held.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        while sfEvent is not None:
+            eventHash = sfEvent.hash
+            if self._pending.get(eventHash) or self._children.get(eventHash):
+                return
+
+            if self._events.get(eventHash) is not sfEvent:
+                return
+
+            del self._events[eventHash]
+
+            # Referenced by hash while in the store
+            if sfEvent._sourceEvent is not None or sfEvent.eventType == "ROOT":
+                return
+
+            sourceEventHash = sfEvent.sourceEventHash
+            sourceEvent = self._events.get(sourceEventHash)
+            sfEvent._sourceEvent = sourceEvent
+            if sourceEvent is None:
+                return
+
+            children = self._children.get(sourceEventHash, 0) - 1
+            if children > 0:
+                self._children[sourceEventHash] = children
+                return
+
+            self._children.pop(sourceEventHash, None)
+            sfEvent = sourceEvent
+
+    def __spill(self, sfEvent):
+        """Spill the data of an event to the spill file, if it is large
+        enough, and release it from memory. Called with the lock held.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        if not self._spillSize or sfEvent._data is None or len(sfEvent._data) < self._spillSize:
+            return
+
+        # The fingerprint of the event is derived from its data, so must
+        # be calculated while the data is still at hand.
+        sfEvent._fingerprintBits()
+
+        if self._spillFile is None:
+            self._spillFile = tempfile.TemporaryFile(prefix="spiderfoot-events-")
+
+        payload = sfEvent._data.encode('utf-8', errors='surrogatepass')
+
+        self._spillFile.seek(0, 2)
+        sfEvent._spillOffset = self._spillFile.tell()
+        sfEvent._spillLength = len(payload)
+        self._spillFile.write(payload)
+        sfEvent._data = None
+
+    def loadData(self, sfEvent):
+        """Read the data of an event back from the spill file.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            str: event data, or None if the data is not available
+        """
+        with self._lock:
+            if self._spillFile is None or sfEvent._spillOffset is None:
+                return None
+
+            self._spillFile.seek(sfEvent._spillOffset)
+            payload = self._spillFile.read(sfEvent._spillLength)
+
+        return payload.decode('utf-8', errors='surrogatepass')
+
+    def close(self):
+        """Remove the spill file. Spilled event data is no longer available afterwards."""
+        with self._lock:
+            if self._spillFile is not None:
+                self._spillFile.close()
+                self._spillFile = None
+
+# end of SpiderFootEventStore class
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from .plugin import SpiderFootPlugin
+
+
+class SpiderFootModuleManifest():
+    """Manifest of the modules in the modules directory, with the details
+    needed to list, configure and choose modules for a scan (meta data,
+    options and the event types each module watches and produces).
+
+    Collecting the details requires importing each module, which pulls in
+    all of their dependencies. The manifest is cached in a JSON file and
+    modules are only imported again when their file changes, so loading
+    an unchanged manifest doesn't import any module code.
+
+    A module file is unchanged when its modification time and size match
+    the cache, or, failing that, its SHA256 hash does (e.g. after a fresh
+    checkout). The whole manifest is rebuilt when the module base class
+    changes.
+
+    Attributes:
+        moduleDir (str): modules directory
+        cacheFile (str): manifest cache file, or None to not cache the manifest
+        imported (list): names of the modules imported by the last load()
+    """
+
+    # Module files which are not loaded
+    skipFiles = ['sfp_template.py', 'sfp_stor_print.py']
+
+    _moduleDir = None
+    _cacheFile = None
+    _imported = list()
+
+    def __init__(self, moduleDir, cacheFile=None):
+        """Initialize the manifest.
+
+        Args:
+            moduleDir (str): modules directory
+            cacheFile (str): manifest cache file, or None to not cache the manifest
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(moduleDir, str):
+            raise TypeError(f"moduleDir is {type(moduleDir)}; expected str()")
+
+        if not os.path.isdir(moduleDir):
+            raise ValueError(f"Modules directory does not exist: {moduleDir}")
+
+        if cacheFile is not None and not isinstance(cacheFile, str):
+            raise TypeError(f"cacheFile is {type(cacheFile)}; expected str()")
+
+        self._moduleDir = moduleDir
+        self._cacheFile = cacheFile
+        self._imported = list()
+
+    @property
+    def moduleDir(self):
+        return self._moduleDir
+
+    @property
+    def cacheFile(self):
+        return self._cacheFile
+
+    @property
+    def imported(self):
+        return self._imported
+
+    @staticmethod
+    def fileHash(path):
+        """SHA256 hash of a file.
+
+        Args:
+            path (str): file path
+
+        Returns:
+            str: SHA256 hash
+        """
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _fileState(self, path, cached=None):
+        """Modification time, size and hash of a file, reusing the hash from
+        the cached state of the file if its modification time and size
+        haven't changed.
+
+        Args:
+            path (str): file path
+            cached (dict): cached state of the file
+
+        Returns:
+            dict: file state
+        """
+        st = os.stat(path)
+        state = {'mtime': st.st_mtime_ns, 'size': st.st_size}
+
+        if cached and cached.get('mtime') == state['mtime'] and cached.get('size') == state['size']:
+            state['hash'] = cached.get('hash')
+        else:
+            state['hash'] = self.fileHash(path)
+
+        return state
+
+    def _readCache(self):
+        """Read the manifest cache file.
+
+        Returns:
+            dict: cached manifest, or an empty manifest if there is no usable cache
+        """
+        if not self._cacheFile or not os.path.isfile(self._cacheFile):
+            return dict()
+
+        try:
+            with open(self._cacheFile, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        if not isinstance(cache, dict) or not isinstance(cache.get('modules'), dict):
+            return dict()
+
+        return cache
+
+    def _writeCache(self, cache):
+        """Write the manifest cache file. The file is replaced in a single
+        step, so processes starting at the same time never read a partly
+        written manifest. Failing to write the cache is not an error.
+
+        Args:
+            cache (dict): manifest
+        """
+        if not self._cacheFile:
+            return
+
+        try:
+            fd, tmpFile = tempfile.mkstemp(prefix='.manifest-', dir=os.path.dirname(os.path.abspath(self._cacheFile)))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmpFile, self._cacheFile)
+        except OSError:
+            return
+
+    def moduleFiles(self):
+        """Names of the modules in the modules directory.
+
+        Returns:
+            list: module names
+        """
+        modules = list()
+
+        for filename in sorted(os.listdir(self._moduleDir)):
+            if not filename.startswith("sfp_") or not filename.endswith(".py"):
+                continue
+
+            if filename in self.skipFiles:
+                continue
+
+            modules.append(filename.split('.')[0])
+
+        return modules
+
+    def importModule(self, modName):
+        """Import a module and collect its details for the manifest.
+
+        Args:
+            modName (str): module name
+
+        Returns:
+            dict: module details
+
+        Raises:
+            ImportError: module could not be loaded
+        """
+        try:
+            mod = __import__('modules.' + modName, globals(), locals(), [modName])
+            obj = getattr(mod, modName)()
+
+            info = dict()
+            info['name'] = obj.meta['name']
+            info['cats'] = obj.meta.get('categories', list())
+            info['group'] = obj.meta.get('useCases', list())
+            info['labels'] = obj.meta.get('flags', list())
+            info['descr'] = obj.meta['summary']
+            info['provides'] = obj.producedEvents()
+            info['consumes'] = obj.watchedEvents()
+            info['meta'] = obj.meta
+
+            # Scheduling options common to all modules
+            info['opts'] = dict(
+                getattr(obj, 'opts', dict()),
+                maxinflight=obj._maxInFlight,
+                priority=obj._priority
+            )
+            info['optdescs'] = dict(
+                getattr(obj, 'optdescs', dict()),
+                **SpiderFootPlugin.schedulingOptdescs
+            )
+        except BaseException as e:
+            raise ImportError(f"Failed to load {modName}: {e}")
+
+        # Round trip through JSON, so module details are the same whether
+        # or not they were read from the cache.
+        return json.loads(json.dumps(info))
+
+    def load(self):
+        """Load the manifest, importing only the modules which are new or
+        have changed since the manifest was cached.
+
+        Returns:
+            dict: details of each module, by module name
+
+        Raises:
+            ImportError: a module could not be loaded
+        """
+        cache = self._readCache()
+        cachedModules = cache.get('modules', dict())
+
+        pluginFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plugin.py')
+        plugin = self._fileState(pluginFile, cache.get('plugin'))
+        if plugin['hash'] != (cache.get('plugin') or dict()).get('hash'):
+            cachedModules = dict()
+
+        self._imported = list()
+        modules = dict()
+        manifest = dict()
+
+        for modName in self.moduleFiles():
+            cached = cachedModules.get(modName)
+            state = self._fileState(os.path.join(self._moduleDir, modName + '.py'), cached.get('file') if cached else None)
+
+            if cached and cached['file'].get('hash') == state['hash']:
+                info = cached['info']
+            else:
+                info = self.importModule(modName)
+                self._imported.append(modName)
+
+            modules[modName] = {'file': state, 'info': info}
+            manifest[modName] = info
+
+        newCache = {'plugin': plugin, 'modules': modules}
+        if newCache != cache:
+            self._writeCache(newCache)
+
+        return manifest
+
+# end of SpiderFootModuleManifest class
@@ -1,4 +1,8 @@
+import asyncio
+import contextlib
 import logging
+import queue
+import threading
 
 
 class SpiderFootPlugin():
@@ -13,11 +17,25 @@ class SpiderFootPlugin():
         __sfdb__: Direct handle to the database - not to be directly used
                   by modules except the sfp__stor_db module.
         __scanId__: ID of the scan the module is running against
+        __stopEvent__: Set by the controller if the user aborts scanning
         __datasource__: (Unused) tracking of data sources
         __outputFilter: If set, events not matching this list are dropped
         _priority (int): Priority, smaller numbers should run first
         errorState (bool): error state of the module
         socksProxy (str): SOCKS proxy
+        incomingEventQueue (queue.Queue): events waiting to be handled by this module
+        outgoingEventQueue (queue.Queue): scan-wide queue this module's events are sent to
+        _dedupEvents (bool): only send the module the first of identical events (same type and data)
+        __eventLoop__: Set by the controller to the event loop on which asynchronous modules handle events
+        _maxInFlight (int): maximum number of events the module handles concurrently
+        __workerBudget__: Set by the controller to the budget of events handled concurrently across all modules
+        schedulingOptdescs (dict): descriptions of the scheduling options common to all modules
+        __eventStore__: Set by the controller to the scan's event store
+        _deferredSetup (tuple): arguments of setup(), deferred until the module handles its first event
+        _cpuBound (bool): handle events in a separate process, as the module's work is CPU-bound
+        __processPool__: Set by the controller to the pool of processes or module workers in which the module handles events
+        __stats__: Set by the controller to the module's runtime statistics
+        __tracer__: Set by the controller to the scan's tracer, if the scan is traced
     """
 
     log = logging.getLogger(__name__)
@@ -26,6 +44,8 @@ class SpiderFootPlugin():
     _stopScanning = False
     # Modules that will be notified when this module produces events
     _listenerModules = list()
+    # Whether the listener modules are sorted by priority
+    _listenersSorted = True
     # Current event being processed
     _currentEvent = None
     # Target currently being acted against
@@ -37,6 +57,8 @@ class SpiderFootPlugin():
     __sfdb__ = None
     # ID of the scan the module is running against
     __scanId__ = None
+    # Set by the controller if the user aborts scanning
+    __stopEvent__ = None
     # (only used in SpiderFoot HX) tracking of data sources
     __dataSource__ = None
     # If set, events not matching this list are dropped
@@ -47,6 +69,62 @@ class SpiderFootPlugin():
     errorState = False
     # SOCKS proxy
     socksProxy = None
+    # Queue of events waiting to be handled by this module's worker thread
+    incomingEventQueue = None
+    # Scan-wide queue to which events produced by this module are sent
+    outgoingEventQueue = None
+    # Worker threads handling events from the incoming event queue
+    _threads = list()
+    # Only send the module the first of identical events (same type
+    # and data), using the scan-wide deduplication index
+    _dedupEvents = False
+    # Set by the controller to the event loop on which
+    # asynchronous modules handle events
+    __eventLoop__ = None
+    # Maximum number of events the module handles concurrently. Only raise
+    # this for modules which are safe to handle events concurrently.
+    _maxInFlight = 1
+    # Set by the controller to the budget of events handled
+    # concurrently across all modules
+    __workerBudget__ = None
+    # Set by the controller to the scan's event store
+    __eventStore__ = None
+    # Descriptions of the options common to all modules controlling
+    # how the scanner schedules events to them
+    schedulingOptdescs = {
+        'maxinflight': "Maximum number of events this module handles at the same time.",
+        'priority': "Priority of this module when more events are waiting than the scan's worker budget allows. Modules with smaller numbers run first."
+    }
+    # Limits the events being handled concurrently on the event loop
+    _inFlight = None
+    # Number of events being handled, and whether the module is paused
+    # from handling more, e.g. for a scan checkpoint
+    _handling = 0
+    _paused = False
+    _handlingCondition = None
+    # Dictionaries returned by tempStorage(), which are saved in scan checkpoints
+    _tempStorage = None
+    # Saved temporary storage to restore when resuming a scan
+    _tempStorageRestore = None
+    # Arguments of setup(), deferred until the module handles its first
+    # event, and the lock held while the module is being set up
+    _deferredSetup = None
+    _setupLock = None
+    # Handle events in a separate process rather than a worker thread, so
+    # the module's CPU-bound work isn't serialized with the rest of the
+    # scan. Only set this for modules which don't share state with other
+    # modules or use the database handle. The module is only sent the
+    # event and its source event: the source event's own source is a
+    # ROOT event of the target, so the chain of events it came from
+    # can't be followed any further.
+    _cpuBound = False
+    # Set by the controller to the pool of processes or module workers
+    # in which the module handles events
+    __processPool__ = None
+    # Set by the controller to the module's runtime statistics
+    __stats__ = None
+    # Set by the controller to the scan's tracer, if the scan is traced
+    __tracer__ = None
 
     def __init__(self):
         """Not really needed in most cases."""
@@ -66,6 +144,7 @@ class SpiderFootPlugin():
         Python seems to cache local variables even between threads."""
 
         self._listenerModules = list()
+        self._listenersSorted = True
         self._stopScanning = False
 
     def setup(self, sf, userOpts={}):
@@ -77,6 +156,66 @@ class SpiderFootPlugin():
         """
         pass
 
+    def deferSetup(self, sf, userOpts={}):
+        """Defer setup() until the module handles its first event, so
+        modules which are never sent an event don't do the work of
+        setting up (e.g. loading word lists or downloading data).
+
+        The module's own options are applied straight away, to a copy of
+        its opts rather than the class attribute, as watchedEvents() may
+        depend on them (e.g. sfp_dnsbrute).
+
+        Args:
+            sf (SpiderFoot): SpiderFoot object
+            userOpts (dict): module options
+        """
+        if isinstance(getattr(self, 'opts', None), dict):
+            self.opts = dict(self.opts)
+            for opt in self.opts:
+                if opt in userOpts:
+                    self.opts[opt] = userOpts[opt]
+
+        self._deferredSetup = (sf, userOpts)
+        self._setupLock = threading.Lock()
+
+    def _setupDeferred(self):
+        """Set up the module if setup() was deferred with deferSetup().
+
+        Returns:
+            bool: the module is set up, and can handle events
+        """
+        if self._setupLock is None:
+            return True
+
+        with self._setupLock:
+            # Set up by another worker thread while waiting for the lock
+            if self._setupLock is None:
+                return True
+
+            # setup() failed
+            if self._deferredSetup is None:
+                return False
+
+            sf, userOpts = self._deferredSetup
+            self._deferredSetup = None
+
+            try:
+                self.setup(sf, userOpts)
+            except Exception as e:
+                self.log.exception(f"Module ({self.__module__}) failed to set up: {e}")
+                self.errorState = True
+                return False
+            except BaseException as e:
+                # e.g. SystemExit raised by SpiderFoot.fatal()
+                self.log.critical(f"Module ({self.__module__}) requested the scan to stop: {e}")
+                self.errorState = True
+                self._stopScanning = True
+                return False
+
+            self._setupLock = None
+
+        return True
+
     def enrichTarget(self, target):
         """Find aliases for a target.
 
@@ -126,6 +265,119 @@ class SpiderFootPlugin():
 
         self.__scanId__ = scanId
 
+    def setStopEvent(self, stopEvent):
+        """Set the event shared by all modules of the scan, which is set
+        by the controller if the user aborts scanning.
+
+        Args:
+            stopEvent (threading.Event): scan stop event
+
+        Raises:
+            TypeError: stopEvent argument was invalid type
+        """
+        if not callable(getattr(stopEvent, 'is_set', None)):
+            raise TypeError(f"stopEvent is {type(stopEvent)}; expected Event")
+
+        self.__stopEvent__ = stopEvent
+
+    def setEventLoop(self, eventLoop):
+        """Set the event loop on which asynchronous modules handle events.
+
+        Args:
+            eventLoop (asyncio.AbstractEventLoop): event loop
+
+        Raises:
+            TypeError: eventLoop argument was invalid type
+        """
+        if not isinstance(eventLoop, asyncio.AbstractEventLoop):
+            raise TypeError(f"eventLoop is {type(eventLoop)}; expected AbstractEventLoop")
+
+        self.__eventLoop__ = eventLoop
+
+    def setWorkerBudget(self, workerBudget):
+        """Set the budget of events handled concurrently across all
+        modules of the scan.
+
+        Args:
+            workerBudget (SpiderFootWorkerBudget): worker budget
+
+        Raises:
+            TypeError: workerBudget argument was invalid type
+        """
+        from spiderfoot import SpiderFootWorkerBudget
+
+        if not isinstance(workerBudget, SpiderFootWorkerBudget):
+            raise TypeError(f"workerBudget is {type(workerBudget)}; expected SpiderFootWorkerBudget")
+
+        self.__workerBudget__ = workerBudget
+
+    def setEventStore(self, eventStore):
+        """Set the scan's event store, which is told when this module has
+        handled an event.
+
+        Args:
+            eventStore (SpiderFootEventStore): event store
+
+        Raises:
+            TypeError: eventStore argument was invalid type
+        """
+        from spiderfoot import SpiderFootEventStore
+
+        if not isinstance(eventStore, SpiderFootEventStore):
+            raise TypeError(f"eventStore is {type(eventStore)}; expected SpiderFootEventStore")
+
+        self.__eventStore__ = eventStore
+
+    def setProcessPool(self, processPool):
+        """Set the pool of processes or module workers in which the module
+        handles events, instead of its worker threads. The module is set up
+        where it handles events, rather than by the controller.
+
+        Args:
+            processPool (SpiderFootProcessPool or SpiderFootBrokerPool): pool the module has been added to
+
+        Raises:
+            TypeError: processPool argument was invalid type
+        """
+        from spiderfoot import SpiderFootBrokerPool, SpiderFootProcessPool
+
+        if not isinstance(processPool, (SpiderFootProcessPool, SpiderFootBrokerPool)):
+            raise TypeError(f"processPool is {type(processPool)}; expected SpiderFootProcessPool or SpiderFootBrokerPool")
+
+        self.__processPool__ = processPool
+
+    def setStats(self, stats):
+        """Set the runtime statistics the module's work is counted against.
+
+        Args:
+            stats (SpiderFootModuleStats): module statistics
+
+        Raises:
+            TypeError: stats argument was invalid type
+        """
+        from spiderfoot import SpiderFootModuleStats
+
+        if not isinstance(stats, SpiderFootModuleStats):
+            raise TypeError(f"stats is {type(stats)}; expected SpiderFootModuleStats")
+
+        self.__stats__ = stats
+
+    def setTracer(self, tracer):
+        """Set the tracer which records the module's work on the scan's timeline.
+
+        Args:
+            tracer (SpiderFootTracer): scan tracer
+
+        Raises:
+            TypeError: tracer argument was invalid type
+        """
+        from spiderfoot import SpiderFootTracer
+
+        if not isinstance(tracer, SpiderFootTracer):
+            raise TypeError(f"tracer is {type(tracer)}; expected SpiderFootTracer")
+
+        self.__tracer__ = tracer
+
     def getScanId(self):
         """Get the scan ID.
 
@@ -163,17 +415,20 @@ class SpiderFootPlugin():
         """
 
         self._listenerModules.append(listener)
+        self._listenersSorted = False
 
     def setOutputFilter(self, types):
         self.__outputFilter__ = types
 
     def tempStorage(self):
-        """For future use. Module temporary storage.
+        """Module temporary storage.
 
-        A dictionary used to persist state (in memory) for a module.
+        A dictionary used to persist state (in memory) for a module. The
+        contents are saved in scan checkpoints, and restored when the scan
+        is resumed, so should be JSON serializable.
 
         Todo:
-            Move all module state to use this, which then would enable a scan to be paused/resumed.
+            Move all module state to use this, so that all of it is restored when a scan is resumed.
 
         Note:
             Required for SpiderFoot HX compatibility of modules.
@@ -181,11 +436,55 @@ class SpiderFootPlugin():
         Returns:
             dict: module temporary state data
         """
-        return dict()
+        storage = dict()
+
+        # Dictionaries are restored in the order the module created them
+        if self._tempStorageRestore:
+            storage.update(self._tempStorageRestore.pop(0))
+
+        if self._tempStorage is None:
+            self._tempStorage = list()
+        self._tempStorage.append(storage)
+
+        return storage
+
+    def getTempStorage(self):
+        """Get the module temporary storage, to save in a scan checkpoint.
+
+        Returns:
+            list: dictionaries returned by tempStorage(), in the order they were created
+        """
+        if self.__processPool__ is not None:
+            return self.__processPool__.getTempStorage(self.__name__)
+
+        # Not set up yet, so the storage to restore is still to be used
+        if self._deferredSetup is not None:
+            return list(self._tempStorageRestore or [])
+
+        return list(self._tempStorage or [])
+
+    def restoreTempStorage(self, storage):
+        """Set the module temporary storage to restore when resuming a scan,
+        before the module is set up.
+
+        Args:
+            storage (list): dictionaries saved with getTempStorage()
+
+        Raises:
+            TypeError: storage argument was invalid type
+        """
+        if not isinstance(storage, list):
+            raise TypeError(f"storage is {type(storage)}; expected list")
+
+        self._tempStorageRestore = list(storage)
 
     def notifyListeners(self, sfEvent):
         """Call the handleEvent() method of every other plug-in listening for
-        events from this plug-in. Remember that those plug-ins will be called
+        events from this plug-in.
+
+        If an outgoing event queue has been set by the scanner, the event is
+        only queued, and will be dispatched to the incoming event queue of
+        each listening module. Otherwise, the listening plug-ins will be called
         within the same execution context of this thread, not on their own.
 
         Args:
@@ -231,18 +530,26 @@ class SpiderFootPlugin():
         # from dest, as we are already operating on dest's original
         # notification from one of the upstream events.
 
-        prevEvent = sfEvent.sourceEvent
-        while prevEvent is not None:
-            if prevEvent.sourceEvent is not None:
-                if prevEvent.sourceEvent.eventType == sfEvent.eventType and prevEvent.sourceEvent.data.lower() == eventData.lower():
-                    storeOnly = True
-                    break
-            prevEvent = prevEvent.sourceEvent
+        if sfEvent.repeatsAncestor():
+            storeOnly = True
+
+        if self.__stats__ is not None:
+            self.__stats__.eventEmitted(eventName)
 
-        self._listenerModules.sort(key=lambda m: m._priority)
+        # When run by the scanner, events are queued for dispatch to the
+        # listening modules' worker threads rather than handled here.
+        if self.outgoingEventQueue is not None:
+            self.outgoingEventQueue.put((sfEvent, storeOnly))
+            return
+
+        # Listeners are only sorted by priority when new ones have been registered
+        if not self._listenersSorted:
+            self._listenerModules.sort(key=lambda m: m._priority)
+            self._listenersSorted = True
 
         for listener in self._listenerModules:
-            if eventName not in listener.watchedEvents() and '*' not in listener.watchedEvents():
+            watchedEvents = listener.watchedEvents()
+            if eventName not in watchedEvents and '*' not in watchedEvents:
                 continue
 
             if storeOnly and "__stor" not in listener.__module__:
@@ -263,9 +570,18 @@ class SpiderFootPlugin():
     def checkForStop(self):
         """For modules to use to check for when they should give back control.
 
+        When run by the scanner, this checks the scan's stop event and does
+        not query the database.
+
         Returns:
             bool
         """
+        if self._stopScanning:
+            return True
+
+        if self.__stopEvent__ is not None:
+            return self.__stopEvent__.is_set()
+
         if not self.__scanId__:
             return False
 
@@ -307,18 +623,328 @@ class SpiderFootPlugin():
         """Handle events to this module.
         Will usually be overriden by the implementer, unless it doesn't handle any events.
 
+        Asynchronous modules implement handleEventAsync() instead, which
+        is waited for here when the event is not handled on the event loop.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Raises:
+            RuntimeError: called from a coroutine, which must await handleEventAsync() instead
+        """
+
+        if not self.isAsync:
+            return
+
+        # Waiting here would block the event loop the coroutine runs on
+        if asyncio._get_running_loop() is not None:
+            raise RuntimeError(f"handleEvent() of asynchronous module {self.__name__} called from a coroutine; await handleEventAsync() instead")
+
+        if self.__eventLoop__ is None:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.handleEventAsync(sfEvent))
+            finally:
+                loop.close()
+            return
+
+        asyncio.run_coroutine_threadsafe(self.handleEventAsync(sfEvent), self.__eventLoop__).result()
+
+    async def handleEventAsync(self, sfEvent):
+        """Handle events to this module asynchronously.
+        Overriden by modules which wait on I/O using the asynchronous
+        SpiderFoot helpers (e.g. fetchUrlInExecutor()) rather than blocking,
+        so that the module can handle many events concurrently.
+
         Args:
             sfEvent (SpiderFootEvent): event
         """
 
-        return
+        return self.handleEvent(sfEvent)
+
+    @property
+    def isAsync(self):
+        """Whether this module handles events asynchronously.
+
+        Returns:
+            bool: module implements handleEventAsync()
+        """
+        return type(self).handleEventAsync is not SpiderFootPlugin.handleEventAsync
 
     def start(self):
-        """Kick off the work (for some modules nothing will happen here, but instead
-        the work will start from the handleEvent() method.
-        Will usually be overriden by the implementer.
+        """Kick off the work. For most modules the work will start from the
+        handleEvent() method, called by worker threads which handle the
+        events arriving on the module's incoming event queue, up to
+        _maxInFlight events at a time.
+
+        Asynchronous modules instead have their handleEventAsync() method
+        scheduled on the scan's event loop, for up to _maxInFlight events
+        at a time.
+
+        Nothing will happen here if the module has no incoming event queue.
         """
 
-        return
+        if self.incomingEventQueue is None:
+            return
+
+        maxInFlight = max(1, self._maxInFlight)
+        self._handlingCondition = threading.Condition()
+        self._handling = 0
+        self._paused = False
+
+        if self.isAsync and self.__eventLoop__ is not None:
+            self._inFlight = threading.BoundedSemaphore(maxInFlight)
+            workers = [self.asyncThreadWorker]
+        else:
+            workers = [self.threadWorker] * maxInFlight
+
+        self._threads = list()
+        for i, worker in enumerate(workers):
+            name = f"{self.__name__}_worker" if len(workers) == 1 else f"{self.__name__}_worker_{i}"
+            thread = threading.Thread(target=worker, name=name)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _enterHandling(self):
+        """Wait until the module is not paused for a checkpoint, and count
+        the module as handling an event until _exitHandling() is called.
+
+        Returns:
+            bool: False if the scan was stopped while waiting
+        """
+        with self._handlingCondition:
+            while self._paused:
+                if self.checkForStop():
+                    return False
+                self._handlingCondition.wait(0.1)
+
+            self._handling += 1
+            return True
+
+    def _exitHandling(self):
+        """Stop counting the module as handling an event."""
+        with self._handlingCondition:
+            self._handling -= 1
+            self._handlingCondition.notify_all()
+
+    def pause(self, timeout=None):
+        """Stop the module from taking more events from its incoming event
+        queue, and wait for the events it is handling to finish, e.g. for a
+        scan checkpoint.
+
+        Args:
+            timeout (float): seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: the module is no longer handling any events
+        """
+        if self._handlingCondition is None:
+            return True
+
+        with self._handlingCondition:
+            self._paused = True
+            return self._handlingCondition.wait_for(lambda: self._handling == 0, timeout)
+
+    def unpause(self):
+        """Let the module handle events again after pause()."""
+        if self._handlingCondition is None:
+            return
+
+        with self._handlingCondition:
+            self._paused = False
+            self._handlingCondition.notify_all()
+
+    def _acquireWorkerBudget(self):
+        """Wait for a slot in the scan's worker budget, if there is one.
+
+        Returns:
+            bool: a slot was acquired, False if the scan was stopped while waiting
+        """
+        if self.__workerBudget__ is None:
+            return True
+
+        if self.__workerBudget__.acquire(self._priority, timeout=0):
+            return True
+
+        # Only traced when the module has to wait
+        span = self.__tracer__.span("wait for worker budget", "scheduling") if self.__tracer__ is not None else contextlib.ExitStack()
+        with span:
+            # Keeps its place in the queue until the scan is stopped
+            return self.__workerBudget__.acquire(self._priority, cancelled=self.checkForStop)
+
+    def _releaseWorkerBudget(self):
+        """Release a slot in the scan's worker budget, if there is one."""
+        if self.__workerBudget__ is not None:
+            self.__workerBudget__.release()
+
+    def threadWorker(self):
+        """Handle events from the incoming event queue until the scan is stopped."""
+
+        while not self.checkForStop():
+            if not self._enterHandling():
+                return
+
+            try:
+                sfEvent = self.incomingEventQueue.get(timeout=0.1)
+            except queue.Empty:
+                self._exitHandling()
+                continue
+
+            if not self._acquireWorkerBudget():
+                self._eventDone(sfEvent)
+                self._exitHandling()
+                return
+
+            try:
+                self._currentEvent = sfEvent
+                with self._handlingContext(sfEvent):
+                    if self.__processPool__ is not None:
+                        self._handleEventInProcess(sfEvent)
+                    elif self._setupDeferred():
+                        self.handleEvent(sfEvent)
+            except Exception as e:
+                self.log.exception(f"Module ({self.__module__}) encountered an error: {e}")
+            except BaseException as e:
+                # e.g. SystemExit raised by SpiderFoot.fatal()
+                self.log.critical(f"Module ({self.__module__}) requested the scan to stop: {e}")
+                self.errorState = True
+                self._stopScanning = True
+            finally:
+                self._releaseWorkerBudget()
+                self._eventDone(sfEvent)
+                self._exitHandling()
+
+    def asyncThreadWorker(self):
+        """Schedule events from the incoming event queue on the event loop,
+        until the scan is stopped."""
+
+        while not self.checkForStop():
+            if not self._inFlight.acquire(timeout=0.1):
+                continue
+
+            if not self._enterHandling():
+                self._inFlight.release()
+                return
+
+            try:
+                sfEvent = self.incomingEventQueue.get(timeout=0.1)
+            except queue.Empty:
+                self._exitHandling()
+                self._inFlight.release()
+                continue
+
+            if not self._acquireWorkerBudget():
+                self._eventDone(sfEvent)
+                self._exitHandling()
+                self._inFlight.release()
+                return
+
+            if not self._setupDeferred():
+                self._releaseWorkerBudget()
+                self._eventDone(sfEvent)
+                self._exitHandling()
+                self._inFlight.release()
+                continue
+
+            self._currentEvent = sfEvent
+
+            try:
+                asyncio.run_coroutine_threadsafe(self._handleEventTask(sfEvent), self.__eventLoop__)
+            except RuntimeError as e:
+                # The event loop has been closed
+                self.log.error(f"Module ({self.__module__}) unable to handle event: {e}")
+                self._releaseWorkerBudget()
+                self._eventDone(sfEvent)
+                self._exitHandling()
+                self._inFlight.release()
+                return
+
+    def _handleEventInProcess(self, sfEvent):
+        """Handle an event in the module's process or a module worker, and
+        notify listeners of the events the module produced.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        events, errorState = self.__processPool__.handleEvent(self.__name__, sfEvent)
+        self.errorState = errorState
+
+        for evt in events:
+            self.notifyListeners(evt)
+
+    async def _handleEventTask(self, sfEvent):
+        """Handle an event on the event loop.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+
+        try:
+            if not self.checkForStop():
+                # Other events are handled on the event loop's thread meanwhile
+                with self._handlingContext(sfEvent, concurrent=True):
+                    await self.handleEventAsync(sfEvent)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log.exception(f"Module ({self.__module__}) encountered an error: {e}")
+        except BaseException as e:
+            # e.g. SystemExit raised by SpiderFoot.fatal()
+            self.log.critical(f"Module ({self.__module__}) requested the scan to stop: {e}")
+            self.errorState = True
+            self._stopScanning = True
+        finally:
+            self._releaseWorkerBudget()
+            self._eventDone(sfEvent)
+            self._exitHandling()
+            self._inFlight.release()
+
+    @contextlib.contextmanager
+    def _handlingContext(self, sfEvent, concurrent=False):
+        """Count handling an event against the module's runtime statistics,
+        and record it on the scan's timeline, where the scan has them.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+            concurrent (bool): other events are handled on the current thread meanwhile,
+                               so its CPU time isn't the module's and its timeline can't be used
+        """
+        with contextlib.ExitStack() as stack:
+            if self.__stats__ is not None:
+                stack.enter_context(self.__stats__.handling(sfEvent, measureCpu=not concurrent))
+
+            if self.__tracer__ is not None:
+                args = {'eventType': sfEvent.eventType, 'module': sfEvent.module}
+                if concurrent:
+                    stack.enter_context(self.__tracer__.asyncSpan(self.__name__, "handleEvent", args))
+                else:
+                    stack.enter_context(self.__tracer__.span(self.__name__, "handleEvent", args))
+
+            yield
+
+    def _eventDone(self, sfEvent):
+        """Mark an event from the incoming event queue as done.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        if self.__eventStore__ is not None:
+            self.__eventStore__.handled(sfEvent)
+
+        self.incomingEventQueue.task_done()
+
+    @property
+    def running(self):
+        """Whether this module has events waiting in, or being handled from,
+        its incoming event queue.
+
+        Returns:
+            bool: module has unfinished events
+        """
+        if self.incomingEventQueue is None:
+            return False
+
+        return self.incomingEventQueue.unfinished_tasks > 0
 
 # end of SpiderFootPlugin class
@@ -0,0 +1,469 @@
+import logging
+import multiprocessing as mp
+import sys
+import threading
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from types import MappingProxyType
+
+from .event import SpiderFootEvent
+from .stats import SpiderFootModuleStats
+from .target import SpiderFootTarget
+
+# Modules set up in this process, by module name. Only used in the
+# processes of a SpiderFootProcessPool.
+_processModules = dict()
+
+
+class SpiderFootProcessPool():
+    """Pool of processes in which CPU-bound modules handle events, so the
+    work they do isn't serialized with the rest of the scan by the GIL.
+
+    Each module is assigned to one process of the pool, which sets the
+    module up and keeps it for the rest of the scan, so the module keeps
+    its state between events just as it does in a worker thread. The
+    events sent to a module are shipped to its process and the events it
+    produces are sent back, to be linked to the event they came from.
+
+    A process handles events one at a time, and is only started when one
+    of its modules is sent its first event. The modules are told when the
+    scan is stopping through an event shared by a manager process.
+
+    Attributes:
+        size (int): maximum number of processes
+        modules (list): names of the modules in the pool
+    """
+
+    log = logging.getLogger(__name__)
+
+    __size = 0
+    __config = None
+    __scanId = None
+    __target = None
+    __socksProxy = None
+    __context = None
+    __executors = list()
+    __moduleExecutors = dict()
+    __pendingSetup = dict()
+    __futures = set()
+    __manager = None
+    __stopEvent = None
+    __lock = None
+
+    def __init__(self, config, scanId, target, size, socksProxy=None):
+        """Initialize the pool.
+
+        Args:
+            config (dict): scan config
+            scanId (str): scan instance ID
+            target (SpiderFootTarget): scan target
+            size (int): maximum number of processes
+            socksProxy (str): SOCKS proxy modules make requests through
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(config, dict):
+            raise TypeError(f"config is {type(config)}; expected dict()")
+
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        if not isinstance(target, SpiderFootTarget):
+            raise TypeError(f"target is {type(target)}; expected SpiderFootTarget()")
+
+        if not isinstance(size, int):
+            raise TypeError(f"size is {type(size)}; expected int()")
+        if size < 1:
+            raise ValueError(f"size value is {size}; expected 1 or more")
+
+        self.__config = config
+        self.__scanId = scanId
+        self.__target = target
+        self.__size = size
+        self.__socksProxy = socksProxy
+        self.__executors = list()
+        self.__moduleExecutors = dict()
+        self.__pendingSetup = dict()
+        self.__futures = set()
+        self.__lock = threading.Lock()
+
+        if 'forkserver' in mp.get_all_start_methods():
+            self.__context = mp.get_context('forkserver')
+        else:
+            self.__context = mp.get_context('spawn')
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def modules(self):
+        return list(self.__moduleExecutors.keys())
+
+    @staticmethod
+    def available():
+        """Whether this process can start a pool. Daemonic processes are
+        not allowed to start processes of their own.
+
+        Returns:
+            bool: processes can be started
+        """
+        return not mp.current_process().daemon
+
+    def addModule(self, modName, modOpts, tempStorage=None):
+        """Assign a module to a process of the pool. The module is set up
+        in its process when it is sent its first event.
+
+        Args:
+            modName (str): module name
+            modOpts (dict): module options, under the scan config
+            tempStorage (list): module temporary storage to restore when resuming a scan
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(modName, str):
+            raise TypeError(f"modName is {type(modName)}; expected str()")
+
+        if modName in self.__moduleExecutors:
+            raise ValueError(f"Module {modName} is already in the pool")
+
+        if not isinstance(modOpts, dict):
+            raise TypeError(f"modOpts is {type(modOpts)}; expected dict()")
+
+        if tempStorage is not None and not isinstance(tempStorage, list):
+            raise TypeError(f"tempStorage is {type(tempStorage)}; expected list()")
+
+        # Modules are assigned to processes in turn
+        index = len(self.__moduleExecutors) % self.__size
+        if self.__manager is None:
+            self.__manager = self.__context.Manager()
+            self.__stopEvent = self.__manager.Event()
+        if index == len(self.__executors):
+            # Python 3.6 can only start processes by the default method
+            if sys.version_info >= (3, 7):
+                executor = ProcessPoolExecutor(max_workers=1, mp_context=self.__context)
+            else:
+                executor = ProcessPoolExecutor(max_workers=1)
+            self.__executors.append(executor)
+
+        self.__moduleExecutors[modName] = self.__executors[index]
+        self.__pendingSetup[modName] = (
+            self.__config,
+            dict(modOpts),
+            self.__scanId,
+            self.__target,
+            self.__socksProxy,
+            list(tempStorage or []),
+            self.__stopEvent
+        )
+
+    def handleEvent(self, modName, sfEvent):
+        """Have a module handle an event in its process.
+
+        Args:
+            modName (str): module name
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            tuple: events produced by the module, linked to their source events, and the module's error state
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        executor = self.__moduleExecutors.get(modName)
+        if executor is None:
+            raise ValueError(f"Module {modName} is not in the pool")
+
+        sourceEvent = sfEvent.sourceEvent
+        eventArgs = (
+            _eventTuple(sfEvent),
+            _eventTuple(sourceEvent) if sourceEvent is not None else None
+        )
+
+        # Submitted with the lock held, so the module is set up before
+        # it handles any other event.
+        with self.__lock:
+            setupArgs = self.__pendingSetup.pop(modName, None)
+            future = executor.submit(_handleEvent, modName, setupArgs, eventArgs)
+            self.__futures.add(future)
+
+        future.add_done_callback(self.__futures.discard)
+        produced, errorState, error, usage = future.result()
+
+        if error:
+            self.log.error(f"Module ({modName}) encountered an error: {error}")
+
+        # Count the work done in the module's process against the
+        # statistics of the module in the scan.
+        stats = SpiderFootModuleStats.current()
+        if stats is not None:
+            stats.addUsage(usage)
+
+        return _eventsProduced(produced, sfEvent), errorState
+
+    def getTempStorage(self, modName):
+        """Get the temporary storage of a module, from its process.
+
+        Args:
+            modName (str): module name
+
+        Returns:
+            list: dictionaries returned by the module's tempStorage(), in the order they were created
+
+        Raises:
+            ValueError: arg value was invalid
+        """
+
+        executor = self.__moduleExecutors.get(modName)
+        if executor is None:
+            raise ValueError(f"Module {modName} is not in the pool")
+
+        with self.__lock:
+            # Not set up yet, so the storage to restore is still to be used
+            setupArgs = self.__pendingSetup.get(modName)
+            if setupArgs is not None:
+                return list(setupArgs[5])
+
+            future = executor.submit(_getTempStorage, modName)
+
+        return future.result()
+
+    def stop(self):
+        """Tell the modules in the pool's processes that the scan is
+        stopping, so they give back control from the events they are
+        handling."""
+        if self.__stopEvent is not None:
+            self.__stopEvent.set()
+
+    def shutdown(self):
+        """Stop the processes, once they have handled the events they are
+        handling. Events still waiting for their process are cancelled."""
+        with self.__lock:
+            futures = list(self.__futures)
+
+        for future in futures:
+            future.cancel()
+
+        self.stop()
+
+        for executor in self.__executors:
+            executor.shutdown(wait=True)
+
+        if self.__manager is not None:
+            self.__manager.shutdown()
+
+# end of SpiderFootProcessPool class
+
+
+def _eventTuple(sfEvent):
+    """Event details shipped between processes.
+
+    Args:
+        sfEvent (SpiderFootEvent): event
+
+    Returns:
+        tuple: event details
+    """
+    return (
+        sfEvent.eventType,
+        sfEvent.data,
+        sfEvent.module,
+        sfEvent.confidence,
+        sfEvent.visibility,
+        sfEvent.risk,
+        sfEvent.actualSource,
+        sfEvent.moduleDataSource
+    )
+
+
+def _eventFromTuple(eventTuple, sourceEvent):
+    """Recreate an event shipped between processes.
+
+    Args:
+        eventTuple (tuple): event details
+        sourceEvent (SpiderFootEvent): source event
+
+    Returns:
+        SpiderFootEvent: event
+    """
+    eventType, data, module, confidence, visibility, risk, actualSource, moduleDataSource = eventTuple
+
+    sfEvent = SpiderFootEvent(eventType, data, module, sourceEvent, confidence, visibility, risk)
+    sfEvent.actualSource = actualSource
+    sfEvent.moduleDataSource = moduleDataSource
+
+    return sfEvent
+
+
+def _createModule(modName, config, modOpts, scanId, target, socksProxy, dbh=None, stopEvent=None, tempStorage=None):
+    """Create and set up a module outside of the scan process.
+
+    Args:
+        modName (str): module name
+        config (dict): scan config
+        modOpts (dict): module options, under the scan config
+        scanId (str): scan instance ID
+        target (SpiderFootTarget): scan target
+        socksProxy (str): SOCKS proxy modules make requests through
+        dbh (SpiderFootDb): database handle the module logs to
+        stopEvent (threading.Event): set when the scan is stopped, or a manager's Event() in a pool process
+        tempStorage (list): module temporary storage to restore
+
+    Returns:
+        SpiderFootPlugin: module
+    """
+    from sflib import SpiderFoot
+
+    sf = SpiderFoot(config)
+    sf.dbh = dbh
+    sf.scanId = scanId
+    sf.socksProxy = socksProxy
+
+    module = __import__('modules.' + modName, globals(), locals(), [modName])
+    mod = getattr(module, modName)()
+    mod.__name__ = modName
+    mod.clearListeners()
+
+    # Modules update their options, a class attribute, in setup(). Module
+    # workers set up modules for several scans, so each gets its own copy.
+    if isinstance(getattr(mod, 'opts', None), dict):
+        mod.opts = deepcopy(mod.opts)
+
+    if tempStorage:
+        mod.restoreTempStorage(tempStorage)
+
+    mod.setup(sf, MappingProxyType(ChainMap(MappingProxyType(config), modOpts)))
+    if dbh is not None:
+        mod.setDbh(dbh)
+    mod.setScanId(scanId)
+    mod.setTarget(target)
+    if stopEvent is not None:
+        mod.setStopEvent(stopEvent)
+
+    return mod
+
+
+def _runModule(mod, eventArgs):
+    """Have a module created with _createModule() handle an event, and
+    collect the events it produces rather than sending them to the
+    listening modules.
+
+    Args:
+        mod (SpiderFootPlugin): module
+        eventArgs (tuple): details of the event and its source event
+
+    Returns:
+        tuple: events produced by the module, each with the index of its source event among them (-1 for the event handled),
+               the module's error state, the error handling the event and the resources used handling it
+    """
+    eventTuple, sourceTuple = eventArgs
+    sourceEvent = None
+    if sourceTuple is not None:
+        # The source of the source event is only known by its hash to the
+        # scan, so is given as the root event.
+        rootEvent = None
+        if sourceTuple[0] != "ROOT":
+            rootEvent = SpiderFootEvent("ROOT", mod.getTarget().targetValue, "", None)
+        sourceEvent = _eventFromTuple(sourceTuple, rootEvent)
+    sfEvent = _eventFromTuple(eventTuple, sourceEvent)
+
+    produced = list()
+    mod.notifyListeners = produced.append
+
+    stats = SpiderFootModuleStats()
+    error = None
+    try:
+        mod._currentEvent = sfEvent
+        with stats.handling(sfEvent):
+            mod.handleEvent(sfEvent)
+    except Exception as e:
+        error = str(e)
+    except BaseException as e:
+        # e.g. SystemExit raised by SpiderFoot.fatal()
+        error = f"requested the scan to stop: {e}"
+        mod.errorState = True
+
+    # Events produced from other events the module produced are linked
+    # to them by their index.
+    events = list()
+    eventIndex = dict()
+    for evt in produced:
+        events.append((_eventTuple(evt), eventIndex.get(id(evt.sourceEvent), -1)))
+        eventIndex[id(evt)] = len(events) - 1
+
+    return events, mod.errorState, error, stats.usage()
+
+
+def _eventsProduced(produced, sfEvent):
+    """Recreate the events a module produced outside of the scan process,
+    linked to their source events.
+
+    Args:
+        produced (list): events returned by _runModule()
+        sfEvent (SpiderFootEvent): event the module handled
+
+    Returns:
+        list: events
+    """
+    events = list()
+    for eventTuple, sourceIndex in produced:
+        source = events[sourceIndex] if 0 <= sourceIndex < len(events) else sfEvent
+        events.append(_eventFromTuple(eventTuple, source))
+
+    return events
+
+
+def _handleEvent(modName, setupArgs, eventArgs):
+    """Have a module handle an event in this process.
+
+    Args:
+        modName (str): module name
+        setupArgs (tuple): arguments from SpiderFootProcessPool.addModule() to set up the module with, if not set up yet
+        eventArgs (tuple): details of the event and its source event
+
+    Returns:
+        tuple: events produced by the module, the module's error state, the error handling the event and the resources used handling it
+    """
+    from .db import SpiderFootDb
+
+    if setupArgs is not None:
+        config, modOpts, scanId, target, socksProxy, tempStorage, stopEvent = setupArgs
+        try:
+            _processModules[modName] = _createModule(modName, config, modOpts, scanId, target, socksProxy,
+                                                     dbh=SpiderFootDb(config), stopEvent=stopEvent, tempStorage=tempStorage)
+        except BaseException as e:
+            return list(), True, f"failed to set up: {e}", None
+
+    mod = _processModules.get(modName)
+    if mod is None:
+        return list(), True, None, None
+
+    return _runModule(mod, eventArgs)
+
+
+def _getTempStorage(modName):
+    """Get the temporary storage of a module set up in this process.
+
+    Args:
+        modName (str): module name
+
+    Returns:
+        list: dictionaries returned by the module's tempStorage()
+    """
+    mod = _processModules.get(modName)
+    if mod is None:
+        return list()
+
+    return mod.getTempStorage()
@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from collections import deque
+
+
+class SpiderFootScanLogWriter():
+    """Writes the log messages of a scan to the database in batches, on a
+    thread of its own, so that logging never blocks the threads logging.
+
+    When too many debug and info messages are waiting to be written, new
+    ones are dropped, or sampled, according to the overflow policy. Other
+    messages (status, errors) are always written. The number of messages
+    dropped is logged with the next batch.
+
+    Attributes:
+        backlog (int): maximum number of debug and info messages waiting to be written (0 = unlimited)
+        overflow (str): what to do with debug and info messages under load: 'drop' or 'sample'
+        dropped (int): number of messages dropped since the writer was started
+    """
+
+    log = logging.getLogger(__name__)
+
+    # Log message types which may be dropped or sampled under load
+    sheddableTypes = ('DEBUG', 'INFO')
+    # Overflow policies
+    overflowPolicies = ('drop', 'sample')
+    # Maximum number of messages written in one transaction
+    batchSize = 500
+    # Maximum number of seconds a message waits to be written
+    flushInterval = 1
+    # With the 'sample' policy, one in this many debug and info messages is
+    # kept once the backlog is half full, until it is full
+    sampleRate = 10
+
+    _dbh = None
+    _backlog = 0
+    _overflow = None
+    _queue = None
+    _sheddable = 0
+    _sampled = 0
+    _dropped = 0
+    _unreported = 0
+    _lastInstanceId = None
+    _condition = None
+    _thread = None
+    _closed = False
+
+    def __init__(self, dbh, backlog=10000, overflow='sample'):
+        """Start the writer.
+
+        Args:
+            dbh (SpiderFootDb): database handle to write the messages with
+            backlog (int): maximum number of debug and info messages waiting to be written (0 = unlimited)
+            overflow (str): what to do with debug and info messages under load: 'drop' or 'sample'
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+
+        if not isinstance(backlog, int):
+            raise TypeError(f"backlog is {type(backlog)}; expected int()")
+
+        if backlog < 0:
+            raise ValueError(f"backlog value is {backlog}; expected 0 or more")
+
+        if not isinstance(overflow, str):
+            raise TypeError(f"overflow is {type(overflow)}; expected str()")
+
+        if overflow not in self.overflowPolicies:
+            raise ValueError(f"overflow value is {overflow}; expected one of {', '.join(self.overflowPolicies)}")
+
+        self._dbh = dbh
+        self._backlog = backlog
+        self._overflow = overflow
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="SpiderFootScanLogWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def backlog(self):
+        return self._backlog
+
+    @property
+    def overflow(self):
+        return self._overflow
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def _shed(self):
+        """Decide whether to drop a debug or info message, according to
+        the backlog and overflow policy. Must be called with the condition
+        held.
+
+        Returns:
+            bool: drop the message
+        """
+        if not self._backlog:
+            return False
+
+        if self._sheddable >= self._backlog:
+            return True
+
+        if self._overflow == 'sample' and self._sheddable >= self._backlog // 2:
+            self._sampled += 1
+            return self._sampled % self.sampleRate != 0
+
+        return False
+
+    def logEvent(self, instanceId, classification, message, component=None):
+        """Queue a log message to be written to the database. Messages
+        logged after the writer was closed are written straight away.
+
+        Args:
+            instanceId (str): scan instance ID
+            classification (str): message type, e.g. INFO
+            message (str): message
+            component (str): component the message originated from
+
+        Returns:
+            bool: the message was queued, False if it was dropped
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(classification, str):
+            raise TypeError(f"classification is {type(classification)}; expected str()")
+
+        if not isinstance(message, str):
+            raise TypeError(f"message is {type(message)}; expected str()")
+
+        generated = time.time() * 1000
+        sheddable = classification in self.sheddableTypes
+
+        with self._condition:
+            if not self._closed:
+                self._lastInstanceId = instanceId
+
+                if sheddable:
+                    if self._shed():
+                        self._dropped += 1
+                        self._unreported += 1
+                        return False
+                    self._sheddable += 1
+
+                self._queue.append((instanceId, generated, component or "SpiderFoot", classification, message))
+                if len(self._queue) >= self.batchSize:
+                    self._condition.notify()
+                return True
+
+        self._dbh.scanLogEvent(instanceId, classification, message, component)
+        return True
+
+    def _run(self):
+        """Write queued messages in batches until the writer is closed."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or len(self._queue) >= self.batchSize, self.flushInterval)
+
+                batch = list()
+                while self._queue and len(batch) < self.batchSize:
+                    logEvent = self._queue.popleft()
+                    if logEvent[3] in self.sheddableTypes:
+                        self._sheddable -= 1
+                    batch.append(logEvent)
+
+                if self._unreported:
+                    batch.append((self._lastInstanceId, time.time() * 1000, "SpiderFoot", "STATUS",
+                                  f"{self._unreported} debug and info messages were not logged, as too many were waiting to be written."))
+                    self._unreported = 0
+
+                finished = self._closed and not self._queue
+
+            if batch:
+                try:
+                    self._dbh.scanLogEvents(batch)
+                except Exception as e:
+                    self.log.error(f"Unable to write {len(batch)} scan log messages: {e}")
+
+            if finished:
+                return
+
+    def close(self):
+        """Write the queued messages and stop the writer."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+# end of SpiderFootScanLogWriter class
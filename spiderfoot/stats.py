@@ -0,0 +1,187 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Statistics of the module handling an event in the current thread or
+# asyncio task, for SpiderFoot helpers (HTTP, DNS) to count against.
+# Python 3.6 uses the contextvars backport, with which asyncio tasks share
+# the context of their thread.
+_currentStats = contextvars.ContextVar('spiderfoot_module_stats', default=None)
+
+# CPU time of the current thread. Python 3.6 has no time.thread_time(),
+# but has the clock it uses on most platforms. Elsewhere, the CPU time
+# of modules is not measured.
+if hasattr(time, 'thread_time'):
+    _threadTime = time.thread_time
+elif hasattr(time, 'CLOCK_THREAD_CPUTIME_ID'):
+    def _threadTime():
+        return time.clock_gettime(time.CLOCK_THREAD_CPUTIME_ID)
+else:
+    _threadTime = None
+
+
+class SpiderFootModuleStats():
+    """Runtime statistics of a module in a scan: the time it spent
+    handling events, the events it received and emitted, and the HTTP
+    requests and DNS queries it made through SpiderFoot.
+
+    Attributes:
+        handled (int): number of events handled
+        wallTime (float): seconds spent handling events
+        cpuTime (float): CPU seconds spent handling events
+        queueWait (float): seconds events waited between being dispatched and being handled
+        received (dict): number of events received, by event type
+        emitted (dict): number of events emitted, by event type
+        httpRequests (int): number of HTTP requests made
+        httpBytes (int): bytes of HTTP content received
+        dnsQueries (int): number of DNS queries made
+    """
+
+    # Resource counters which are added up from modules handling events
+    # in other processes, see usage() and addUsage()
+    usageCounters = ['cpuTime', 'httpRequests', 'httpBytes', 'dnsQueries']
+
+    _lock = None
+
+    def __init__(self, stats=None):
+        """Initialize the statistics.
+
+        Args:
+            stats (dict): statistics to carry on from, as returned by asDict(), e.g. when resuming a scan
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if stats is not None and not isinstance(stats, dict):
+            raise TypeError(f"stats is {type(stats)}; expected dict()")
+
+        stats = stats or dict()
+
+        self._lock = threading.Lock()
+        self.handled = int(stats.get('handled', 0))
+        self.wallTime = float(stats.get('wallTime', 0))
+        self.cpuTime = float(stats.get('cpuTime', 0))
+        self.queueWait = float(stats.get('queueWait', 0))
+        self.received = dict(stats.get('received', dict()))
+        self.emitted = dict(stats.get('emitted', dict()))
+        self.httpRequests = int(stats.get('httpRequests', 0))
+        self.httpBytes = int(stats.get('httpBytes', 0))
+        self.dnsQueries = int(stats.get('dnsQueries', 0))
+
+    @staticmethod
+    def current():
+        """Statistics of the module handling an event in the current
+        thread or asyncio task.
+
+        Returns:
+            SpiderFootModuleStats: statistics, or None if no module is handling an event
+        """
+        return _currentStats.get()
+
+    @contextmanager
+    def handling(self, sfEvent, measureCpu=True):
+        """Count the time spent handling an event, and the HTTP requests
+        and DNS queries made meanwhile, against these statistics.
+
+        The CPU time of the current thread is only meaningful when the
+        thread handles one event at a time, which isn't the case for
+        events handled on an event loop.
+
+        Args:
+            sfEvent (SpiderFootEvent): event being handled
+            measureCpu (bool): count the CPU time of the current thread
+        """
+        now = time.monotonic()
+        dispatched = getattr(sfEvent, '_dispatched', None)
+        measureCpu = measureCpu and _threadTime is not None
+
+        token = _currentStats.set(self)
+        cpuStart = _threadTime() if measureCpu else None
+        try:
+            yield self
+        finally:
+            cpuTime = _threadTime() - cpuStart if measureCpu else 0
+            wallTime = time.monotonic() - now
+            _currentStats.reset(token)
+
+            with self._lock:
+                self.handled += 1
+                self.wallTime += wallTime
+                self.cpuTime += cpuTime
+                if dispatched is not None:
+                    self.queueWait += max(0, now - dispatched)
+                self.received[sfEvent.eventType] = self.received.get(sfEvent.eventType, 0) + 1
+
+    def eventEmitted(self, eventType):
+        """Count an event emitted by the module.
+
+        Args:
+            eventType (str): event type
+        """
+        with self._lock:
+            self.emitted[eventType] = self.emitted.get(eventType, 0) + 1
+
+    def httpRequest(self):
+        """Count an HTTP request made by the module."""
+        with self._lock:
+            self.httpRequests += 1
+
+    def httpReceived(self, contentSize):
+        """Count HTTP content received by the module.
+
+        Args:
+            contentSize (int): bytes of content received
+        """
+        with self._lock:
+            self.httpBytes += contentSize
+
+    def dnsQuery(self):
+        """Count a DNS query made by the module."""
+        with self._lock:
+            self.dnsQueries += 1
+
+    def usage(self):
+        """Resource counters, to be added to the statistics of the module
+        in the scan when it handles events in another process.
+
+        Returns:
+            dict: resource counters
+        """
+        with self._lock:
+            return {counter: getattr(self, counter) for counter in self.usageCounters}
+
+    def addUsage(self, usage):
+        """Add resource counters returned by usage() to these statistics.
+
+        Args:
+            usage (dict): resource counters
+        """
+        if not usage:
+            return
+
+        with self._lock:
+            for counter in self.usageCounters:
+                setattr(self, counter, getattr(self, counter) + usage.get(counter, 0))
+
+    def asDict(self):
+        """Statistics as a dictionary, e.g. to be stored.
+
+        Returns:
+            dict: statistics
+        """
+        with self._lock:
+            return {
+                'handled': self.handled,
+                'wallTime': self.wallTime,
+                'cpuTime': self.cpuTime,
+                'queueWait': self.queueWait,
+                'received': dict(self.received),
+                'emitted': dict(self.emitted),
+                'httpRequests': self.httpRequests,
+                'httpBytes': self.httpBytes,
+                'dnsQueries': self.dnsQueries
+            }
+
+# end of SpiderFootModuleStats class
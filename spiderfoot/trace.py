@@ -0,0 +1,234 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+# Tracer of the scan the current thread or asyncio task is working on,
+# for SpiderFoot helpers (HTTP, database) to record spans with.
+_currentTracer = contextvars.ContextVar('spiderfoot_tracer', default=None)
+
+
+class SpiderFootTracer():
+    """Timeline of a scan's execution, written to a file in the Trace Event
+    Format, which can be viewed in Perfetto (https://ui.perfetto.dev) or
+    chrome://tracing.
+
+    Spans are written to the file shortly after they finish, as a JSON
+    array which is only closed when the tracer is closed. Trace viewers
+    accept unclosed arrays, so the trace of a running or interrupted scan
+    can be viewed too.
+
+    Attributes:
+        path (str): trace file
+    """
+
+    # Maximum number of trace events held before they are written to the file
+    bufferSize = 1000
+    # Maximum number of seconds trace events are held before they are written to the file
+    flushInterval = 1
+
+    _path = None
+    _file = None
+    _lock = None
+    _buffer = None
+    _lastFlush = 0
+    _written = 0
+    _origin = 0
+    _pid = 0
+    _threads = None
+    _asyncIds = None
+
+    def __init__(self, path, name=None):
+        """Initialize the tracer, replacing any existing trace file.
+
+        Args:
+            path (str): trace file
+            name (str): name of the traced process shown by trace viewers
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: trace file could not be created
+        """
+
+        if not isinstance(path, str):
+            raise TypeError(f"path is {type(path)}; expected str()")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('[')
+        self._lock = threading.Lock()
+        self._buffer = list()
+        self._lastFlush = time.monotonic()
+        self._written = 0
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._threads = set()
+        self._asyncIds = itertools.count(1)
+
+        if name:
+            self._record({'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0, 'args': {'name': name}})
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def current():
+        """Tracer of the scan the current thread or asyncio task is working on.
+
+        Returns:
+            SpiderFootTracer: tracer, or None if the scan isn't traced
+        """
+        return _currentTracer.get()
+
+    @staticmethod
+    def traced(name, cat, args=None):
+        """Record a span with the tracer of the scan the current thread or
+        asyncio task is working on, if the scan is traced.
+
+        Args:
+            name (str): span name
+            cat (str): span category
+            args (dict): span details
+
+        Returns:
+            contextmanager: context which the span covers
+        """
+        tracer = _currentTracer.get()
+        if tracer is None:
+            # An empty ExitStack does nothing, as nullcontext() does in Python 3.7+
+            return ExitStack()
+
+        return tracer.span(name, cat, args)
+
+    def _timestamp(self):
+        """Microseconds since the tracer was initialized.
+
+        Returns:
+            float: timestamp
+        """
+        return (time.perf_counter() - self._origin) * 1000000
+
+    def _record(self, traceEvent):
+        """Add a trace event to the trace.
+
+        Args:
+            traceEvent (dict): trace event
+        """
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._buffer.append(json.dumps(traceEvent))
+
+            if len(self._buffer) >= self.bufferSize or time.monotonic() - self._lastFlush >= self.flushInterval:
+                self._flush()
+
+    def _flush(self):
+        """Write the buffered trace events to the file. Must be called with
+        the lock held."""
+        if self._buffer:
+            separator = ',\n' if self._written else '\n'
+            self._file.write(separator + ',\n'.join(self._buffer))
+            self._written += len(self._buffer)
+            self._buffer = list()
+
+        self._file.flush()
+        self._lastFlush = time.monotonic()
+
+    def _threadId(self):
+        """ID of the current thread, which is named in the trace the first
+        time it records a span.
+
+        Returns:
+            int: thread ID
+        """
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads.add(tid)
+            self._record({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                          'args': {'name': threading.current_thread().name}})
+
+        return tid
+
+    @contextmanager
+    def span(self, name, cat, args=None):
+        """Record a span covering the work done in the context, on the
+        timeline of the current thread. Work done in the context by
+        SpiderFoot helpers is recorded with this tracer too.
+
+        Args:
+            name (str): span name
+            cat (str): span category
+            args (dict): span details
+        """
+        tid = self._threadId()
+        token = _currentTracer.set(self)
+        start = self._timestamp()
+        try:
+            yield self
+        finally:
+            end = self._timestamp()
+            _currentTracer.reset(token)
+
+            traceEvent = {'name': name, 'cat': cat, 'ph': 'X', 'ts': start, 'dur': end - start, 'pid': self._pid, 'tid': tid}
+            if args:
+                traceEvent['args'] = args
+            self._record(traceEvent)
+
+    @contextmanager
+    def asyncSpan(self, name, cat, args=None):
+        """Record a span covering the work done in the context, on a
+        timeline of its own, for work which overlaps with other work on the
+        same thread, e.g. asyncio tasks. Work done in the context by
+        SpiderFoot helpers is recorded with this tracer too.
+
+        Args:
+            name (str): span name
+            cat (str): span category
+            args (dict): span details
+        """
+        spanId = next(self._asyncIds)
+        token = _currentTracer.set(self)
+        traceEvent = {'name': name, 'cat': cat, 'ph': 'b', 'ts': self._timestamp(), 'pid': self._pid, 'id': spanId}
+        if args:
+            traceEvent['args'] = args
+        self._record(traceEvent)
+        try:
+            yield self
+        finally:
+            _currentTracer.reset(token)
+            self._record({'name': name, 'cat': cat, 'ph': 'e', 'ts': self._timestamp(), 'pid': self._pid, 'id': spanId})
+
+    def instant(self, name, cat, args=None):
+        """Record a moment on the timeline of the current thread.
+
+        Args:
+            name (str): event name
+            cat (str): event category
+            args (dict): event details
+        """
+        traceEvent = {'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': self._timestamp(), 'pid': self._pid, 'tid': self._threadId()}
+        if args:
+            traceEvent['args'] = args
+        self._record(traceEvent)
+
+    def close(self):
+        """Write the remaining trace events and close the trace file."""
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._flush()
+            self._file.write('\n]\n')
+            self._file.close()
+            self._file = None
+
+# end of SpiderFootTracer class
@@ -15,6 +15,10 @@
                     showlist();
                     return;
                 }
+                if (type == "queued") {
+                    showlist(["QUEUED"], "Queued");
+                    return;
+                }
                 if (type == "running") {
                     showlist(["RUNNING", "STARTING", "STARTED", "INITIALIZING"], "Running");
                     return;
@@ -136,6 +140,7 @@
                 buttons += "<button class='btn dropdown-toggle btn-default' data-toggle='dropdown'><span class='caret'></span></button>";
                 buttons += "<ul class='dropdown-menu'>";
                 buttons += "<li><a href='javascript:filter(\"all\")'>None</a></li>";
+                buttons += "<li><a href='javascript:filter(\"queued\")'>Queued</a></li>";
                 buttons += "<li><a href='javascript:filter(\"running\")'>Running</a></li>";
                 buttons += "<li><a href='javascript:filter(\"finished\")'>Finished</a></li>";
                 buttons += "<li><a href='javascript:filter(\"failed\")'>Failed/Aborted</a></li></ul>";
@@ -183,7 +188,7 @@
                         statusy = "alert-success";
                     } else if (data[i][6].indexOf("ABORT") >= 0) {
                         statusy = "alert-warning";
-                    } else if (data[i][6] == "CREATED" || data[i][6] == "RUNNING" || data[i][6] == "STARTED" || data[i][6] == "STARTING" || data[i][6] == "INITIALIZING") {
+                    } else if (data[i][6] == "CREATED" || data[i][6] == "QUEUED" || data[i][6] == "RUNNING" || data[i][6] == "STARTED" || data[i][6] == "STARTING" || data[i][6] == "INITIALIZING") {
                         statusy = "alert-info";
                     } else if (data[i][6].indexOf("FAILED") >= 0) {
                         statusy = "alert-danger";
@@ -193,11 +198,14 @@
                     table += "<td class='text-center'><span class='badge " + statusy + "'>" + data[i][6] + "</span></td>";
                     table += "<td class='text-center'>" + data[i][7] + "</td>";
                     table += "<td class='text-center'>";
-                    if (data[i][6] == "RUNNING" || data[i][6] == "STARTING" || data[i][6] == "STARTED" || data[i][6] == "INITIALIZING") {
+                    if (data[i][6] == "QUEUED" || data[i][6] == "RUNNING" || data[i][6] == "STARTING" || data[i][6] == "STARTED" || data[i][6] == "INITIALIZING") {
                         table += "<a rel='tooltip' title='Stop Scan' href=" + docroot + "/stopscan?id=" + data[i][0] +"><i class='glyphicon glyphicon-stop text-muted'></i></a>";
                     } else {
                         table += "<a rel='tooltip' title='Delete Scan' href=" + docroot + "/scandelete?id=" + data[i][0] + "><i class='glyphicon glyphicon-trash text-muted'></i></a>";
                         table += "&nbsp;&nbsp;<a rel='tooltip' title='Re-run Scan' href=" + docroot + "/rerunscan?id=" + data[i][0] + "><i class='glyphicon glyphicon-repeat text-muted'></i></a>";
+                        if (data[i][6] == "ABORTED" || data[i][6].indexOf("FAILED") >= 0) {
+                            table += "&nbsp;&nbsp;<a rel='tooltip' title='Resume Scan' href=" + docroot + "/resumescan?id=" + data[i][0] + "><i class='glyphicon glyphicon-play text-muted'></i></a>";
+                        }
                     }
                     table += "&nbsp;&nbsp;<a rel='tooltip' title='Clone Scan' href=" + docroot + "/clonescan?id=" + data[i][0] + "><i class='glyphicon glyphicon-plus-sign text-muted'></i></a>";
                     table += "</td></tr>";
@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------------------------
+# Name:        sfbench
+# Purpose:     Synthetic event-storm benchmarks of the SpiderFoot dispatch
+#              and storage pipeline, which run offline.
+#
+# Usage:       python -m test.benchmark.sfbench [options]
+#
+# Licence:     GPL
+# -------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+from datetime import datetime
+
+from sflib import SpiderFoot
+from sfscan import SpiderFootScanner
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin
+
+# Benchmarks, in the order they are run
+BENCHMARKS = ['notifyListeners', 'scan', 'sfp__stor_db', 'scanEventStore']
+
+# Options of the scans run by the benchmarks. The TLD list is given
+# rather than fetched, so that the benchmarks run offline.
+BENCH_CONFIG = {
+    '_debug': False,
+    '__logging': True,
+    '__outputfilter': None,
+    '_useragent': 'SpiderFoot',
+    '_dnsserver': '',
+    '_fetchtimeout': 5,
+    '_internettlds': ['com', 'net', 'org'],
+    '_internettlds_cache': 72,
+    '_genericusers': 'abuse,admin,postmaster,webmaster',
+    '__version__': '3.3-DEV',
+    '__database': None,
+    '__modules__': None,
+    '_socks1type': '',
+    '_socks2addr': '',
+    '_socks3port': '',
+    '_socks4user': '',
+    '_socks5pwd': '',
+    '_torctlport': 9051,
+    '_eventbatchsize': 500,
+    '_eventbatchinterval': 1
+}
+
+
+def benchEventType(level):
+    """Event type produced by the benchmark modules at a level of the
+    event tree, level 0 being the scan target.
+
+    Args:
+        level (int): level of the event tree
+
+    Returns:
+        str: event type
+    """
+    if level == 0:
+        return 'IP_ADDRESS'
+
+    return f"BENCH_EVENT_{level}"
+
+
+def benchModules(params):
+    """Create the mock modules of a benchmark. The module at each level
+    of the event tree handles the events of the level above, and produces
+    fanOut events for each of them, until the tree is depth levels deep.
+
+    The modules are registered as modules of the modules package, so
+    that the scanner can load them like any other module.
+
+    Args:
+        params (dict): benchmark parameters
+
+    Returns:
+        dict: module classes, by module name
+    """
+    fanOut = params['fanOut']
+    payloadSize = params['payloadSize']
+    latency = params['latency']
+
+    benchClasses = dict()
+    for level in range(params['depth']):
+        modName = f"sfp_bench_{level}"
+
+        class BenchModule(SpiderFootPlugin):
+            meta = {
+                'name': f"Benchmark (level {level})",
+                'summary': "Produces synthetic events for benchmarks."
+            }
+
+            opts = dict()
+            optdescs = dict()
+
+            watched = benchEventType(level)
+            produced = benchEventType(level + 1)
+
+            def setup(self, sfc, userOpts=dict()):
+                self.sf = sfc
+
+            def watchedEvents(self):
+                return [self.watched]
+
+            def producedEvents(self):
+                return [self.produced]
+
+            def handleEvent(self, sfEvent):
+                if latency:
+                    time.sleep(latency)
+
+                for i in range(fanOut):
+                    # Unique data, so events are not taken for repeats of their ancestors
+                    data = f"{sfEvent.hash[:16]}-{i}-".ljust(payloadSize, 'x')
+                    self.notifyListeners(SpiderFootEvent(self.produced, data, self.__name__, sfEvent))
+
+        BenchModule.__name__ = modName
+        BenchModule.__qualname__ = modName
+        BenchModule.__module__ = f"modules.{modName}"
+
+        module = types.ModuleType(f"modules.{modName}")
+        setattr(module, modName, BenchModule)
+        sys.modules[f"modules.{modName}"] = module
+
+        benchClasses[modName] = BenchModule
+
+    return benchClasses
+
+
+def removeBenchModules(benchClasses):
+    """Unregister the mock modules created by benchModules().
+
+    Args:
+        benchClasses (dict): module classes, by module name
+    """
+    for modName in benchClasses:
+        sys.modules.pop(f"modules.{modName}", None)
+
+
+def expectedEvents(params):
+    """Number of events the mock modules produce from the scan target.
+
+    Args:
+        params (dict): benchmark parameters
+
+    Returns:
+        int: number of events
+    """
+    return sum(params['fanOut'] ** level for level in range(1, params['depth'] + 1))
+
+
+def benchDatabase(params, database):
+    """Create the database of a benchmark, with the event types produced
+    by the mock modules, so that their results can be read back.
+
+    Args:
+        params (dict): benchmark parameters
+        database (str): database file
+
+    Returns:
+        SpiderFootDb: database handle
+    """
+    dbh = SpiderFootDb(dict(BENCH_CONFIG, __database=database))
+
+    with dbh.dbhLock:
+        for level in range(1, params['depth'] + 1):
+            dbh.dbh.execute(
+                "INSERT OR IGNORE INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (?, ?, ?, ?)",
+                (benchEventType(level), f"Benchmark Event (level {level})", 0, 'DATA')
+            )
+        dbh.conn.commit()
+
+    return dbh
+
+
+def benchNotifyListeners(params, database):
+    """Events per second produced by the mock modules notifying each
+    other directly with notifyListeners(), without the scanner.
+
+    Args:
+        params (dict): benchmark parameters
+        database (str): database file
+
+    Returns:
+        tuple: number of events and seconds taken
+    """
+    sf = SpiderFoot(dict(BENCH_CONFIG, __database=database))
+    stopEvent = threading.Event()
+
+    benchClasses = benchModules(params)
+    try:
+        modules = list()
+        for modName, benchClass in benchClasses.items():
+            mod = benchClass()
+            mod.__name__ = modName
+            mod.clearListeners()
+            mod.setup(sf)
+            mod.setStopEvent(stopEvent)
+            modules.append(mod)
+
+        # Each module listens to the module at the level above
+        for parent, child in zip(modules, modules[1:]):
+            parent.registerListener(child)
+
+        rootEvent = SpiderFootEvent('ROOT', '127.0.0.1', '', None)
+        targetEvent = SpiderFootEvent(benchEventType(0), '127.0.0.1', 'SpiderFoot UI', rootEvent)
+
+        start = time.perf_counter()
+        modules[0].handleEvent(targetEvent)
+        seconds = time.perf_counter() - start
+    finally:
+        removeBenchModules(benchClasses)
+
+    return expectedEvents(params), seconds
+
+
+def benchScan(params, database):
+    """Events per second through a scan of the mock modules and the
+    storage module, from starting the scan until it has finished.
+
+    Args:
+        params (dict): benchmark parameters
+        database (str): database file
+
+    Returns:
+        tuple: number of events stored and seconds taken
+
+    Raises:
+        AssertionError: the scan did not finish
+    """
+    benchDatabase(params, database).close()
+
+    benchClasses = benchModules(params)
+    try:
+        config = dict(BENCH_CONFIG, __database=database)
+        config['__modules__'] = {modName: {'opts': dict()} for modName in benchClasses}
+        config['__modules__']['sfp__stor_db'] = {'opts': {'maxstorage': 1024, '_store': True}}
+
+        scanId = str(uuid.uuid4())
+        moduleList = ['sfp__stor_db'] + list(benchClasses.keys())
+
+        start = time.perf_counter()
+        scanner = SpiderFootScanner("benchmark", scanId, "127.0.0.1", benchEventType(0), moduleList, config, start=True)
+        seconds = time.perf_counter() - start
+    finally:
+        removeBenchModules(benchClasses)
+
+    if scanner.status != "FINISHED":
+        raise AssertionError(f"Benchmark scan ended with status {scanner.status}")
+
+    dbh = SpiderFootDb(config)
+    events = len(dbh.scanResultEvent(scanId))
+    dbh.close()
+
+    return events, seconds
+
+
+def benchEvents(params):
+    """Events for the storage benchmarks, as many as the mock modules
+    would produce.
+
+    Args:
+        params (dict): benchmark parameters
+
+    Returns:
+        list: events
+    """
+    rootEvent = SpiderFootEvent('ROOT', '127.0.0.1', '', None)
+    return [
+        SpiderFootEvent(benchEventType(1), f"{i}-".ljust(params['payloadSize'], 'x'), 'sfp_bench_0', rootEvent)
+        for i in range(expectedEvents(params))
+    ]
+
+
+def benchStorDb(params, database):
+    """Events per second stored by the storage module.
+
+    Args:
+        params (dict): benchmark parameters
+        database (str): database file
+
+    Returns:
+        tuple: number of events and seconds taken
+    """
+    from modules.sfp__stor_db import sfp__stor_db
+
+    config = dict(BENCH_CONFIG, __database=database)
+    dbh = benchDatabase(params, database)
+    sf = SpiderFoot(config)
+    sf.dbh = dbh
+
+    scanId = str(uuid.uuid4())
+    dbh.scanInstanceCreate(scanId, "benchmark", "127.0.0.1")
+
+    mod = sfp__stor_db()
+    mod.__name__ = 'sfp__stor_db'
+    # setup() updates the options, which are shared by all instances
+    mod.opts = dict(mod.opts)
+    mod.setup(sf, {'maxstorage': 1024, '_store': True})
+    mod.setDbh(dbh)
+    mod.setScanId(scanId)
+
+    events = benchEvents(params)
+
+    start = time.perf_counter()
+    for sfEvent in events:
+        mod.handleEvent(sfEvent)
+    dbh.scanEventFlush()
+    seconds = time.perf_counter() - start
+
+    dbh.close()
+
+    return len(events), seconds
+
+
+def benchScanEventStore(params, database):
+    """Events per second stored by SpiderFootDb.scanEventStore().
+
+    Args:
+        params (dict): benchmark parameters
+        database (str): database file
+
+    Returns:
+        tuple: number of events and seconds taken
+    """
+    dbh = benchDatabase(params, database)
+
+    scanId = str(uuid.uuid4())
+    dbh.scanInstanceCreate(scanId, "benchmark", "127.0.0.1")
+
+    events = benchEvents(params)
+
+    start = time.perf_counter()
+    for sfEvent in events:
+        dbh.scanEventStore(scanId, sfEvent)
+    dbh.scanEventFlush()
+    seconds = time.perf_counter() - start
+
+    dbh.close()
+
+    return len(events), seconds
+
+
+benchFunctions = {
+    'notifyListeners': benchNotifyListeners,
+    'scan': benchScan,
+    'sfp__stor_db': benchStorDb,
+    'scanEventStore': benchScanEventStore
+}
+
+
+def runBenchmarks(benchmarks, params, repeat=3):
+    """Run benchmarks, each in a database of its own, keeping the
+    fastest of repeated runs.
+
+    Args:
+        benchmarks (list): names of the benchmarks to run
+        params (dict): benchmark parameters
+        repeat (int): number of runs of each benchmark
+
+    Returns:
+        dict: events, seconds and events per second of each benchmark, by benchmark name
+
+    Raises:
+        ValueError: arg value was invalid
+    """
+    for benchmark in benchmarks:
+        if benchmark not in benchFunctions:
+            raise ValueError(f"Unknown benchmark: {benchmark}")
+
+    results = dict()
+    for benchmark in benchmarks:
+        best = None
+        for i in range(max(1, repeat)):
+            with tempfile.TemporaryDirectory() as dbDir:
+                events, seconds = benchFunctions[benchmark](params, os.path.join(dbDir, 'benchmark.db'))
+
+            if best is None or seconds < best[1]:
+                best = (events, seconds)
+
+        events, seconds = best
+        results[benchmark] = {
+            'events': events,
+            'seconds': round(seconds, 6),
+            'eventsPerSec': round(events / seconds, 1) if seconds > 0 else 0
+        }
+
+    return results
+
+
+def gitCommit():
+    """Commit of the working tree the benchmarks are run on.
+
+    Returns:
+        str: commit hash, or None if unknown
+    """
+    try:
+        res = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             universal_newlines=True, cwd=SpiderFoot.myPath(), timeout=10)  # nosec
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return res.stdout.strip() or None
+
+
+def loadBaseline(resultsFile, params):
+    """Latest saved results of benchmarks run with the same parameters.
+
+    Args:
+        resultsFile (str): file results were saved to, one JSON record per line
+        params (dict): benchmark parameters
+
+    Returns:
+        dict: results record, or None if there is none
+    """
+    baseline = None
+    try:
+        with open(resultsFile, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('params') == params:
+                    baseline = record
+    except OSError:
+        return None
+
+    return baseline
+
+
+def compareResults(results, baseline, threshold):
+    """Find the benchmarks which got slower than a baseline.
+
+    Args:
+        results (dict): benchmark results
+        baseline (dict): results record to compare with
+        threshold (float): fraction of events per second a benchmark may lose before it counts as slower
+
+    Returns:
+        list: (benchmark, baseline events per second, events per second) of the benchmarks which got slower
+    """
+    regressions = list()
+    for benchmark, result in results.items():
+        before = baseline['results'].get(benchmark)
+        if not before:
+            continue
+
+        if result['eventsPerSec'] < before['eventsPerSec'] * (1 - threshold):
+            regressions.append((benchmark, before['eventsPerSec'], result['eventsPerSec']))
+
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line.
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        int: exit code, 1 if a benchmark got slower than the baseline
+    """
+    p = argparse.ArgumentParser(description="Synthetic event-storm benchmarks of the SpiderFoot dispatch and storage pipeline.")
+    p.add_argument("-b", "--benchmarks", default=','.join(BENCHMARKS), help=f"Comma-separated benchmarks to run, of: {', '.join(BENCHMARKS)}.")
+    p.add_argument("--fan-out", type=int, default=4, help="Events produced by a module for each event it handles.")
+    p.add_argument("--depth", type=int, default=5, help="Number of levels of modules producing events.")
+    p.add_argument("--payload-size", type=int, default=256, help="Bytes of data of each event.")
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds a module takes to handle each event.")
+    p.add_argument("--repeat", type=int, default=3, help="Runs of each benchmark, of which the fastest counts.")
+    p.add_argument("--results", help="File to append the results to, one JSON record per line, for comparison across commits.")
+    p.add_argument("--baseline", help="Results file to compare with. The latest results with the same parameters are used.")
+    p.add_argument("--threshold", type=float, default=0.1, help="Fraction of events per second a benchmark may lose against the baseline before it fails.")
+    args = p.parse_args(argv)
+
+    if args.fan_out < 1 or args.depth < 1 or args.payload_size < 32:
+        p.error("--fan-out and --depth must be 1 or more, and --payload-size 32 or more")
+
+    params = {
+        'fanOut': args.fan_out,
+        'depth': args.depth,
+        'payloadSize': args.payload_size,
+        'latency': args.latency
+    }
+
+    try:
+        results = runBenchmarks([b.strip() for b in args.benchmarks.split(',') if b.strip()], params, args.repeat)
+    except ValueError as e:
+        p.error(str(e))
+
+    record = {
+        'commit': gitCommit(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'params': params,
+        'results': results
+    }
+
+    print(f"Commit: {record['commit']}, parameters: {json.dumps(params)}")
+    print(f"{'Benchmark':<20}{'Events':>10}{'Seconds':>12}{'Events/sec':>14}")
+    for benchmark, result in results.items():
+        print(f"{benchmark:<20}{result['events']:>10}{result['seconds']:>12.3f}{result['eventsPerSec']:>14.1f}")
+
+    exitCode = 0
+    if args.baseline:
+        baseline = loadBaseline(args.baseline, params)
+        if baseline is None:
+            print(f"No baseline results with the same parameters in {args.baseline}.")
+        else:
+            regressions = compareResults(results, baseline, args.threshold)
+            for benchmark, before, after in regressions:
+                print(f"REGRESSION: {benchmark} {before:.1f} -> {after:.1f} events/sec (baseline commit {baseline.get('commit')})")
+            if regressions:
+                exitCode = 1
+            else:
+                print(f"No regressions against baseline commit {baseline.get('commit')}.")
+
+    if args.results:
+        with open(args.results, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+    return exitCode
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+# -------------------------------------------------------------------------------
+# Name:        sfreplay
+# Purpose:     Replay the events of a stored scan through modules, offline,
+#              with network requests answered from the scan's results, timing
+#              each module.
+#
+# Usage:       python -m test.benchmark.sfreplay SCANID [options]
+#
+# Licence:     GPL
+# -------------------------------------------------------------------------------
+
+import argparse
+import cProfile
+import json
+import queue
+import sys
+import threading
+import time
+from collections import ChainMap
+from copy import deepcopy
+from datetime import datetime
+from types import MappingProxyType
+
+import requests
+
+from sflib import SpiderFoot
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootModuleStats, SpiderFootTarget
+from test.benchmark.sfbench import BENCH_CONFIG, compareResults, gitCommit, loadBaseline
+
+# Event types of web content found at the URL of their source event
+URL_CONTENT_EVENTS = ['TARGET_WEB_CONTENT', 'HTTP_CODE', 'WEBSERVER_HTTPHEADERS']
+
+# Event types of host names resolved from the IP address of their source
+# event, and of IP addresses resolved from the host name of their source event
+HOST_EVENTS = ['INTERNET_NAME', 'AFFILIATE_INTERNET_NAME', 'CO_HOSTED_SITE', 'DOMAIN_NAME']
+IP_EVENTS = ['IP_ADDRESS', 'IPV6_ADDRESS', 'AFFILIATE_IPADDR', 'AFFILIATE_IPV6_ADDRESS']
+
+
+class SpiderFootReplayAdapter(requests.adapters.BaseAdapter):
+    """Transport for sessions of replaying modules, which refuses all
+    requests, as their responses were not recorded."""
+
+    def send(self, request, **kwargs):
+        raise requests.exceptions.ConnectionError(f"No recorded response for {request.url}")
+
+    def close(self):
+        pass
+
+# end of SpiderFootReplayAdapter class
+
+
+class SpiderFootReplay(SpiderFoot):
+    """SpiderFoot helpers for modules replaying a scan, which answer HTTP
+    requests and DNS lookups from the results of the scan rather than
+    from the network.
+
+    Only the requests and lookups which the scan's results record the
+    outcome of are answered: a URL's web content, HTTP status code and
+    headers, and the addresses a host name resolved to and the names an
+    address reverse resolved to. Other requests fail, as they would
+    without network access. Web content is as stored, which may have been
+    truncated by sfp__stor_db.
+
+    Attributes:
+        replayed (int): number of requests and lookups answered from the scan's results
+        missed (int): number of requests and lookups the scan's results had no answer to
+    """
+
+    def __init__(self, options, events):
+        """Initialize the helpers with the network data recorded in a scan.
+
+        Args:
+            options (dict): SpiderFoot options
+            events (list): events of the scan
+        """
+        super().__init__(options)
+
+        self.replayed = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+        self._urls = dict()
+        self._hosts = dict()
+        self._hosts6 = dict()
+        self._names = dict()
+
+        for sfEvent in events:
+            sourceEvent = sfEvent.sourceEvent
+            if sourceEvent is None:
+                continue
+
+            if sfEvent.eventType in URL_CONTENT_EVENTS and sourceEvent.data.startswith(('http://', 'https://')):
+                response = self._urls.setdefault(sourceEvent.data, {
+                    'code': '200',
+                    'status': None,
+                    'content': None,
+                    'headers': None,
+                    'realurl': sourceEvent.data
+                })
+                if sfEvent.eventType == 'TARGET_WEB_CONTENT':
+                    response['content'] = sfEvent.data
+                elif sfEvent.eventType == 'HTTP_CODE':
+                    response['code'] = sfEvent.data
+                else:
+                    try:
+                        response['headers'] = json.loads(sfEvent.data)
+                    except ValueError:
+                        pass
+            elif sfEvent.eventType in IP_EVENTS and sourceEvent.eventType in HOST_EVENTS:
+                addrs = self._hosts6 if self.validIP6(sfEvent.data) else self._hosts
+                addrs.setdefault(sourceEvent.data, set()).add(sfEvent.data)
+            elif sfEvent.eventType in HOST_EVENTS and sourceEvent.eventType in IP_EVENTS:
+                self._names.setdefault(sourceEvent.data, set()).add(sfEvent.data)
+
+    def _replay(self, answer):
+        """Count a request or lookup as answered from the scan's results, or not.
+
+        Args:
+            answer: recorded answer, or None
+
+        Returns:
+            answer
+        """
+        with self._lock:
+            if answer is None:
+                self.missed += 1
+            else:
+                self.replayed += 1
+
+        return answer
+
+    def cacheGet(self, label, timeoutHrs):
+        # Nothing is cached, so each replay makes the same requests
+        return None
+
+    def cachePut(self, label, data):
+        pass
+
+    def getSession(self):
+        session = requests.session()
+        session.mount('http://', SpiderFootReplayAdapter())
+        session.mount('https://', SpiderFootReplayAdapter())
+        return session
+
+    def safeSocket(self, host, port, timeout):
+        raise OSError(f"No recorded connection to {host}:{port}")
+
+    def safeSSLSocket(self, host, port, timeout):
+        raise OSError(f"No recorded connection to {host}:{port}")
+
+    def resolveHost(self, host):
+        if not host:
+            return list()
+
+        self._countDnsQuery()
+        return sorted(self._replay(self._hosts.get(host)) or list())
+
+    def resolveHost6(self, hostname):
+        if not hostname:
+            return list()
+
+        self._countDnsQuery()
+        return sorted(self._replay(self._hosts6.get(hostname)) or list())
+
+    def resolveIP(self, ipaddr):
+        if not self.validIP(ipaddr) and not self.validIP6(ipaddr):
+            return list()
+
+        self._countDnsQuery()
+        return sorted(self._replay(self._names.get(ipaddr)) or list())
+
+    def fetchUrl(
+        self,
+        url,
+        fatal=False,
+        cookies=None,
+        timeout=30,
+        useragent="SpiderFoot",
+        headers=None,
+        noLog=False,
+        postData=None,
+        dontMangle=False,
+        sizeLimit=None,
+        headOnly=False,
+        verify=True
+    ):
+        if not url:
+            return None
+
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            return None
+
+        self._countHttpRequest()
+
+        response = self._replay(self._urls.get(url))
+        if response is None:
+            return {
+                'code': None,
+                'status': None,
+                'content': None,
+                'headers': None,
+                'realurl': url
+            }
+
+        response = dict(response)
+        if headOnly:
+            response['content'] = None
+        elif response['content']:
+            self._countHttpReceived(len(response['content']))
+
+        return response
+
+# end of SpiderFootReplay class
+
+
+def loadScanEvents(dbh, scanId):
+    """Reconstruct the event stream of a stored scan.
+
+    Args:
+        dbh (SpiderFootDb): database handle
+        scanId (str): scan instance ID
+
+    Returns:
+        list: events, in the order they were stored, linked to their source events
+    """
+    events = list()
+    eventsByHash = dict()
+    for eventHash, eventType, generated, confidence, visibility, risk, module, data, sourceEventHash in dbh.scanResultEventStream(scanId):
+        if eventType == "ROOT":
+            sfEvent = SpiderFootEvent(eventType, data, module, None)
+        else:
+            # Events whose source event was not stored are linked to the root event
+            sourceEvent = eventsByHash.get(sourceEventHash, eventsByHash.get("ROOT"))
+            if sourceEvent is None:
+                continue
+            sfEvent = SpiderFootEvent(eventType, data, module, sourceEvent, confidence, visibility, risk)
+
+        # Keep the identity of the event, so it is the same event each replay
+        sfEvent._generated = generated
+        sfEvent._hash = eventHash
+        eventsByHash[eventHash] = sfEvent
+        events.append(sfEvent)
+
+    return events
+
+
+def replayConfig(dbh, scanId, moduleList):
+    """Options of a stored scan, for the modules replaying it.
+
+    Args:
+        dbh (SpiderFootDb): database handle
+        scanId (str): scan instance ID
+        moduleList (list): names of the modules replaying the scan
+
+    Returns:
+        dict: options, with the options of each module in __modules__
+
+    Raises:
+        ImportError: a module could not be loaded
+    """
+    config = deepcopy(BENCH_CONFIG)
+    config['__modules__'] = dict()
+    for modName in moduleList:
+        module = __import__('modules.' + modName, globals(), locals(), [modName])
+        config['__modules__'][modName] = {'opts': deepcopy(getattr(module, modName).opts)}
+
+    sf = SpiderFoot(config)
+    config = sf.configUnserialize(dbh.scanConfigGet(scanId), config)
+
+    # The scan's modules used the TLD list cached when it ran
+    tlddata = sf.cacheGet("internet_tlds", 0)
+    config['_internettlds'] = tlddata.splitlines() if tlddata else list(BENCH_CONFIG['_internettlds'])
+
+    return config
+
+
+def replayModules(config, events, moduleList, scanId):
+    """Feed the events of a scan through modules, one event at a time,
+    timing how long each module takes to handle them. Events produced by
+    the modules are collected rather than fed back, so each replay is the
+    same workload.
+
+    Args:
+        config (dict): options, as returned by replayConfig()
+        events (list): events of the scan, as returned by loadScanEvents()
+        moduleList (list): names of the modules to replay the scan
+        scanId (str): scan instance ID
+
+    Returns:
+        dict: results of each module by module name, and the network requests
+              answered from the scan's results (replayed) or not (missed)
+    """
+    sf = SpiderFootReplay(config, events)
+    stopEvent = threading.Event()
+
+    target = None
+    for sfEvent in events:
+        if sfEvent.module == "SpiderFoot UI":
+            target = SpiderFootTarget(sfEvent.data, sfEvent.eventType)
+            break
+
+    globalConfig = MappingProxyType(config)
+
+    results = dict()
+    modules = list()
+    for modName in moduleList:
+        module = __import__('modules.' + modName, globals(), locals(), [modName])
+        mod = getattr(module, modName)()
+        mod.__name__ = modName
+        mod.clearListeners()
+
+        # setup() updates the options, which are shared by all instances
+        mod.opts = deepcopy(mod.opts)
+
+        stats = SpiderFootModuleStats()
+        result = {'setupTime': 0.0, 'errors': 0, 'produced': 0, 'recorded': 0, 'reproduced': 0}
+
+        start = time.perf_counter()
+        mod.setup(sf, MappingProxyType(ChainMap(globalConfig, config['__modules__'][modName]['opts'])))
+        result['setupTime'] = time.perf_counter() - start
+
+        mod.setScanId(scanId)
+        mod.setStopEvent(stopEvent)
+        mod.setStats(stats)
+        mod.outgoingEventQueue = queue.Queue()
+        if target is not None:
+            mod.setTarget(target)
+            newTarget = mod.enrichTarget(target)
+            if newTarget is not None:
+                target = newTarget
+
+        recorded = set((e.eventType, e.data) for e in events if e.module == modName)
+        result['recorded'] = len(recorded)
+        modules.append((mod, stats, result, recorded, set()))
+        results[modName] = result
+
+    for sfEvent in events:
+        for mod, stats, result, recorded, produced in modules:
+            if mod.errorState:
+                continue
+
+            watchedEvents = mod.watchedEvents()
+            if sfEvent.eventType not in watchedEvents and '*' not in watchedEvents:
+                continue
+
+            # Events repeating their ancestors were only stored
+            if sfEvent.eventType != "ROOT" and sfEvent.repeatsAncestor() and "__stor" not in mod.__module__:
+                continue
+
+            with stats.handling(sfEvent):
+                try:
+                    mod.handleEvent(sfEvent)
+                except Exception as e:
+                    result['errors'] += 1
+                    mod.log.debug(f"Module ({mod.__module__}) encountered an error replaying {sfEvent.eventType}: {e}")
+
+            while True:
+                try:
+                    newEvent, storeOnly = mod.outgoingEventQueue.get_nowait()
+                except queue.Empty:
+                    break
+                result['produced'] += 1
+                produced.add((newEvent.eventType, newEvent.data))
+
+    for mod, stats, result, recorded, produced in modules:
+        result.update(stats.asDict())
+        result['reproduced'] = len(recorded & produced)
+        result['eventsPerSec'] = round(result['handled'] / result['wallTime'], 1) if result['wallTime'] > 0 else 0
+
+    return {'modules': results, 'replayed': sf.replayed, 'missed': sf.missed}
+
+
+def scanModules(events):
+    """Modules which produced events in a scan, other than storage modules.
+
+    Args:
+        events (list): events of the scan
+
+    Returns:
+        list: module names
+    """
+    return sorted(set(
+        e.module for e in events
+        if e.module.startswith('sfp_') and not e.module.startswith('sfp__')
+    ))
+
+
+def main(argv=None):
+    """Replay a scan from the command line.
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        int: exit code, 1 if a module got slower than the baseline
+    """
+    p = argparse.ArgumentParser(description="Replay the events of a stored scan through modules, offline, timing each module.")
+    p.add_argument("scanId", help="ID of the scan to replay.")
+    p.add_argument("-d", "--database", default=f"{SpiderFoot.dataPath()}/spiderfoot.db", help="SpiderFoot database the scan is stored in.")
+    p.add_argument("-m", "--modules", help="Comma-separated modules to replay the scan through (default: the modules which produced events in the scan).")
+    p.add_argument("--repeat", type=int, default=1, help="Replays, of which the fastest counts for each module.")
+    p.add_argument("--profile", help="File to write cProfile statistics of the replays to, e.g. for snakeviz or pstats.")
+    p.add_argument("--results", help="File to append the results to, one JSON record per line, for comparison across commits.")
+    p.add_argument("--baseline", help="Results file to compare with. The latest results for the same scan and modules are used.")
+    p.add_argument("--threshold", type=float, default=0.1, help="Fraction of events per second a module may lose against the baseline before it fails.")
+    args = p.parse_args(argv)
+
+    dbh = SpiderFootDb({'__database': args.database})
+    if not dbh.scanInstanceGet(args.scanId):
+        p.error(f"Scan {args.scanId} not found in {args.database}")
+
+    events = loadScanEvents(dbh, args.scanId)
+    if args.modules:
+        moduleList = [m.strip() for m in args.modules.split(',') if m.strip()]
+    else:
+        moduleList = scanModules(events)
+
+    try:
+        config = replayConfig(dbh, args.scanId, moduleList)
+    except ImportError as e:
+        p.error(f"Failed to load module: {e}")
+    dbh.close()
+
+    profiler = cProfile.Profile() if args.profile else None
+
+    results = dict()
+    network = None
+    for i in range(max(1, args.repeat)):
+        if profiler:
+            profiler.enable()
+        replay = replayModules(config, events, moduleList, args.scanId)
+        if profiler:
+            profiler.disable()
+
+        network = (replay['replayed'], replay['missed'])
+        for modName, result in replay['modules'].items():
+            if modName not in results or result['wallTime'] < results[modName]['wallTime']:
+                results[modName] = result
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+
+    params = {'scanId': args.scanId, 'modules': moduleList}
+    record = {
+        'commit': gitCommit(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'params': params,
+        'results': results
+    }
+
+    print(f"Commit: {record['commit']}, scan: {args.scanId}, {len(events)} events")
+    print(f"Network requests answered from the scan's results: {network[0]}, not recorded: {network[1]}")
+    print(f"{'Module':<30}{'Handled':>9}{'Seconds':>10}{'CPU':>10}{'Events/sec':>12}{'Produced':>10}{'Reproduced':>12}{'Errors':>8}")
+    for modName, result in sorted(results.items(), key=lambda r: r[1]['wallTime'], reverse=True):
+        print(f"{modName:<30}{result['handled']:>9}{result['wallTime']:>10.3f}{result['cpuTime']:>10.3f}{result['eventsPerSec']:>12.1f}"
+              f"{result['produced']:>10}{result['reproduced']:>7}/{result['recorded']:<4}{result['errors']:>8}")
+
+    exitCode = 0
+    if args.baseline:
+        baseline = loadBaseline(args.baseline, params)
+        if baseline is None:
+            print(f"No baseline results for the same scan and modules in {args.baseline}.")
+        else:
+            regressions = compareResults(results, baseline, args.threshold)
+            for modName, before, after in regressions:
+                print(f"REGRESSION: {modName} {before:.1f} -> {after:.1f} events/sec (baseline commit {baseline.get('commit')})")
+            if regressions:
+                exitCode = 1
+            else:
+                print(f"No regressions against baseline commit {baseline.get('commit')}.")
+
+    if args.results:
+        with open(args.results, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+    return exitCode
+
+
+if __name__ == '__main__':
+    sys.exit(main())
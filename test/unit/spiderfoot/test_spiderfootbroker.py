@@ -0,0 +1,309 @@
+# test_spiderfootbroker.py
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+from unittest import mock
+
+from spiderfoot import SpiderFootBroker, SpiderFootBrokerPool, SpiderFootBrokerWorker, SpiderFootEvent, SpiderFootSqliteBroker, SpiderFootTarget
+
+
+class TestSpiderFootBroker(unittest.TestCase):
+    """
+    Test SpiderFootSqliteBroker, SpiderFootBrokerPool and SpiderFootBrokerWorker
+    """
+
+    default_options = {
+        '_debug': False,  # Debug
+        '__logging': True,  # Logging in general
+        '__outputfilter': None,  # Event types to filter from modules' output
+        '_useragent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:62.0) Gecko/20100101 Firefox/62.0',  # User-Agent to use for HTTP requests
+        '_dnsserver': '',  # Override the default resolver
+        '_fetchtimeout': 5,  # number of seconds before giving up on a fetch
+        '_internettlds': 'https://publicsuffix.org/list/effective_tld_names.dat',
+        '_internettlds_cache': 72,
+        '_genericusers': "abuse,admin,billing,compliance,devnull,dns,ftp,hostmaster,inoc,ispfeedback,ispsupport,list-request,list,maildaemon,marketing,noc,no-reply,noreply,null,peering,peering-notify,peering-request,phish,phishing,postmaster,privacy,registrar,registry,root,routing-registry,rr,sales,security,spam,support,sysadmin,tech,undisclosed-recipients,unsubscribe,usenet,uucp,webmaster,www",
+        '__version__': '3.3-DEV',
+        '__database': 'spiderfoot.test.db',  # note: test database file
+        '__modules__': {'sfp_hashes': {'opts': {}}},
+        '_socks1type': '',
+        '_socks2addr': '',
+        '_socks3port': '',
+        '_socks4user': '',
+        '_socks5pwd': '',
+        '_socks6dns': True,
+        '_torctlport': 9051,
+    }
+
+    def setUp(self):
+        self.broker_dir = tempfile.TemporaryDirectory()
+        self.broker = SpiderFootSqliteBroker(os.path.join(self.broker_dir.name, 'broker.db'))
+
+    def tearDown(self):
+        self.broker.close()
+        self.broker_dir.cleanup()
+
+    def test_init_argument_path_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, path)
+        """
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootSqliteBroker(invalid_type)
+
+    def test_openScan_should_make_scan_available_to_workers(self):
+        """
+        Test openScan(self, scanId, config, target, socksProxy=None)
+        Test scanGet(self, scanId)
+        Test closeScan(self, scanId)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        target.setAlias("www.spiderfoot.net", "INTERNET_NAME")
+        self.broker.openScan("example scan id", self.default_options, target)
+
+        config, scan_target, socks_proxy = self.broker.scanGet("example scan id")
+        self.assertEqual(self.default_options, config)
+        self.assertEqual("spiderfoot.net", scan_target.targetValue)
+        self.assertEqual(target.targetAliases, scan_target.targetAliases)
+        self.assertIsNone(socks_proxy)
+
+        self.broker.closeScan("example scan id")
+        self.assertIsNone(self.broker.scanGet("example scan id"))
+
+    def test_init_should_not_create_brokers_without_implementing_interface(self):
+        """
+        Test SpiderFootBroker
+        """
+        with self.assertRaises(TypeError):
+            SpiderFootBroker()
+
+    def test_consume_should_take_each_job_once_in_order_published(self):
+        """
+        Test publish(self, scanId, modName, eventArgs, tempStorage=None)
+        Test consume(self, workerId)
+        Test complete(self, jobId, result)
+        Test result(self, jobId)
+        """
+        first_job = self.broker.publish("example scan id", "sfp_hashes", ["first event", None], [{'example key': True}])
+        second_job = self.broker.publish("example scan id", "sfp_email", ["second event", None])
+
+        self.assertEqual([first_job, "example scan id", "sfp_hashes", ["first event", None], [{'example key': True}]], self.broker.consume("worker 1"))
+        self.assertEqual([second_job, "example scan id", "sfp_email", ["second event", None], None], self.broker.consume("worker 2"))
+        self.assertIsNone(self.broker.consume("worker 1"))
+
+        self.assertIsNone(self.broker.result(first_job))
+        self.broker.complete(first_job, [[], False, None])
+        self.assertEqual([[], False, None], self.broker.result(first_job))
+
+    def test_consume_should_leave_jobs_of_modules_for_the_worker_taking_their_first_job(self):
+        """
+        Test consume(self, workerId)
+        """
+        first_job = self.broker.publish("example scan id", "sfp_hashes", ["first event", None])
+        second_job = self.broker.publish("example scan id", "sfp_hashes", ["second event", None])
+        other_scan_job = self.broker.publish("other scan id", "sfp_hashes", ["third event", None])
+
+        self.assertEqual(first_job, self.broker.consume("worker 1")[0])
+        self.assertEqual(other_scan_job, self.broker.consume("worker 2")[0])
+        self.assertIsNone(self.broker.consume("worker 2"))
+        self.assertEqual(second_job, self.broker.consume("worker 1")[0])
+
+    def test_consume_should_take_jobs_back_from_workers_once_their_lease_expires(self):
+        """
+        Test consume(self, workerId)
+        """
+        job_id = self.broker.publish("example scan id", "sfp_hashes", ["example event", None])
+        self.assertEqual(job_id, self.broker.consume("worker 1")[0])
+        self.assertIsNone(self.broker.consume("worker 2"))
+
+        self.broker.jobLease = 0
+        self.assertEqual(job_id, self.broker.consume("worker 2")[0])
+
+        self.broker.jobLease = 600
+        second_job = self.broker.publish("example scan id", "sfp_hashes", ["second event", None])
+        self.assertIsNone(self.broker.consume("worker 1"))
+        self.assertEqual(second_job, self.broker.consume("worker 2")[0])
+
+    def test_release_should_put_jobs_taken_by_worker_back(self):
+        """
+        Test release(self, workerId)
+        """
+        job_id = self.broker.publish("example scan id", "sfp_hashes", ["example event", None])
+        self.assertEqual(job_id, self.broker.consume("worker 1")[0])
+
+        self.broker.release("worker 1")
+        self.assertEqual(job_id, self.broker.consume("worker 2")[0])
+
+    def test_worker_argument_threads_invalid_value_should_raise_ValueError(self):
+        """
+        Test SpiderFootBrokerWorker.__init__(self, broker, workerId=None, threads=4)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootBrokerWorker(self.broker, threads=0)
+
+    def test_pool_handleEvent_should_return_events_produced_by_module_in_worker(self):
+        """
+        Test SpiderFootBrokerPool.handleEvent(self, modName, sfEvent)
+        Test SpiderFootBrokerWorker.run(self, stopEvent)
+        """
+        scan_id = str(uuid.uuid4())
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        scan_stop_event = threading.Event()
+
+        pool = SpiderFootBrokerPool(self.broker, self.default_options, scan_id, target, scan_stop_event)
+        pool.addModule('sfp_hashes')
+        self.assertEqual(['sfp_hashes'], pool.modules)
+
+        worker_stop_event = threading.Event()
+        worker = SpiderFootBrokerWorker(self.broker, threads=2)
+        worker_thread = threading.Thread(target=worker.run, args=(worker_stop_event,))
+        worker_thread.start()
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        evt = SpiderFootEvent('TARGET_WEB_CONTENT', 'hash: 098f6bcd4621d373cade4e832627b4f6', 'sfp_spider', root_event)
+
+        try:
+            events, error_state = pool.handleEvent('sfp_hashes', evt)
+        finally:
+            pool.shutdown()
+            worker_stop_event.set()
+            worker_thread.join()
+
+        self.assertFalse(error_state)
+        self.assertEqual(1, len(events))
+        self.assertEqual('HASH', events[0].eventType)
+        self.assertEqual('[MD5] 098f6bcd4621d373cade4e832627b4f6', events[0].data)
+        self.assertIs(evt, events[0].sourceEvent)
+        self.assertIsNone(self.broker.scanGet(scan_id))
+
+    def test_pool_getTempStorage_should_return_module_storage_from_worker(self):
+        """
+        Test SpiderFootBrokerPool.addModule(self, modName, tempStorage=None)
+        Test SpiderFootBrokerPool.getTempStorage(self, modName)
+        """
+        scan_id = str(uuid.uuid4())
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        scan_stop_event = threading.Event()
+
+        pool = SpiderFootBrokerPool(self.broker, self.default_options, scan_id, target, scan_stop_event)
+        pool.addModule('sfp_iban', [{'example key': True}])
+        self.assertEqual([{'example key': True}], pool.getTempStorage('sfp_iban'))
+
+        worker_stop_event = threading.Event()
+        worker = SpiderFootBrokerWorker(self.broker, threads=2)
+        worker_thread = threading.Thread(target=worker.run, args=(worker_stop_event,))
+        worker_thread.start()
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+
+        try:
+            pool.handleEvent('sfp_iban', root_event)
+            temp_storage = pool.getTempStorage('sfp_iban')
+        finally:
+            pool.shutdown()
+            worker_stop_event.set()
+            worker_thread.join()
+
+        self.assertEqual([{'example key': True}], temp_storage)
+
+        with self.assertRaises(ValueError):
+            pool.getTempStorage('sfp_email')
+
+    def test_pool_handleEvent_with_events_in_flight_should_return_events_produced_for_each(self):
+        """
+        Test SpiderFootBrokerPool.handleEvent(self, modName, sfEvent)
+        Test SpiderFootBrokerWorker.run(self, stopEvent)
+        """
+        scan_id = str(uuid.uuid4())
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        scan_stop_event = threading.Event()
+
+        pool = SpiderFootBrokerPool(self.broker, self.default_options, scan_id, target, scan_stop_event)
+        pool.addModule('sfp_hashes')
+
+        worker_stop_event = threading.Event()
+        worker = SpiderFootBrokerWorker(self.broker, threads=2)
+        worker_thread = threading.Thread(target=worker.run, args=(worker_stop_event,))
+        worker_thread.start()
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        results = list()
+
+        def handle(i):
+            evt = SpiderFootEvent('TARGET_WEB_CONTENT', f"hash: {i:032x}", 'sfp_spider', root_event)
+            events, error_state = pool.handleEvent('sfp_hashes', evt)
+            results.append([e.data for e in events])
+
+        threads = [threading.Thread(target=handle, args=(i,)) for i in range(pool.jobsInFlight * 2)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            pool.shutdown()
+            worker_stop_event.set()
+            worker_thread.join()
+
+        self.assertEqual(sorted([[f"[MD5] {i:032x}"] for i in range(pool.jobsInFlight * 2)]), sorted(results))
+
+    def test_pool_handleEvent_should_return_error_state_when_module_stops_the_scan(self):
+        """
+        Test SpiderFootBrokerPool.handleEvent(self, modName, sfEvent)
+        Test SpiderFootBrokerWorker.run(self, stopEvent)
+        """
+        scan_id = str(uuid.uuid4())
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        scan_stop_event = threading.Event()
+
+        pool = SpiderFootBrokerPool(self.broker, self.default_options, scan_id, target, scan_stop_event)
+        pool.addModule('sfp_hashes')
+
+        worker_stop_event = threading.Event()
+        worker = SpiderFootBrokerWorker(self.broker, threads=1)
+        worker_thread = threading.Thread(target=worker.run, args=(worker_stop_event,))
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        evt = SpiderFootEvent('TARGET_WEB_CONTENT', 'hash: 098f6bcd4621d373cade4e832627b4f6', 'sfp_spider', root_event)
+
+        complete = self.broker.complete
+
+        def complete_once_failing(job_id, result):
+            # The job is taken back once its lease expires
+            self.broker.complete = complete
+            self.broker.jobLease = 0
+            raise IOError("example error")
+
+        try:
+            with mock.patch('modules.sfp_hashes.sfp_hashes.handleEvent', side_effect=SystemExit(-1)):
+                worker_thread.start()
+                events, error_state = pool.handleEvent('sfp_hashes', evt)
+
+                self.assertEqual([], events)
+                self.assertTrue(error_state)
+
+            self.broker.complete = complete_once_failing
+            events, error_state = pool.handleEvent('sfp_hashes', evt)
+        finally:
+            pool.shutdown()
+            worker_stop_event.set()
+            worker_thread.join()
+
+        self.assertEqual(1, len(events))
+
+    def test_pool_handleEvent_should_stop_waiting_when_scan_is_stopped(self):
+        """
+        Test SpiderFootBrokerPool.handleEvent(self, modName, sfEvent)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        scan_stop_event = threading.Event()
+        scan_stop_event.set()
+
+        pool = SpiderFootBrokerPool(self.broker, self.default_options, "example scan id", target, scan_stop_event)
+        pool.addModule('sfp_hashes')
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        self.assertEqual((list(), False), pool.handleEvent('sfp_hashes', root_event))
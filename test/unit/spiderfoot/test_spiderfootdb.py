@@ -1,5 +1,8 @@
 # test_spiderfootdb.py
+import os
+import tempfile
 import unittest
+import uuid
 
 from spiderfoot import SpiderFootDb, SpiderFootEvent
 
@@ -166,6 +169,34 @@ class TestSpiderFootDb(unittest.TestCase):
 
         self.assertEqual('TBD', 'TBD')
 
+    def test_scanLogEvents_should_create_scan_log_events(self):
+        """
+        Test scanLogEvents(self, logEvents)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        sfdb.scanLogEvents([
+            (instance_id, 1000.0, 'example component', 'INFO', 'example message'),
+            (instance_id, 2000.0, 'SpiderFoot', 'ERROR', 'example error')
+        ])
+
+        logs = sfdb.scanLogs(instance_id)
+        self.assertEqual([(2000.0, 'SpiderFoot', 'ERROR', 'example error'), (1000.0, 'example component', 'INFO', 'example message')],
+                         [row[:4] for row in logs])
+
+    def test_scanLogEvents_argument_logEvents_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanLogEvents(self, logEvents)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, "", dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanLogEvents(invalid_type)
+
     def test_scanLogEvent_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
         """
         Test scanLogEvent(self, instanceId, classification, message, component=None)
@@ -362,6 +393,98 @@ class TestSpiderFootDb(unittest.TestCase):
         scan_results_summary = sfdb.scanResultSummary(instance_id, "type")
         self.assertIsInstance(scan_results_summary, list)
 
+    def test_scanResultSummary_should_count_stored_results(self):
+        """
+        Test scanResultSummary(self, instanceId, by="type")
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        sfdb.scanEventStore(instance_id, root_event)
+        for data, module in [('1.1.1.1', 'sfp_a'), ('1.1.1.1', 'sfp_b'), ('2.2.2.2', 'sfp_a')]:
+            sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', data, module, root_event))
+
+        by_type = {row[0]: row[3:] for row in sfdb.scanResultSummary(instance_id, "type")}
+        self.assertEqual({'ROOT': (1, 1), 'IP_ADDRESS': (3, 2)}, by_type)
+
+        by_module = {row[0]: row[3:] for row in sfdb.scanResultSummary(instance_id, "module")}
+        self.assertEqual({'': (1, 1), 'sfp_a': (2, 2), 'sfp_b': (1, 1)}, by_module)
+
+        sfdb.scanInstanceDelete(instance_id)
+        self.assertEqual([], sfdb.scanResultSummary(instance_id, "type"))
+
+    def test_scanResultSummary_should_count_results_of_databases_created_before_the_summary(self):
+        """
+        Test scanResultSummary(self, instanceId, by="type")
+        """
+        with tempfile.TemporaryDirectory() as tmpDir:
+            opts = dict(self.default_options, __database=os.path.join(tmpDir, 'summary.db'))
+            sfdb = SpiderFootDb(opts, False)
+
+            instance_id = str(uuid.uuid4())
+            sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+            root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+            sfdb.scanEventStore(instance_id, root_event)
+            sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'sfp_a', root_event))
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_values")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_pending")
+            sfdb.conn.commit()
+            sfdb.close()
+
+            sfdb = SpiderFootDb(opts, False)
+            by_type = {row[0]: row[3:] for row in sfdb.scanResultSummary(instance_id, "type")}
+            self.assertEqual({'ROOT': (1, 1), 'IP_ADDRESS': (1, 1)}, by_type)
+            sfdb.close()
+
+    def test_scanInstanceList_should_count_results_of_databases_created_before_the_summary(self):
+        """
+        Test scanInstanceList(self)
+        """
+        with tempfile.TemporaryDirectory() as tmpDir:
+            opts = dict(self.default_options, __database=os.path.join(tmpDir, 'summary.db'))
+            sfdb = SpiderFootDb(opts, False)
+
+            instance_id = str(uuid.uuid4())
+            sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+            root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+            sfdb.scanEventStore(instance_id, root_event)
+            sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'sfp_a', root_event))
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_values")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_pending")
+            sfdb.conn.commit()
+            sfdb.close()
+
+            sfdb = SpiderFootDb(opts, False)
+            sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_summary_pending")
+            self.assertEqual(1, sfdb.dbh.fetchone()[0])
+
+            scans = {row[0]: row[7] for row in sfdb.scanInstanceList()}
+            self.assertEqual({instance_id: 1}, scans)
+
+            sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_summary_pending")
+            self.assertEqual(0, sfdb.dbh.fetchone()[0])
+            sfdb.close()
+
+    def test_init_failed_upgrade_should_raise_IOError_without_setting_up_the_schema(self):
+        """
+        Test __init__(self, opts, init=False)
+        """
+        with tempfile.TemporaryDirectory() as tmpDir:
+            opts = dict(self.default_options, __database=os.path.join(tmpDir, 'upgrade.db'))
+            sfdb = SpiderFootDb(opts, False)
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary")
+            sfdb.dbh.execute("DROP TABLE tbl_scan_summary_pending")
+            sfdb.dbh.execute("CREATE TABLE tbl_scan_summary_pending (guid VARCHAR)")
+            sfdb.conn.commit()
+            sfdb.close()
+
+            with self.assertRaises(IOError) as cm:
+                SpiderFootDb(opts, False)
+            self.assertIn("upgrade", str(cm.exception))
+
     def test_scanResultSummary_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
         """
         Test scanResultSummary(self, instanceId, by="type")
@@ -476,6 +599,34 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanResultEventUnique(instance_id, invalid_type, None)
 
+    def test_scanResultEventStream_should_return_events_in_stored_order(self):
+        """
+        Test scanResultEventStream(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        event = SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', root_event)
+        sfdb.scanEventStore(instance_id, root_event)
+        sfdb.scanEventStore(instance_id, event)
+
+        events = sfdb.scanResultEventStream(instance_id)
+        self.assertEqual(['ROOT', event.hash], [e[0] for e in events])
+        self.assertEqual(('IP_ADDRESS', '1.1.1.1', 'example module', 'ROOT'), (events[1][1], events[1][7], events[1][6], events[1][8]))
+
+    def test_scanResultEventStream_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanResultEventStream(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanResultEventStream(invalid_type)
+
     def test_scanLogs_should_return_a_list(self):
         """
         Test scanLogs(self, instanceId, limit=None, fromRowId=None, reverse=False)
@@ -694,6 +845,233 @@ class TestSpiderFootDb(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfdb.scanConfigGet(invalid_type)
 
+    def test_scanCheckpointSet_should_save_a_checkpoint(self):
+        """
+        Test scanCheckpointSet(self, instanceId, moduleStates, events, queuedEvents, dedupState=None)
+        Test scanCheckpointGet(self, instanceId)
+        Test scanCheckpointDelete(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        event = SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', root_event)
+        sfdb.scanEventStore(instance_id, root_event)
+
+        self.assertIsNone(sfdb.scanCheckpointGet(instance_id))
+
+        sfdb.scanCheckpointSet(instance_id, {'sfp_example': '[{}]'}, [root_event, event], [(event.hash, 'sfp_example', False)], '{"bloomSize": 0}')
+        checkpoint = sfdb.scanCheckpointGet(instance_id)
+
+        self.assertIsInstance(checkpoint, dict)
+        self.assertGreater(checkpoint['lastResultRowId'], 0)
+        self.assertEqual({'sfp_example': '[{}]'}, checkpoint['moduleStates'])
+        self.assertEqual('{"bloomSize": 0}', checkpoint['dedupState'])
+        self.assertEqual(['ROOT', event.hash], [row[0] for row in checkpoint['events']])
+        self.assertEqual([(event.hash, 'sfp_example', False)], checkpoint['queuedEvents'])
+
+        sfdb.scanCheckpointDelete(instance_id)
+        self.assertIsNone(sfdb.scanCheckpointGet(instance_id))
+
+    def test_scanCheckpointSet_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanCheckpointSet(self, instanceId, moduleStates, events, queuedEvents, dedupState=None)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanCheckpointSet(invalid_type, dict(), list(), list())
+
+    def test_scanCheckpointGet_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanCheckpointGet(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanCheckpointGet(invalid_type)
+
+    def test_scanModuleStatsSet_should_save_module_stats(self):
+        """
+        Test scanModuleStatsSet(self, instanceId, moduleStats)
+        Test scanModuleStatsGet(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+
+        self.assertEqual(dict(), sfdb.scanModuleStatsGet(instance_id))
+
+        stats = {
+            'handled': 2,
+            'wallTime': 1.5,
+            'cpuTime': 0.5,
+            'queueWait': 0.25,
+            'received': {'INTERNET_NAME': 2},
+            'emitted': {'IP_ADDRESS': 3},
+            'httpRequests': 4,
+            'httpBytes': 1024,
+            'dnsQueries': 2
+        }
+        sfdb.scanModuleStatsSet(instance_id, {'sfp_example': stats})
+        self.assertEqual({'sfp_example': stats}, sfdb.scanModuleStatsGet(instance_id))
+
+        stats['handled'] = 3
+        sfdb.scanModuleStatsSet(instance_id, {'sfp_example': stats})
+        self.assertEqual({'sfp_example': stats}, sfdb.scanModuleStatsGet(instance_id))
+
+    def test_scanModuleStatsSet_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanModuleStatsSet(self, instanceId, moduleStats)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanModuleStatsSet(invalid_type, dict())
+
+    def test_scanModuleStatsGet_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanModuleStatsGet(self, instanceId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanModuleStatsGet(invalid_type)
+
+    def test_scanResultDeleteAfter_should_delete_results_stored_after_checkpoint(self):
+        """
+        Test scanResultDeleteAfter(self, instanceId, lastResultRowId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        sfdb.scanEventStore(instance_id, root_event)
+        sfdb.scanCheckpointSet(instance_id, dict(), list(), list())
+        checkpoint = sfdb.scanCheckpointGet(instance_id)
+
+        event = SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', root_event)
+        sfdb.scanEventStore(instance_id, event)
+        self.assertEqual(2, len(sfdb.scanResultEvent(instance_id)))
+
+        sfdb.scanResultDeleteAfter(instance_id, checkpoint['lastResultRowId'])
+        self.assertEqual(['ROOT'], [row[4] for row in sfdb.scanResultEvent(instance_id)])
+        self.assertEqual(['ROOT'], [row[0] for row in sfdb.scanResultSummary(instance_id, "type")])
+
+    def test_scanResultDeleteAfter_argument_lastResultRowId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanResultDeleteAfter(self, instanceId, lastResultRowId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, "", list(), dict()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanResultDeleteAfter("example instance id", invalid_type)
+
+    def test_scanQueueAdd_should_queue_a_scan(self):
+        """
+        Test scanQueueAdd(self, instanceId, targetType, resume=False)
+        Test scanQueueGet(self, instanceId)
+        Test scanQueueList(self)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        sfdb.scanQueueAdd(instance_id, 'INTERNET_NAME')
+
+        self.assertEqual('QUEUED', sfdb.scanInstanceGet(instance_id)[5])
+        target_type, resume, queued, started, worker = sfdb.scanQueueGet(instance_id)
+        self.assertEqual('INTERNET_NAME', target_type)
+        self.assertFalse(resume)
+        self.assertEqual(0, started)
+        self.assertIsNone(worker)
+        self.assertIn(instance_id, [row[0] for row in sfdb.scanQueueList()])
+
+        sfdb.scanQueueRemove(instance_id)
+        self.assertIsNone(sfdb.scanQueueGet(instance_id))
+
+    def test_scanQueueAdd_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanQueueAdd(self, instanceId, targetType, resume=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanQueueAdd(invalid_type, 'INTERNET_NAME')
+
+    def test_scanQueueNext_should_take_the_oldest_waiting_scan(self):
+        """
+        Test scanQueueNext(self, workerId)
+        Test scanQueueRemove(self, instanceId, waitingOnly=False)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        # Take any scans left in the queue by other tests
+        while sfdb.scanQueueNext('example worker') is not None:
+            pass
+
+        instance_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        for instance_id in instance_ids:
+            sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+            sfdb.scanQueueAdd(instance_id, 'IP_ADDRESS', resume=True)
+
+        self.assertEqual([instance_ids[0], 'IP_ADDRESS', True], sfdb.scanQueueNext('example worker'))
+        self.assertEqual('example worker', sfdb.scanQueueGet(instance_ids[0])[4])
+        self.assertFalse(sfdb.scanQueueRemove(instance_ids[0], waitingOnly=True))
+
+        self.assertTrue(sfdb.scanQueueRemove(instance_ids[1], waitingOnly=True))
+        self.assertIsNone(sfdb.scanQueueNext('example worker'))
+
+        self.assertTrue(sfdb.scanQueueRemove(instance_ids[0]))
+
+    def test_scanQueueNext_argument_workerId_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test scanQueueNext(self, workerId)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfdb.scanQueueNext(invalid_type)
+
+    def test_scanQueueReset_should_abort_scans_taken_by_workers(self):
+        """
+        Test scanQueueReset(self)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        while sfdb.scanQueueNext('example worker') is not None:
+            pass
+
+        instance_id = str(uuid.uuid4())
+        sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+        sfdb.scanQueueAdd(instance_id, 'IP_ADDRESS')
+        sfdb.scanQueueNext('example worker')
+        sfdb.scanInstanceSet(instance_id, status='RUNNING')
+
+        self.assertIn(instance_id, sfdb.scanQueueReset())
+        self.assertEqual('ABORTED', sfdb.scanInstanceGet(instance_id)[5])
+        self.assertIsNone(sfdb.scanQueueGet(instance_id))
+
     def test_scanEventStore_should_store_a_scan_event(self):
         """
         Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
@@ -708,6 +1086,109 @@ class TestSpiderFootDb(unittest.TestCase):
         instance_id = "example instance id"
         sfdb.scanEventStore(instance_id, event)
 
+    def test_scanEventStore_should_buffer_events_until_batch_is_full(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        opts = dict(self.default_options, _eventbatchsize=3, _eventbatchinterval=3600)
+        sfdb = SpiderFootDb(opts, False)
+        reader = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        sfdb.scanEventStore(instance_id, root_event)
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', root_event))
+        self.assertEqual(0, len(reader.scanResultEventStream(instance_id)))
+
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('IP_ADDRESS', '2.2.2.2', 'example module', root_event))
+        self.assertEqual(3, len(reader.scanResultEventStream(instance_id)))
+
+    def test_scanEventFlush_should_write_buffered_events(self):
+        """
+        Test scanEventFlush(self, due=False)
+        """
+        opts = dict(self.default_options, _eventbatchsize=100, _eventbatchinterval=3600)
+        sfdb = SpiderFootDb(opts, False)
+        reader = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('ROOT', 'example data', '', None))
+
+        sfdb.scanEventFlush(due=True)
+        self.assertEqual(0, len(reader.scanResultEventStream(instance_id)))
+
+        sfdb.scanEventFlush()
+        self.assertEqual(1, len(reader.scanResultEventStream(instance_id)))
+
+    def test_close_should_write_buffered_events(self):
+        """
+        Test close(self)
+        """
+        opts = dict(self.default_options, _eventbatchsize=100, _eventbatchinterval=3600)
+        sfdb = SpiderFootDb(opts, False)
+        reader = SpiderFootDb(self.default_options, False)
+
+        instance_id = str(uuid.uuid4())
+        sfdb.scanEventStore(instance_id, SpiderFootEvent('ROOT', 'example data', '', None))
+        sfdb.close()
+
+        self.assertEqual(1, len(reader.scanResultEventStream(instance_id)))
+
+    def test_scanEventStore_large_data_should_be_stored_in_blob_table(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        sfdb = SpiderFootDb(dict(self.default_options, _blobthreshold=100), False)
+
+        instance_id = str(uuid.uuid4())
+        large_data = "example large data " * 100
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        event = SpiderFootEvent('RAW_RIR_DATA', large_data, 'example module', root_event)
+        sfdb.scanEventStore(instance_id, root_event)
+        sfdb.scanEventStore(instance_id, event)
+
+        sfdb.dbh.execute("SELECT data, blob_hash FROM tbl_scan_results WHERE scan_instance_id = ? AND hash = ?", [instance_id, event.hash])
+        data, blob_hash = sfdb.dbh.fetchone()
+        self.assertIsNone(data)
+        self.assertIsNotNone(blob_hash)
+
+        self.assertEqual(large_data, sfdb.scanResultEvent(instance_id, 'RAW_RIR_DATA')[0][1])
+        self.assertEqual(large_data, sfdb.scanResultEventStream(instance_id)[1][7])
+        self.assertEqual(large_data, sfdb.scanResultEventUnique(instance_id, 'RAW_RIR_DATA')[0][0])
+
+        results = sfdb.search({'scan_id': instance_id, 'value': '%example large data%'})
+        self.assertEqual([large_data], [result[1] for result in results])
+
+        sfdb.scanInstanceDelete(instance_id)
+
+    def test_scanEventStore_identical_large_data_should_be_stored_once(self):
+        """
+        Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
+        """
+        sfdb = SpiderFootDb(dict(self.default_options, _blobthreshold=100), False)
+
+        instance_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        large_data = f"example large data {uuid.uuid4()} " * 100
+        for instance_id in instance_ids:
+            root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+            sfdb.scanEventStore(instance_id, root_event)
+            sfdb.scanEventStore(instance_id, SpiderFootEvent('RAW_RIR_DATA', large_data, 'example module', root_event))
+
+        sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_blobs b, tbl_scan_results r \
+            WHERE b.hash = r.blob_hash AND r.scan_instance_id IN (?, ?)", instance_ids)
+        self.assertEqual(2, sfdb.dbh.fetchone()[0])
+        sfdb.dbh.execute("SELECT COUNT(DISTINCT blob_hash) FROM tbl_scan_results WHERE scan_instance_id IN (?, ?)", instance_ids)
+        self.assertEqual(1, sfdb.dbh.fetchone()[0])
+
+        # The data is kept until no scan refers to it
+        sfdb.scanInstanceDelete(instance_ids[0])
+        self.assertEqual(large_data, sfdb.scanResultEventStream(instance_ids[1])[1][7])
+
+        sfdb.scanInstanceDelete(instance_ids[1])
+        sfdb.dbh.execute("SELECT COUNT(*) FROM tbl_scan_blobs b WHERE NOT EXISTS \
+            (SELECT 1 FROM tbl_scan_results r WHERE r.blob_hash = b.hash)")
+        self.assertEqual(0, sfdb.dbh.fetchone()[0])
+
     def test_scanEventStore_argument_instanceId_of_invalid_type_should_raise_TypeError(self):
         """
         Test scanEventStore(self, instanceId, sfEvent, truncateSize=0)
@@ -1081,6 +1562,28 @@ class TestSpiderFootDb(unittest.TestCase):
         scan_instances = sfdb.scanInstanceList()
         self.assertIsInstance(scan_instances, list)
 
+    def test_scanInstanceList_should_count_results_other_than_root(self):
+        """
+        Test scanInstanceList(self)
+        """
+        sfdb = SpiderFootDb(self.default_options, False)
+
+        instance_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        for instance_id in instance_ids:
+            sfdb.scanInstanceCreate(instance_id, 'example scan name', 'example scan target')
+
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        sfdb.scanEventStore(instance_ids[0], root_event)
+        sfdb.scanEventStore(instance_ids[0], SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'sfp_a', root_event))
+        sfdb.scanEventStore(instance_ids[0], SpiderFootEvent('IP_ADDRESS', '2.2.2.2', 'sfp_a', root_event))
+
+        counts = {row[0]: row[7] for row in sfdb.scanInstanceList()}
+        self.assertEqual(2, counts[instance_ids[0]])
+        self.assertEqual(0, counts[instance_ids[1]])
+
+        for instance_id in instance_ids:
+            sfdb.scanInstanceDelete(instance_id)
+
     def test_scanResultHistory_should_return_a_list(self):
         """
         Test scanResultHistory(self, instanceId)
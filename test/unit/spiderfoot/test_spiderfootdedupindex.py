@@ -0,0 +1,97 @@
+# test_spiderfootdedupindex.py
+import json
+import unittest
+
+from spiderfoot import SpiderFootDedupIndex, SpiderFootEvent
+
+
+class TestSpiderFootDedupIndex(unittest.TestCase):
+    """
+    Test SpiderFootDedupIndex
+    """
+
+    def event(self, eventType, eventData):
+        source_event = SpiderFootEvent("ROOT", "example data", '', "")
+        return SpiderFootEvent(eventType, eventData, "example module", source_event)
+
+    def test_init_argument_bloomSize_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, bloomSize=0, errorRate=0.001)
+        """
+        invalid_types = [None, "", list(), dict(), float()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootDedupIndex(invalid_type)
+
+    def test_init_argument_bloomSize_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, bloomSize=0, errorRate=0.001)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootDedupIndex(-1)
+
+    def test_init_argument_errorRate_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, bloomSize=0, errorRate=0.001)
+        """
+        invalid_values = [0.0, 1.0, -0.5]
+        for invalid_value in invalid_values:
+            with self.subTest(invalid_value=invalid_value):
+                with self.assertRaises(ValueError):
+                    SpiderFootDedupIndex(1000, invalid_value)
+
+    def test_add_argument_sfEvent_invalid_type_should_raise_TypeError(self):
+        """
+        Test add(self, moduleName, sfEvent)
+        """
+        dedup_index = SpiderFootDedupIndex()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    dedup_index.add("example module", invalid_type)
+
+    def test_add_should_return_false_for_duplicate_events_per_module(self):
+        """
+        Test add(self, moduleName, sfEvent)
+        """
+        for bloom_size in [0, 1000]:
+            with self.subTest(bloom_size=bloom_size):
+                dedup_index = SpiderFootDedupIndex(bloom_size)
+
+                self.assertTrue(dedup_index.add("sfp_one", self.event("IP_ADDRESS", "1.1.1.1")))
+                self.assertFalse(dedup_index.add("sfp_one", self.event("IP_ADDRESS", "1.1.1.1")))
+                self.assertTrue(dedup_index.add("sfp_two", self.event("IP_ADDRESS", "1.1.1.1")))
+                self.assertTrue(dedup_index.add("sfp_one", self.event("IP_ADDRESS", "1.1.1.2")))
+                self.assertTrue(dedup_index.add("sfp_one", self.event("AFFILIATE_IPADDR", "1.1.1.1")))
+                self.assertTrue(dedup_index.add("sfp_one", self.event("INTERNET_NAME", "Example.com")))
+                self.assertFalse(dedup_index.add("sfp_one", self.event("INTERNET_NAME", "example.com")))
+
+    def test_restoreState_should_restore_the_events_in_the_index(self):
+        """
+        Test getState(self)
+        Test restoreState(self, state)
+        """
+        for bloom_size in [0, 1000]:
+            with self.subTest(bloom_size=bloom_size):
+                index = SpiderFootDedupIndex(bloom_size)
+                index.add("sfp_example", self.event("IP_ADDRESS", "1.1.1.1"))
+
+                restored = SpiderFootDedupIndex(bloom_size)
+                restored.restoreState(json.loads(json.dumps(index.getState())))
+
+                self.assertFalse(restored.add("sfp_example", self.event("IP_ADDRESS", "1.1.1.1")))
+                self.assertTrue(restored.add("sfp_example", self.event("IP_ADDRESS", "2.2.2.2")))
+
+    def test_restoreState_argument_state_of_index_of_other_size_should_raise_ValueError(self):
+        """
+        Test restoreState(self, state)
+        """
+        index = SpiderFootDedupIndex(1000)
+        with self.assertRaises(ValueError):
+            index.restoreState(SpiderFootDedupIndex(0).getState())
+
+        with self.assertRaises(ValueError):
+            index.restoreState(SpiderFootDedupIndex(2000).getState())
@@ -382,3 +382,43 @@ class TestSpiderFootEvent(unittest.TestCase):
         evt_hash = evt.getHash()
 
         self.assertIsInstance(evt_hash, str)
+
+    def test_fingerprint_attribute_should_ignore_data_case(self):
+        """
+        Test fingerprint(self)
+        """
+        root_event = SpiderFootEvent('ROOT', 'example data', '', '')
+        evt = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'example module', root_event)
+        evt_upper = SpiderFootEvent('INTERNET_NAME', 'WWW.EXAMPLE.COM', 'example module', root_event)
+        evt_other_type = SpiderFootEvent('DOMAIN_NAME', 'www.example.com', 'example module', root_event)
+
+        self.assertIsInstance(evt.fingerprint, bytes)
+        self.assertEqual(evt.fingerprint, evt_upper.fingerprint)
+        self.assertNotEqual(evt.fingerprint, evt_other_type.fingerprint)
+
+    def test_repeatsAncestor_should_return_a_boolean(self):
+        """
+        Test repeatsAncestor(self)
+        """
+        root_event = SpiderFootEvent('ROOT', 'example data', '', '')
+        self.assertFalse(root_event.repeatsAncestor())
+
+        evt = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'example module', root_event)
+        self.assertFalse(evt.repeatsAncestor())
+
+        # The direct source event is not considered
+        child = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'example module', evt)
+        self.assertFalse(child.repeatsAncestor())
+
+        evt = SpiderFootEvent('RAW_RIR_DATA', 'example raw data', 'example module', evt)
+        for _ in range(20):
+            evt = SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', evt)
+
+        child = SpiderFootEvent('INTERNET_NAME', 'WWW.EXAMPLE.COM', 'example module', evt)
+        self.assertTrue(child.repeatsAncestor())
+
+        child = SpiderFootEvent('DOMAIN_NAME', 'www.example.com', 'example module', evt)
+        self.assertFalse(child.repeatsAncestor())
+
+        child = SpiderFootEvent('IP_ADDRESS', '2.2.2.2', 'example module', evt)
+        self.assertFalse(child.repeatsAncestor())
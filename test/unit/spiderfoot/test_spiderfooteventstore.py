@@ -0,0 +1,145 @@
+# test_spiderfooteventstore.py
+import unittest
+
+from spiderfoot import SpiderFootEvent, SpiderFootEventStore
+
+
+class TestSpiderFootEventStore(unittest.TestCase):
+    """
+    Test SpiderFootEventStore
+    """
+
+    def test_init_argument_spillSize_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, spillSize=1024)
+        """
+        invalid_types = [None, "", list(), dict(), float()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootEventStore(invalid_type)
+
+    def test_init_argument_spillSize_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, spillSize=1024)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootEventStore(-1)
+
+    def test_add_argument_sfEvent_invalid_type_should_raise_TypeError(self):
+        """
+        Test add(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    event_store.add(invalid_type)
+
+    def test_add_should_reference_source_event_by_hash(self):
+        """
+        Test add(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore()
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        event_store.add(root_event)
+
+        evt = SpiderFootEvent("IP_ADDRESS", "1.1.1.1", "example module", root_event)
+        event_store.add(evt)
+
+        self.assertIsNone(evt._sourceEvent)
+        self.assertEqual(root_event, evt.sourceEvent)
+        self.assertIsNone(root_event.sourceEvent)
+        self.assertEqual(evt, event_store.get(evt.hash))
+        self.assertEqual(2, len(event_store))
+
+    def test_add_should_keep_reference_to_source_event_not_in_store(self):
+        """
+        Test add(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore()
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        evt = SpiderFootEvent("IP_ADDRESS", "1.1.1.1", "example module", root_event)
+        event_store.add(evt)
+
+        self.assertEqual(root_event, evt.sourceEvent)
+
+    def test_handled_should_spill_large_event_data_once_handled_by_all_modules(self):
+        """
+        Test handled(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore(16)
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        event_data = "example web content ☃ " * 4
+        evt = SpiderFootEvent("TARGET_WEB_CONTENT", event_data, "example module", root_event)
+        fingerprint = evt.fingerprint
+
+        event_store.add(evt)
+        event_store.queued(evt)
+        event_store.handled(evt)
+        self.assertIsNotNone(evt._data)
+
+        event_store.handled(evt)
+        self.assertIsNone(evt._data)
+        self.assertEqual(event_data, evt.data)
+        self.assertEqual(fingerprint, evt.fingerprint)
+
+        event_store.close()
+        self.assertIsNone(evt.data)
+
+    def test_handled_should_not_spill_small_event_data(self):
+        """
+        Test handled(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore(16)
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        evt = SpiderFootEvent("IP_ADDRESS", "1.1.1.1", "example module", root_event)
+
+        event_store.add(evt)
+        event_store.handled(evt)
+        self.assertEqual("1.1.1.1", evt._data)
+
+    def test_handled_should_remove_events_no_longer_referenced(self):
+        """
+        Test handled(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore()
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        event_store.add(root_event)
+        evt = SpiderFootEvent("IP_ADDRESS", "1.1.1.1", "example module", root_event)
+        event_store.add(evt)
+
+        # The source event is kept while an event referencing it is pending
+        event_store.handled(root_event)
+        self.assertEqual(2, len(event_store))
+        self.assertEqual(root_event, evt.sourceEvent)
+
+        event_store.handled(evt)
+        self.assertEqual(0, len(event_store))
+        self.assertIsNone(event_store.get(root_event.hash))
+
+        # Events removed from the store reference their source event directly
+        self.assertEqual(root_event, evt._sourceEvent)
+        self.assertEqual(root_event, evt.sourceEvent)
+
+    def test_handled_should_keep_events_queued_for_other_modules(self):
+        """
+        Test handled(self, sfEvent)
+        """
+        event_store = SpiderFootEventStore()
+
+        root_event = SpiderFootEvent("ROOT", "example data", '', None)
+        event_store.add(root_event)
+        event_store.queued(root_event)
+        event_store.handled(root_event)
+        self.assertEqual(root_event, event_store.get(root_event.hash))
+
+        event_store.handled(root_event)
+        self.assertEqual(0, len(event_store))
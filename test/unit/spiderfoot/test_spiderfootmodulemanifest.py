@@ -0,0 +1,90 @@
+# test_spiderfootmodulemanifest.py
+import json
+import os
+import tempfile
+import unittest
+
+from sflib import SpiderFoot
+from spiderfoot import SpiderFootModuleManifest
+
+
+class TestSpiderFootModuleManifest(unittest.TestCase):
+    """
+    Test SpiderFootModuleManifest
+    """
+
+    module_dir = SpiderFoot.myPath() + '/modules/'
+
+    def test_init_argument_moduleDir_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, moduleDir, cacheFile=None)
+        """
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootModuleManifest(invalid_type)
+
+    def test_init_argument_moduleDir_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, moduleDir, cacheFile=None)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootModuleManifest(self.module_dir + 'example non-existent directory')
+
+    def test_moduleFiles_should_return_a_list_of_module_names(self):
+        """
+        Test moduleFiles(self)
+        """
+        manifest = SpiderFootModuleManifest(self.module_dir)
+        module_names = manifest.moduleFiles()
+
+        self.assertIn('sfp__stor_db', module_names)
+        self.assertNotIn('sfp_template', module_names)
+
+    def test_load_should_only_import_new_or_changed_modules(self):
+        """
+        Test load(self)
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_file = os.path.join(cache_dir, 'modules.json')
+
+            manifest = SpiderFootModuleManifest(self.module_dir, cache_file)
+            modules = manifest.load()
+            self.assertEqual(sorted(modules.keys()), sorted(manifest.imported))
+            self.assertTrue(os.path.isfile(cache_file))
+
+            module = modules['sfp__stor_db']
+            for key in ['name', 'cats', 'group', 'labels', 'descr', 'provides', 'consumes', 'meta', 'opts', 'optdescs']:
+                self.assertIn(key, module)
+            self.assertIn('maxinflight', module['opts'])
+            self.assertIn('priority', module['optdescs'])
+
+            manifest = SpiderFootModuleManifest(self.module_dir, cache_file)
+            self.assertEqual(modules, manifest.load())
+            self.assertEqual([], manifest.imported)
+
+            # Simulate a change to a module
+            with open(cache_file, 'r') as f:
+                cache = json.load(f)
+            cache['modules']['sfp__stor_db']['file'] = {'mtime': 0, 'size': 0, 'hash': ''}
+            with open(cache_file, 'w') as f:
+                json.dump(cache, f)
+
+            manifest = SpiderFootModuleManifest(self.module_dir, cache_file)
+            self.assertEqual(modules, manifest.load())
+            self.assertEqual(['sfp__stor_db'], manifest.imported)
+
+    def test_load_with_invalid_cache_file_should_import_modules(self):
+        """
+        Test load(self)
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_file = os.path.join(cache_dir, 'modules.json')
+            with open(cache_file, 'w') as f:
+                f.write('example invalid cache')
+
+            manifest = SpiderFootModuleManifest(self.module_dir, cache_file)
+            modules = manifest.load()
+            self.assertIn('sfp__stor_db', modules)
+            self.assertIn('sfp__stor_db', manifest.imported)
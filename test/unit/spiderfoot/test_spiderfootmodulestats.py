@@ -0,0 +1,92 @@
+# test_spiderfootmodulestats.py
+import unittest
+
+from spiderfoot import SpiderFootEvent, SpiderFootModuleStats
+
+
+class TestSpiderFootModuleStats(unittest.TestCase):
+    """
+    Test SpiderFootModuleStats
+    """
+
+    def test_init_argument_stats_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, stats=None)
+        """
+        invalid_types = ["", list(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootModuleStats(invalid_type)
+
+    def test_init_argument_stats_should_carry_on_from_stats(self):
+        """
+        Test __init__(self, stats=None)
+        """
+        stats = SpiderFootModuleStats()
+        stats.eventEmitted('IP_ADDRESS')
+        stats.dnsQuery()
+
+        carried = SpiderFootModuleStats(stats.asDict())
+        self.assertEqual(stats.asDict(), carried.asDict())
+
+    def test_handling_should_count_event_and_requests_made_meanwhile(self):
+        """
+        Test handling(self, sfEvent, measureCpu=True)
+        """
+        stats = SpiderFootModuleStats()
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+        root_event._dispatched = 0
+
+        self.assertIsNone(SpiderFootModuleStats.current())
+
+        with stats.handling(root_event):
+            self.assertIs(stats, SpiderFootModuleStats.current())
+            SpiderFootModuleStats.current().httpRequest()
+            SpiderFootModuleStats.current().httpReceived(100)
+            SpiderFootModuleStats.current().dnsQuery()
+
+        self.assertIsNone(SpiderFootModuleStats.current())
+
+        self.assertEqual(1, stats.handled)
+        self.assertEqual({'ROOT': 1}, stats.received)
+        self.assertGreater(stats.queueWait, 0)
+        self.assertGreaterEqual(stats.wallTime, 0)
+        self.assertEqual(1, stats.httpRequests)
+        self.assertEqual(100, stats.httpBytes)
+        self.assertEqual(1, stats.dnsQueries)
+
+    def test_handling_should_count_event_which_raised_an_exception(self):
+        """
+        Test handling(self, sfEvent, measureCpu=True)
+        """
+        stats = SpiderFootModuleStats()
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+
+        with self.assertRaises(ValueError):
+            with stats.handling(root_event, measureCpu=False):
+                raise ValueError('example error')
+
+        self.assertEqual(1, stats.handled)
+        self.assertEqual(0, stats.cpuTime)
+        self.assertEqual(0, stats.queueWait)
+
+    def test_addUsage_should_add_usage_of_other_stats(self):
+        """
+        Test usage(self)
+        Test addUsage(self, usage)
+        """
+        other = SpiderFootModuleStats()
+        other.httpRequest()
+        other.httpReceived(10)
+        other.dnsQuery()
+
+        stats = SpiderFootModuleStats()
+        stats.addUsage(other.usage())
+        stats.addUsage(other.usage())
+        stats.addUsage(None)
+
+        self.assertEqual(2, stats.httpRequests)
+        self.assertEqual(20, stats.httpBytes)
+        self.assertEqual(2, stats.dnsQueries)
+        self.assertEqual(0, stats.handled)
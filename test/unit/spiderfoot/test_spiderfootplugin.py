@@ -1,7 +1,11 @@
 # test_spiderfootplugin.py
+import asyncio
+import queue
+import threading
+import time
 import unittest
 
-from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget
+from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootEventStore, SpiderFootModuleStats, SpiderFootPlugin, SpiderFootTarget, SpiderFootWorkerBudget
 
 
 class TestSpiderFootPlugin(unittest.TestCase):
@@ -135,6 +139,95 @@ class TestSpiderFootPlugin(unittest.TestCase):
                 with self.assertRaises(TypeError):
                     sfp.setScanId(invalid_type)
 
+    def test_setStopEvent_argument_stopEvent_should_set_stop_event(self):
+        """
+        Test setStopEvent(self, stopEvent)
+        """
+        sfp = SpiderFootPlugin()
+
+        stop_event = threading.Event()
+        sfp.setStopEvent(stop_event)
+        self.assertEqual(stop_event, sfp.__stopEvent__)
+
+    def test_setStopEvent_argument_stopEvent_invalid_type_should_raise_TypeError(self):
+        """
+        Test setStopEvent(self, stopEvent)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setStopEvent(invalid_type)
+
+    def test_setEventLoop_argument_eventLoop_should_set_event_loop(self):
+        """
+        Test setEventLoop(self, eventLoop)
+        """
+        sfp = SpiderFootPlugin()
+
+        event_loop = asyncio.new_event_loop()
+        sfp.setEventLoop(event_loop)
+        self.assertEqual(event_loop, sfp.__eventLoop__)
+        event_loop.close()
+
+    def test_setEventLoop_argument_eventLoop_invalid_type_should_raise_TypeError(self):
+        """
+        Test setEventLoop(self, eventLoop)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setEventLoop(invalid_type)
+
+    def test_setWorkerBudget_argument_workerBudget_should_set_worker_budget(self):
+        """
+        Test setWorkerBudget(self, workerBudget)
+        """
+        sfp = SpiderFootPlugin()
+
+        worker_budget = SpiderFootWorkerBudget(1)
+        sfp.setWorkerBudget(worker_budget)
+        self.assertEqual(worker_budget, sfp.__workerBudget__)
+
+    def test_setWorkerBudget_argument_workerBudget_invalid_type_should_raise_TypeError(self):
+        """
+        Test setWorkerBudget(self, workerBudget)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setWorkerBudget(invalid_type)
+
+    def test_setEventStore_argument_eventStore_should_set_event_store(self):
+        """
+        Test setEventStore(self, eventStore)
+        """
+        sfp = SpiderFootPlugin()
+
+        event_store = SpiderFootEventStore()
+        sfp.setEventStore(event_store)
+        self.assertEqual(event_store, sfp.__eventStore__)
+
+    def test_setEventStore_argument_eventStore_invalid_type_should_raise_TypeError(self):
+        """
+        Test setEventStore(self, eventStore)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setEventStore(invalid_type)
+
     def test_getScanId_should_return_a_string(self):
         """
         Test getScanId(self)
@@ -207,6 +300,174 @@ class TestSpiderFootPlugin(unittest.TestCase):
         temp_storage = sfp.tempStorage()
         self.assertIsInstance(temp_storage, dict)
 
+    def test_restoreTempStorage_should_restore_temp_storage_in_order(self):
+        """
+        Test restoreTempStorage(self, storage)
+        Test getTempStorage(self)
+        """
+        sfp = SpiderFootPlugin()
+        sfp.restoreTempStorage([{'example key': True}])
+
+        temp_storage = sfp.tempStorage()
+        self.assertEqual({'example key': True}, temp_storage)
+        self.assertEqual(dict(), sfp.tempStorage())
+        self.assertEqual([{'example key': True}, dict()], sfp.getTempStorage())
+
+    def test_restoreTempStorage_argument_storage_invalid_type_should_raise_TypeError(self):
+        """
+        Test restoreTempStorage(self, storage)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.restoreTempStorage(invalid_type)
+
+    def test_deferSetup_should_set_up_module_when_handling_first_event(self):
+        """
+        Test deferSetup(self, sf, userOpts={})
+        """
+        setup_calls = list()
+        handled_events = list()
+
+        sfp = SpiderFootPlugin()
+        sfp.setup = lambda sf, userOpts: setup_calls.append((sf, userOpts))
+        sfp.handleEvent = handled_events.append
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.clearListeners()
+        sfp.deferSetup(None, {'example option': True})
+        sfp.restoreTempStorage([{'example key': True}])
+        self.assertEqual([{'example key': True}], sfp.getTempStorage())
+        sfp.start()
+
+        time.sleep(0.3)
+        self.assertEqual([], setup_calls)
+
+        evt = SpiderFootEvent('ROOT', 'test data', '', None)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+        self.assertEqual([(None, {'example option': True})], setup_calls)
+        self.assertEqual([evt, evt], handled_events)
+
+    def test_deferSetup_should_apply_module_options_to_module_instance(self):
+        """
+        Test deferSetup(self, sf, userOpts={})
+        """
+        class ExampleModule(SpiderFootPlugin):
+            opts = {'example option': False}
+
+            def watchedEvents(self):
+                return ['IP_ADDRESS'] if self.opts['example option'] else ['ROOT']
+
+        sfp = ExampleModule()
+        sfp.deferSetup(None, {'example option': True, '_debug': False})
+
+        self.assertEqual(['IP_ADDRESS'], sfp.watchedEvents())
+        self.assertEqual({'example option': True}, sfp.opts)
+        self.assertEqual({'example option': False}, ExampleModule.opts)
+
+    def test_deferSetup_setup_failure_should_not_handle_events(self):
+        """
+        Test deferSetup(self, sf, userOpts={})
+        """
+        handled_events = list()
+
+        def setup(sf, userOpts):
+            raise ValueError("example error")
+
+        sfp = SpiderFootPlugin()
+        sfp.setup = setup
+        sfp.handleEvent = handled_events.append
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.clearListeners()
+        sfp.deferSetup(None)
+        sfp.start()
+
+        evt = SpiderFootEvent('ROOT', 'test data', '', None)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+        self.assertEqual([], handled_events)
+        self.assertTrue(sfp.errorState)
+
+    def test_setProcessPool_argument_processPool_invalid_type_should_raise_TypeError(self):
+        """
+        Test setProcessPool(self, processPool)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setProcessPool(invalid_type)
+
+    def test_setStats_argument_stats_invalid_type_should_raise_TypeError(self):
+        """
+        Test setStats(self, stats)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setStats(invalid_type)
+
+    def test_setTracer_argument_tracer_invalid_type_should_raise_TypeError(self):
+        """
+        Test setTracer(self, tracer)
+        """
+        sfp = SpiderFootPlugin()
+
+        invalid_types = [None, "", list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    sfp.setTracer(invalid_type)
+
+    def test_setStats_should_count_events_handled_and_emitted(self):
+        """
+        Test setStats(self, stats)
+        """
+        stats = SpiderFootModuleStats()
+
+        sfp = SpiderFootPlugin()
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.outgoingEventQueue = queue.Queue()
+        sfp.setStats(stats)
+
+        def handleEvent(sfEvent):
+            sfp.notifyListeners(SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'example module', sfEvent))
+
+        sfp.handleEvent = handleEvent
+        sfp.start()
+
+        evt = SpiderFootEvent('ROOT', 'test data', '', None)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+        self.assertEqual(1, stats.handled)
+        self.assertEqual({'ROOT': 1}, stats.received)
+        self.assertEqual({'IP_ADDRESS': 1}, stats.emitted)
+
     def test_notifyListeners_should_notify_listener_modules(self):
         """
         Test notifyListeners(self, sfEvent)
@@ -312,6 +573,20 @@ class TestSpiderFootPlugin(unittest.TestCase):
 
         self.assertEqual('TBD', 'TBD')
 
+    def test_notifyListeners_with_outgoing_event_queue_should_queue_event(self):
+        """
+        Test notifyListeners(self, sfEvent)
+        """
+        sfp = SpiderFootPlugin()
+        sfp.outgoingEventQueue = queue.Queue()
+
+        evt = SpiderFootEvent('ROOT', 'test data', '', None)
+        sfp.notifyListeners(evt)
+
+        queued_event, store_only = sfp.outgoingEventQueue.get_nowait()
+        self.assertEqual(evt, queued_event)
+        self.assertFalse(store_only)
+
     def test_notifyListeners_argument_sfEvent_invalid_event_should_raise_TypeError(self):
         """
         Test notifyListeners(self, sfEvent)
@@ -348,6 +623,26 @@ class TestSpiderFootPlugin(unittest.TestCase):
             returnValue = sfp.checkForStop()
             self.assertEqual(returnValue, expectedReturnValue, status)
 
+    def test_checkForStop_with_stop_event_should_not_query_database(self):
+        """
+        Test checkForStop(self)
+        """
+        sfp = SpiderFootPlugin()
+
+        class DatabaseStub:
+            def scanInstanceGet(self, scanId):
+                raise AssertionError("database queried")
+
+        sfp.__sfdb__ = DatabaseStub()
+        sfp.__scanId__ = 'example scan id'
+
+        stop_event = threading.Event()
+        sfp.setStopEvent(stop_event)
+        self.assertFalse(sfp.checkForStop())
+
+        stop_event.set()
+        self.assertTrue(sfp.checkForStop())
+
     def test_watchedEvents_should_return_a_list(self):
         """
         Test watchedEvents(self)
@@ -379,6 +674,56 @@ class TestSpiderFootPlugin(unittest.TestCase):
         sfp = SpiderFootPlugin()
         sfp.handleEvent(evt)
 
+    def test_handleEvent_should_wait_for_handleEventAsync(self):
+        """
+        Test handleEvent(self, sfEvent)
+        """
+        handled_events = list()
+
+        class AsyncPlugin(SpiderFootPlugin):
+            async def handleEventAsync(self, sfEvent):
+                await asyncio.sleep(0)
+                handled_events.append(sfEvent)
+
+        evt = SpiderFootEvent('ROOT', 'example event data', '', None)
+
+        sfp = AsyncPlugin()
+        sfp.handleEvent(evt)
+
+        self.assertEqual([evt], handled_events)
+
+    def test_handleEvent_called_from_coroutine_should_raise_RuntimeError(self):
+        """
+        Test handleEvent(self, sfEvent)
+        """
+        class AsyncPlugin(SpiderFootPlugin):
+            async def handleEventAsync(self, sfEvent):
+                return
+
+        evt = SpiderFootEvent('ROOT', 'example event data', '', None)
+
+        event_loop = asyncio.new_event_loop()
+        sfp = AsyncPlugin()
+        sfp.setEventLoop(event_loop)
+
+        async def handle():
+            sfp.handleEvent(evt)
+
+        with self.assertRaises(RuntimeError):
+            event_loop.run_until_complete(handle())
+        event_loop.close()
+
+    def test_isAsync_should_return_a_boolean(self):
+        """
+        Test isAsync(self)
+        """
+        class AsyncPlugin(SpiderFootPlugin):
+            async def handleEventAsync(self, sfEvent):
+                return
+
+        self.assertFalse(SpiderFootPlugin().isAsync)
+        self.assertTrue(AsyncPlugin().isAsync)
+
     def test_start(self):
         """
         Test start(self)
@@ -386,3 +731,151 @@ class TestSpiderFootPlugin(unittest.TestCase):
         sfp = SpiderFootPlugin()
 
         sfp.start()
+        self.assertEqual([], sfp._threads)
+
+    def test_start_should_handle_events_from_incoming_event_queue(self):
+        """
+        Test start(self)
+        """
+        handled_events = list()
+
+        sfp = SpiderFootPlugin()
+        sfp.handleEvent = handled_events.append
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.clearListeners()
+        sfp.start()
+
+        evt = SpiderFootEvent('ROOT', 'test data', '', None)
+        sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+        self.assertEqual([evt], handled_events)
+        self.assertEqual(evt, sfp._currentEvent)
+
+    def test_start_should_handle_up_to_maxInFlight_events_concurrently_within_worker_budget(self):
+        """
+        Test start(self)
+        """
+        all_started = threading.Barrier(2, timeout=5)
+        worker_budget = SpiderFootWorkerBudget(2)
+
+        sfp = SpiderFootPlugin()
+        # Only completes if both events are handled concurrently
+        sfp.handleEvent = lambda sfEvent: all_started.wait()
+        sfp._maxInFlight = 2
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.setWorkerBudget(worker_budget)
+        sfp.clearListeners()
+        sfp.start()
+
+        for i in range(2):
+            sfp.incomingEventQueue.put(SpiderFootEvent('ROOT', f"test data {i}", '', None))
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+        self.assertEqual(2, len(sfp._threads))
+        self.assertFalse(all_started.broken)
+        self.assertEqual(0, worker_budget.inUse)
+
+    def test_start_should_handle_events_concurrently_on_event_loop(self):
+        """
+        Test start(self)
+        """
+        handled_events = list()
+        all_started = asyncio.Event()
+
+        class AsyncPlugin(SpiderFootPlugin):
+            async def handleEventAsync(self, sfEvent):
+                handled_events.append(sfEvent)
+                if len(handled_events) == 3:
+                    all_started.set()
+                # Only completes if all the events are handled concurrently
+                await asyncio.wait_for(all_started.wait(), 5)
+
+        event_loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=event_loop.run_forever)
+        loop_thread.start()
+
+        sfp = AsyncPlugin()
+        sfp._maxInFlight = 3
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.setEventLoop(event_loop)
+        sfp.clearListeners()
+        sfp.start()
+
+        events = [SpiderFootEvent('ROOT', f"test data {i}", '', None) for i in range(3)]
+        for evt in events:
+            sfp.incomingEventQueue.put(evt)
+        sfp.incomingEventQueue.join()
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+        event_loop.call_soon_threadsafe(event_loop.stop)
+        loop_thread.join()
+        event_loop.close()
+
+        self.assertEqual(events, handled_events)
+        self.assertFalse(sfp.errorState)
+
+    def test_pause_should_wait_for_events_being_handled(self):
+        """
+        Test pause(self, timeout=None)
+        Test unpause(self)
+        """
+        handling = threading.Event()
+        finish = threading.Event()
+        handled_events = list()
+
+        def handle_event(sfEvent):
+            handling.set()
+            finish.wait(5)
+            handled_events.append(sfEvent)
+
+        sfp = SpiderFootPlugin()
+        sfp.handleEvent = handle_event
+        sfp.incomingEventQueue = queue.Queue()
+        sfp.clearListeners()
+        self.assertTrue(sfp.pause(0))
+        sfp.start()
+
+        sfp.incomingEventQueue.put(SpiderFootEvent('ROOT', 'test data 1', '', None))
+        handling.wait(5)
+        self.assertFalse(sfp.pause(0.1))
+
+        finish.set()
+        self.assertTrue(sfp.pause(5))
+
+        # Paused modules don't take more events from the queue
+        sfp.incomingEventQueue.put(SpiderFootEvent('ROOT', 'test data 2', '', None))
+        time.sleep(0.3)
+        self.assertFalse(sfp.incomingEventQueue.empty())
+        self.assertEqual(1, len(handled_events))
+
+        sfp.unpause()
+        sfp.incomingEventQueue.join()
+        self.assertEqual(2, len(handled_events))
+
+        sfp._stopScanning = True
+        for thread in sfp._threads:
+            thread.join()
+
+    def test_running_should_return_a_boolean(self):
+        """
+        Test running(self)
+        """
+        sfp = SpiderFootPlugin()
+        self.assertFalse(sfp.running)
+
+        sfp.incomingEventQueue = queue.Queue()
+        self.assertFalse(sfp.running)
+
+        sfp.incomingEventQueue.put(SpiderFootEvent('ROOT', 'test data', '', None))
+        self.assertTrue(sfp.running)
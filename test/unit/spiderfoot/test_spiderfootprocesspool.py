@@ -0,0 +1,173 @@
+# test_spiderfootprocesspool.py
+import threading
+import unittest
+import uuid
+from concurrent.futures import CancelledError
+
+from spiderfoot import SpiderFootEvent, SpiderFootProcessPool, SpiderFootTarget
+
+
+class TestSpiderFootProcessPool(unittest.TestCase):
+    """
+    Test SpiderFootProcessPool
+    """
+
+    default_options = {
+        '_debug': False,  # Debug
+        '__logging': True,  # Logging in general
+        '__outputfilter': None,  # Event types to filter from modules' output
+        '_useragent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:62.0) Gecko/20100101 Firefox/62.0',  # User-Agent to use for HTTP requests
+        '_dnsserver': '',  # Override the default resolver
+        '_fetchtimeout': 5,  # number of seconds before giving up on a fetch
+        '_internettlds': 'https://publicsuffix.org/list/effective_tld_names.dat',
+        '_internettlds_cache': 72,
+        '_genericusers': "abuse,admin,billing,compliance,devnull,dns,ftp,hostmaster,inoc,ispfeedback,ispsupport,list-request,list,maildaemon,marketing,noc,no-reply,noreply,null,peering,peering-notify,peering-request,phish,phishing,postmaster,privacy,registrar,registry,root,routing-registry,rr,sales,security,spam,support,sysadmin,tech,undisclosed-recipients,unsubscribe,usenet,uucp,webmaster,www",
+        '__version__': '3.3-DEV',
+        '__database': 'spiderfoot.test.db',  # note: test database file
+        '__modules__': None,  # List of modules. Will be set after start-up.
+        '_socks1type': '',
+        '_socks2addr': '',
+        '_socks3port': '',
+        '_socks4user': '',
+        '_socks5pwd': '',
+        '_socks6dns': True,
+        '_torctlport': 9051,
+    }
+
+    def test_init_argument_size_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, config, scanId, target, size, socksProxy=None)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+
+        invalid_types = [None, "", list(), dict()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootProcessPool(self.default_options, "example scan id", target, invalid_type)
+
+    def test_init_argument_size_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, config, scanId, target, size, socksProxy=None)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+
+        with self.assertRaises(ValueError):
+            SpiderFootProcessPool(self.default_options, "example scan id", target, 0)
+
+    def test_init_argument_target_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, config, scanId, target, size, socksProxy=None)
+        """
+        invalid_types = [None, "", list(), dict()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootProcessPool(self.default_options, "example scan id", invalid_type, 1)
+
+    def test_addModule_should_assign_modules_to_processes_in_turn(self):
+        """
+        Test addModule(self, modName, modOpts, tempStorage=None)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        pool = SpiderFootProcessPool(self.default_options, "example scan id", target, 2)
+
+        pool.addModule('sfp_hashes', dict())
+        pool.addModule('sfp_email', dict())
+        pool.addModule('sfp_iban', dict())
+        self.assertEqual(['sfp_hashes', 'sfp_email', 'sfp_iban'], pool.modules)
+
+        with self.assertRaises(ValueError):
+            pool.addModule('sfp_hashes', dict())
+
+        pool.shutdown()
+
+    def test_handleEvent_should_return_events_produced_by_module_in_its_process(self):
+        """
+        Test handleEvent(self, modName, sfEvent)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        pool = SpiderFootProcessPool(self.default_options, str(uuid.uuid4()), target, 1)
+        pool.addModule('sfp_hashes', dict(), [{'example key': True}])
+
+        self.assertEqual([{'example key': True}], pool.getTempStorage('sfp_hashes'))
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        evt = SpiderFootEvent('TARGET_WEB_CONTENT', 'hash: 098f6bcd4621d373cade4e832627b4f6', 'sfp_spider', root_event)
+        evt.moduleDataSource = 'example data source'
+
+        try:
+            events, error_state = pool.handleEvent('sfp_hashes', evt)
+        finally:
+            pool.shutdown()
+
+        self.assertFalse(error_state)
+        self.assertEqual(1, len(events))
+        self.assertEqual('HASH', events[0].eventType)
+        self.assertEqual('[MD5] 098f6bcd4621d373cade4e832627b4f6', events[0].data)
+        self.assertEqual('sfp_hashes', events[0].module)
+        self.assertEqual('example data source', events[0].moduleDataSource)
+        self.assertIs(evt, events[0].sourceEvent)
+
+    def test_stop_should_set_stop_event_shared_with_modules_in_pool_processes(self):
+        """
+        Test stop(self)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        pool = SpiderFootProcessPool(self.default_options, str(uuid.uuid4()), target, 1)
+        pool.addModule('sfp_hashes', dict())
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        executor = pool._SpiderFootProcessPool__moduleExecutors['sfp_hashes']
+        check_for_stop = "__import__('spiderfoot.processpool', fromlist=['_processModules'])._processModules['sfp_hashes'].checkForStop()"
+
+        try:
+            pool.handleEvent('sfp_hashes', root_event)
+            self.assertFalse(executor.submit(eval, check_for_stop).result())
+
+            pool.stop()
+            self.assertTrue(executor.submit(eval, check_for_stop).result())
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_should_cancel_events_waiting_for_their_process(self):
+        """
+        Test shutdown(self)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        pool = SpiderFootProcessPool(self.default_options, str(uuid.uuid4()), target, 1)
+        pool.addModule('sfp_hashes', dict())
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        evt = SpiderFootEvent('TARGET_WEB_CONTENT', 'hash: 098f6bcd4621d373cade4e832627b4f6', 'sfp_spider', root_event)
+        results = list()
+
+        def handle():
+            try:
+                events, error_state = pool.handleEvent('sfp_hashes', evt)
+                results.append(len(events))
+            except (CancelledError, RuntimeError):
+                # Cancelled, or sent after the pool was shut down
+                results.append(None)
+
+        threads = [threading.Thread(target=handle) for _ in range(8)]
+        for t in threads:
+            t.start()
+        pool.shutdown()
+        for t in threads:
+            t.join(timeout=30)
+
+        self.assertEqual(8, len(results))
+        self.assertTrue(all(result in (1, None) for result in results))
+        self.assertEqual(set(), pool._SpiderFootProcessPool__futures)
+
+    def test_handleEvent_argument_modName_not_in_pool_should_raise_ValueError(self):
+        """
+        Test handleEvent(self, modName, sfEvent)
+        """
+        target = SpiderFootTarget("spiderfoot.net", "INTERNET_NAME")
+        pool = SpiderFootProcessPool(self.default_options, "example scan id", target, 1)
+
+        root_event = SpiderFootEvent('ROOT', 'spiderfoot.net', '', None)
+        with self.assertRaises(ValueError):
+            pool.handleEvent('sfp_hashes', root_event)
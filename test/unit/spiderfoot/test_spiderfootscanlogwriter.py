@@ -0,0 +1,126 @@
+# test_spiderfootscanlogwriter.py
+import os
+import tempfile
+import unittest
+import uuid
+
+from spiderfoot import SpiderFootDb, SpiderFootScanLogWriter
+
+
+class SlowScanLogWriter(SpiderFootScanLogWriter):
+    """Writer which only writes when it is closed, so the tests can fill its backlog."""
+    flushInterval = 3600
+    batchSize = 100000
+
+
+class TestSpiderFootScanLogWriter(unittest.TestCase):
+    """
+    Test SpiderFootScanLogWriter
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.dbh = SpiderFootDb({'__database': os.path.join(self.tmpDir.name, 'scanlog.db')})
+        self.instance_id = str(uuid.uuid4())
+
+    def tearDown(self):
+        self.dbh.close()
+        self.tmpDir.cleanup()
+
+    def logTypes(self):
+        return sorted(row[2] for row in self.dbh.scanLogs(self.instance_id))
+
+    def test_init_argument_backlog_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, dbh, backlog=10000, overflow='sample')
+        """
+        invalid_types = [None, "", list(), dict()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootScanLogWriter(self.dbh, invalid_type)
+
+    def test_init_argument_overflow_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, dbh, backlog=10000, overflow='sample')
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootScanLogWriter(self.dbh, 10, 'block')
+
+        with self.assertRaises(ValueError):
+            SpiderFootScanLogWriter(self.dbh, -1)
+
+    def test_logEvent_argument_message_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test logEvent(self, instanceId, classification, message, component=None)
+        """
+        writer = SpiderFootScanLogWriter(self.dbh)
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    writer.logEvent(self.instance_id, 'INFO', invalid_type)
+        writer.close()
+
+    def test_close_should_write_queued_events(self):
+        """
+        Test close(self)
+        """
+        writer = SlowScanLogWriter(self.dbh)
+        self.assertTrue(writer.logEvent(self.instance_id, 'INFO', 'example message', 'example component'))
+        self.assertTrue(writer.logEvent(self.instance_id, 'ERROR', 'example error'))
+        self.assertEqual([], self.logTypes())
+
+        writer.close()
+
+        logs = self.dbh.scanLogs(self.instance_id)
+        self.assertEqual(['ERROR', 'INFO'], self.logTypes())
+        self.assertIn(('example component', 'INFO', 'example message'), [row[1:4] for row in logs])
+
+    def test_logEvent_after_close_should_write_event(self):
+        """
+        Test logEvent(self, instanceId, classification, message, component=None)
+        """
+        writer = SpiderFootScanLogWriter(self.dbh)
+        writer.close()
+
+        writer.logEvent(self.instance_id, 'STATUS', 'example message')
+        self.assertEqual(['STATUS'], self.logTypes())
+
+    def test_logEvent_drop_overflow_should_drop_debug_and_info_events(self):
+        """
+        Test logEvent(self, instanceId, classification, message, component=None)
+        """
+        writer = SlowScanLogWriter(self.dbh, 2, 'drop')
+        logged = [writer.logEvent(self.instance_id, 'DEBUG', f"message {i}") for i in range(5)]
+        self.assertEqual([True, True, False, False, False], logged)
+        self.assertTrue(writer.logEvent(self.instance_id, 'ERROR', 'example error'))
+        self.assertEqual(3, writer.dropped)
+
+        writer.close()
+
+        # The dropped events are reported in the log
+        self.assertEqual(['DEBUG', 'DEBUG', 'ERROR', 'STATUS'], self.logTypes())
+
+    def test_logEvent_sample_overflow_should_sample_debug_and_info_events(self):
+        """
+        Test logEvent(self, instanceId, classification, message, component=None)
+        """
+        writer = SlowScanLogWriter(self.dbh, 4, 'sample')
+        logged = [writer.logEvent(self.instance_id, 'INFO', f"message {i}") for i in range(12)]
+
+        # Half the backlog is queued, then one in ten events
+        self.assertEqual([True, True] + [False] * 9 + [True], logged)
+        self.assertEqual(9, writer.dropped)
+        writer.close()
+
+    def test_logEvent_unlimited_backlog_should_not_drop_events(self):
+        """
+        Test logEvent(self, instanceId, classification, message, component=None)
+        """
+        writer = SlowScanLogWriter(self.dbh, 0, 'drop')
+        for i in range(50):
+            self.assertTrue(writer.logEvent(self.instance_id, 'DEBUG', f"message {i}"))
+        writer.close()
+
+        self.assertEqual(50, len(self.dbh.scanLogs(self.instance_id)))
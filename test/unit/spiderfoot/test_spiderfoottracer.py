@@ -0,0 +1,89 @@
+# test_spiderfoottracer.py
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from spiderfoot import SpiderFootTracer
+
+
+class TestSpiderFootTracer(unittest.TestCase):
+    """
+    Test SpiderFootTracer
+    """
+
+    def test_init_argument_path_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, path, name=None)
+        """
+        invalid_types = [None, list(), dict(), int()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootTracer(invalid_type)
+
+    def test_span_should_record_spans_in_trace_event_format(self):
+        """
+        Test span(self, name, cat, args=None)
+        Test traced(name, cat, args=None)
+        Test close(self)
+        """
+        with tempfile.TemporaryDirectory() as trace_dir:
+            path = os.path.join(trace_dir, 'traces', 'example scan id.json')
+            tracer = SpiderFootTracer(path, 'example process name')
+            self.assertEqual(path, tracer.path)
+
+            self.assertIsNone(SpiderFootTracer.current())
+            with SpiderFootTracer.traced('example untraced span', 'example category'):
+                pass
+
+            with tracer.span('example span', 'example category', {'example arg': 1}):
+                self.assertIs(tracer, SpiderFootTracer.current())
+                with SpiderFootTracer.traced('example nested span', 'example category'):
+                    pass
+                tracer.instant('example instant', 'example category')
+
+            tracer.close()
+            tracer.close()
+
+            with open(path) as f:
+                trace_events = json.load(f)
+
+        spans = [e for e in trace_events if e['ph'] == 'X']
+        self.assertEqual(['example nested span', 'example span'], [e['name'] for e in spans])
+        self.assertEqual({'example arg': 1}, spans[1]['args'])
+        self.assertLessEqual(spans[1]['ts'], spans[0]['ts'])
+        self.assertGreaterEqual(spans[1]['ts'] + spans[1]['dur'], spans[0]['ts'] + spans[0]['dur'])
+
+        self.assertEqual(['example instant'], [e['name'] for e in trace_events if e['ph'] == 'i'])
+        self.assertIn('process_name', [e['name'] for e in trace_events if e['ph'] == 'M'])
+        self.assertIn('thread_name', [e['name'] for e in trace_events if e['ph'] == 'M'])
+
+    def test_asyncSpan_should_record_overlapping_spans(self):
+        """
+        Test asyncSpan(self, name, cat, args=None)
+        """
+        with tempfile.TemporaryDirectory() as trace_dir:
+            path = os.path.join(trace_dir, 'trace.json')
+            tracer = SpiderFootTracer(path)
+
+            async def task(name):
+                with tracer.asyncSpan(name, 'example category'):
+                    await asyncio.sleep(0.01)
+
+            async def tasks():
+                await asyncio.gather(task('example span 1'), task('example span 2'))
+
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(tasks())
+            finally:
+                loop.close()
+            tracer.close()
+
+            with open(path) as f:
+                trace_events = json.load(f)
+
+        self.assertEqual(['b', 'b', 'e', 'e'], [e['ph'] for e in trace_events])
+        self.assertEqual(2, len(set(e['id'] for e in trace_events)))
@@ -0,0 +1,128 @@
+# test_spiderfootworkerbudget.py
+import threading
+import time
+import unittest
+
+from spiderfoot import SpiderFootWorkerBudget
+
+
+class TestSpiderFootWorkerBudget(unittest.TestCase):
+    """
+    Test SpiderFootWorkerBudget
+    """
+
+    def test_init_argument_size_invalid_type_should_raise_TypeError(self):
+        """
+        Test __init__(self, size)
+        """
+        invalid_types = [None, "", list(), dict(), float()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootWorkerBudget(invalid_type)
+
+    def test_init_argument_size_invalid_value_should_raise_ValueError(self):
+        """
+        Test __init__(self, size)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootWorkerBudget(0)
+
+    def test_acquire_should_return_false_when_budget_is_exhausted(self):
+        """
+        Test acquire(self, priority=1, timeout=None)
+        """
+        worker_budget = SpiderFootWorkerBudget(1)
+
+        self.assertTrue(worker_budget.acquire(timeout=0.1))
+        self.assertEqual(1, worker_budget.inUse)
+        self.assertFalse(worker_budget.acquire(timeout=0.1))
+
+        worker_budget.release()
+        self.assertEqual(0, worker_budget.inUse)
+        self.assertTrue(worker_budget.acquire(timeout=0.1))
+
+    def test_acquire_should_grant_waiting_smaller_priority_numbers_first(self):
+        """
+        Test acquire(self, priority=1, timeout=None)
+        """
+        worker_budget = SpiderFootWorkerBudget(1)
+        worker_budget.acquire()
+
+        granted = list()
+
+        def worker(priority):
+            worker_budget.acquire(priority, timeout=5)
+            granted.append(priority)
+            worker_budget.release()
+
+        threads = list()
+        for priority in [3, 2, 1]:
+            thread = threading.Thread(target=worker, args=(priority,))
+            thread.start()
+            threads.append(thread)
+            # Wait for the thread to start waiting for the budget
+            while len(worker_budget._waiting) < len(threads):
+                time.sleep(0.01)
+
+        worker_budget.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([1, 2, 3], granted)
+
+    def test_acquire_should_grant_waiting_equal_priorities_in_order(self):
+        """
+        Test acquire(self, priority=1, timeout=None, cancelled=None)
+        """
+        worker_budget = SpiderFootWorkerBudget(1)
+        worker_budget.acquire()
+
+        granted = list()
+
+        def worker(name):
+            worker_budget.acquire(1, cancelled=lambda: False)
+            granted.append(name)
+            worker_budget.release()
+
+        threads = list()
+        for name in ['first', 'second', 'third']:
+            thread = threading.Thread(target=worker, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while len(worker_budget._waiting) < len(threads):
+                time.sleep(0.01)
+
+        # Waiting longer than the poll interval doesn't queue waiters again
+        time.sleep(worker_budget.pollInterval * 3)
+        self.assertEqual(3, len(worker_budget._waiting))
+
+        worker_budget.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['first', 'second', 'third'], granted)
+        self.assertEqual(0, worker_budget.inUse)
+
+    def test_acquire_cancelled_should_return_false_and_leave_the_queue(self):
+        """
+        Test acquire(self, priority=1, timeout=None, cancelled=None)
+        """
+        worker_budget = SpiderFootWorkerBudget(1)
+        worker_budget.acquire()
+
+        cancel = threading.Event()
+        result = list()
+        thread = threading.Thread(target=lambda: result.append(worker_budget.acquire(cancelled=cancel.is_set)))
+        thread.start()
+        while not worker_budget._waiting:
+            time.sleep(0.01)
+
+        cancel.set()
+        thread.join()
+
+        self.assertEqual([False], result)
+        self.assertEqual([], worker_budget._waiting)
+
+        worker_budget.release()
+        self.assertEqual(0, worker_budget.inUse)
@@ -1,8 +1,11 @@
 # test_spiderfoot.py
+import asyncio
+import socket
 import unittest
+from unittest import mock
 
 from sflib import SpiderFoot
-from spiderfoot import SpiderFootTarget
+from spiderfoot import SpiderFootEvent, SpiderFootModuleStats, SpiderFootTarget
 
 
 class TestSpiderFoot(unittest.TestCase):
@@ -52,6 +55,13 @@ class TestSpiderFoot(unittest.TestCase):
 
     test_tlds = "// ===BEGIN ICANN DOMAINS===\n\ncom\nnet\norg\n\n// // ===END ICANN DOMAINS===\n"
 
+    def run_coroutine(self, coroutine):
+        event_loop = asyncio.new_event_loop()
+        try:
+            return event_loop.run_until_complete(coroutine)
+        finally:
+            event_loop.close()
+
     def test_init_argument_options_of_invalid_type_should_raise_TypeError(self):
         """
         Test __init__(self, options):
@@ -186,6 +196,54 @@ class TestSpiderFoot(unittest.TestCase):
         with self.assertRaises(BaseException):
             sf._dblog(None, None, None)
 
+    def test_dblog_with_scan_log_writer_should_queue_event(self):
+        """
+        Test _dblog(self, level, message, component=None)
+        """
+        sf = SpiderFoot(self.default_options)
+        sf.scanId = "example scan id"
+
+        logged = list()
+
+        class ExampleWriter:
+            def logEvent(self, instanceId, classification, message, component=None):
+                logged.append((instanceId, classification, message, component))
+                return True
+
+        sf.scanLogWriter = ExampleWriter()
+        self.assertTrue(sf._dblog("INFO", "example message", "example component"))
+        self.assertEqual([("example scan id", "INFO", "example message", "example component")], logged)
+
+    def test_info_should_attribute_event_to_calling_module(self):
+        """
+        Test info(self, message)
+        """
+        sf = SpiderFoot(self.default_options)
+        sf.dbh = True
+        sf.scanId = "example scan id"
+
+        logged = list()
+        sf._dblog = lambda level, message, component=None: logged.append((level, component))
+
+        sf.info("example message")
+        self.assertEqual([("INFO", __name__)], logged)
+
+    def test_debug_from_helper_should_attribute_event_to_module_calling_helper(self):
+        """
+        Test debug(self, message)
+        """
+        opts = self.default_options.copy()
+        opts['_debug'] = True
+        sf = SpiderFoot(opts)
+        sf.dbh = True
+        sf.scanId = "example scan id"
+
+        logged = list()
+        sf._dblog = lambda level, message, component=None: logged.append((level, component))
+
+        sf.parseHashes("d41d8cd98f00b204e9800998ecf8427e")
+        self.assertEqual([("DEBUG", __name__)], logged)
+
     def test_error(self):
         """
         Test error(self, error):
@@ -251,6 +309,24 @@ class TestSpiderFoot(unittest.TestCase):
         path = sf.myPath()
         self.assertIsInstance(path, str)
 
+    def test_trace_path_should_return_a_string(self):
+        """
+        Test tracePath(cls, scanId)
+        """
+        path = SpiderFoot.tracePath('example scan id')
+        self.assertIsInstance(path, str)
+        self.assertTrue(path.endswith('example scan id.json'))
+
+    def test_trace_path_argument_scanId_invalid_value_should_raise_ValueError(self):
+        """
+        Test tracePath(cls, scanId)
+        """
+        invalid_values = ['', '..', '../example scan id', 'example/scan id']
+        for invalid_value in invalid_values:
+            with self.subTest(invalid_value=invalid_value):
+                with self.assertRaises(ValueError):
+                    SpiderFoot.tracePath(invalid_value)
+
     def test_hash_string_should_return_a_string(self):
         """
         Test hashstring(self, string)
@@ -902,6 +978,21 @@ class TestSpiderFoot(unittest.TestCase):
         dict_names = sf.dictnames()
         self.assertIsInstance(dict_names, list)
 
+    def test_loadDictionaries_should_load_dictionaries_once(self):
+        """
+        Test loadDictionaries(self, dicts)
+        """
+        sf = SpiderFoot(dict())
+
+        dict_names = sf.loadDictionaries(["names"])
+        self.assertIsInstance(dict_names, list)
+        self.assertTrue(dict_names)
+        self.assertIn(("names",), SpiderFoot._dictionaryWords)
+
+        dict_names.clear()
+        self.assertEqual(sf.dictnames(), sf.loadDictionaries(["names"]))
+        self.assertTrue(sf.dictnames())
+
     def test_dataParentChildToTree_should_return_dict(self):
         """
         Test dataParentChildToTree(self, data)
@@ -917,6 +1008,23 @@ class TestSpiderFoot(unittest.TestCase):
         tree = sf.dataParentChildToTree(dict())
         self.assertIsInstance(tree, dict)
 
+    def test_resolve_host_should_count_dns_query_against_module_stats(self):
+        """
+        Test resolveHost(self, host)
+        Test resolveHostInExecutor(self, host)
+        """
+        sf = SpiderFoot(self.default_options)
+        stats = SpiderFootModuleStats()
+        root_event = SpiderFootEvent('ROOT', 'example data', '', None)
+
+        with stats.handling(root_event):
+            sf.resolveHost('example invalid host.')
+            self.run_coroutine(sf.resolveHostInExecutor('example invalid host.'))
+
+        sf.resolveHost('example invalid host.')
+
+        self.assertEqual(2, stats.dnsQueries)
+
     def test_resolve_host_should_return_list(self):
         """
         Test resolveHost(self, host)
@@ -976,6 +1084,45 @@ class TestSpiderFoot(unittest.TestCase):
         self.assertFalse(addrs)
         self.assertIsInstance(addrs, list)
 
+    def test_runInExecutor_should_return_function_return_value(self):
+        """
+        Test runInExecutor(self, func, *args, **kwargs)
+        """
+        sf = SpiderFoot(self.default_options)
+
+        result = self.run_coroutine(sf.runInExecutor(sf.hashstring, 'example string'))
+        self.assertEqual(sf.hashstring('example string'), result)
+
+    def test_resolve_host_in_executor_should_return_list(self):
+        """
+        Test resolveHostInExecutor(self, host)
+        """
+        sf = SpiderFoot(self.default_options)
+
+        with mock.patch.object(socket, 'gethostbyname_ex', return_value=('one.one.one.one', [], ['1.1.1.1', '1.0.0.1'])):
+            addrs = self.run_coroutine(sf.resolveHostInExecutor('one.one.one.one'))
+        self.assertIsInstance(addrs, list)
+        self.assertIn('1.1.1.1', addrs)
+
+        addrs = self.run_coroutine(sf.resolveHostInExecutor(None))
+        self.assertFalse(addrs)
+        self.assertIsInstance(addrs, list)
+
+    def test_fetch_url_in_executor_should_return_fetchUrl_response(self):
+        """
+        Test fetchUrlInExecutor(self, url, **kwargs)
+        """
+        sf = SpiderFoot(self.default_options)
+
+        response = {'code': '200', 'content': 'example content'}
+        with mock.patch.object(sf, 'fetchUrl', return_value=response) as fetchUrl:
+            res = self.run_coroutine(sf.fetchUrlInExecutor("https://spiderfoot.net/", timeout=15))
+        self.assertEqual(response, res)
+        fetchUrl.assert_called_once_with("https://spiderfoot.net/", timeout=15)
+
+        res = self.run_coroutine(sf.fetchUrlInExecutor(None))
+        self.assertIsNone(res)
+
     def test_validate_ip_should_return_bool(self):
         """
         Test validateIP(self, host, ip)
@@ -0,0 +1,86 @@
+# test_spiderfootbenchmark.py
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from test.benchmark import sfbench
+
+
+class TestSpiderFootBenchmark(unittest.TestCase):
+    """
+    Test sfbench
+    """
+
+    params = {'fanOut': 2, 'depth': 3, 'payloadSize': 64, 'latency': 0.0}
+
+    def test_expected_events(self):
+        """
+        Test expectedEvents(params)
+        """
+        self.assertEqual(14, sfbench.expectedEvents(self.params))
+
+    def test_bench_modules_should_register_modules(self):
+        """
+        Test benchModules(params)
+        """
+        benchClasses = sfbench.benchModules(self.params)
+        try:
+            self.assertEqual(['sfp_bench_0', 'sfp_bench_1', 'sfp_bench_2'], list(benchClasses))
+            self.assertIs(benchClasses['sfp_bench_1'], getattr(sys.modules['modules.sfp_bench_1'], 'sfp_bench_1'))
+        finally:
+            sfbench.removeBenchModules(benchClasses)
+
+        self.assertNotIn('modules.sfp_bench_1', sys.modules)
+
+    def test_run_benchmarks_should_count_events(self):
+        """
+        Test runBenchmarks(benchmarks, params, repeat=3)
+        """
+        results = sfbench.runBenchmarks(sfbench.BENCHMARKS, self.params, repeat=1)
+
+        self.assertEqual(sfbench.BENCHMARKS, list(results))
+        self.assertEqual(14, results['notifyListeners']['events'])
+        # The root and target events are stored by the scan too
+        self.assertEqual(16, results['scan']['events'])
+        self.assertEqual(14, results['sfp__stor_db']['events'])
+        self.assertEqual(14, results['scanEventStore']['events'])
+
+    def test_run_benchmarks_invalid_benchmark_should_raise(self):
+        """
+        Test runBenchmarks(benchmarks, params, repeat=3)
+        """
+        with self.assertRaises(ValueError):
+            sfbench.runBenchmarks(['invalid benchmark'], self.params, repeat=1)
+
+    def test_compare_results_should_return_regressions(self):
+        """
+        Test compareResults(results, baseline, threshold)
+        """
+        baseline = {'results': {
+            'scan': {'eventsPerSec': 1000.0},
+            'scanEventStore': {'eventsPerSec': 1000.0}
+        }}
+        results = {
+            'scan': {'eventsPerSec': 950.0},
+            'scanEventStore': {'eventsPerSec': 800.0},
+            'notifyListeners': {'eventsPerSec': 10.0}
+        }
+
+        regressions = sfbench.compareResults(results, baseline, 0.1)
+        self.assertEqual([('scanEventStore', 1000.0, 800.0)], regressions)
+
+    def test_load_baseline_should_return_latest_results_with_same_params(self):
+        """
+        Test loadBaseline(resultsFile, params)
+        """
+        with tempfile.TemporaryDirectory() as tmpDir:
+            resultsFile = os.path.join(tmpDir, 'results.jsonl')
+            with open(resultsFile, 'w') as f:
+                f.write(json.dumps({'commit': 'a', 'params': self.params, 'results': {}}) + "\n")
+                f.write(json.dumps({'commit': 'b', 'params': self.params, 'results': {}}) + "\n")
+                f.write(json.dumps({'commit': 'c', 'params': dict(self.params, depth=1), 'results': {}}) + "\n")
+
+            self.assertEqual('b', sfbench.loadBaseline(resultsFile, self.params)['commit'])
+            self.assertIsNone(sfbench.loadBaseline(os.path.join(tmpDir, 'missing.jsonl'), self.params))
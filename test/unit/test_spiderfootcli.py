@@ -466,6 +466,23 @@ class TestSpiderFootCli(unittest.TestCase):
 
         self.assertEqual('TBD', 'TBD')
 
+    def test_do_modulestats(self):
+        """
+        Test do_modulestats(self, line)
+        """
+        sfcli = SpiderFootCli()
+        sfcli.request = lambda url, post=None: '[["sfp_example", 2, 1.5, 0.5, 0.25, 2, 3, 4, 1024, 2, {}, {}]]'
+
+        io_output = io.StringIO()
+        sys.stdout = io_output
+        sfcli.do_modulestats("example scan id")
+        sys.stdout = sys.__stdout__
+        output = io_output.getvalue()
+
+        self.assertIn("Wall Time (s)", output)
+        self.assertIn("sfp_example", output)
+        self.assertIn("1.500", output)
+
     @unittest.skip("todo")
     def test_do_delete(self):
         """
@@ -0,0 +1,91 @@
+# test_spiderfootreplay.py
+import os
+import tempfile
+import unittest
+import uuid
+
+import requests
+
+from spiderfoot import SpiderFootDb, SpiderFootEvent
+from test.benchmark import sfreplay
+
+
+class TestSpiderFootReplay(unittest.TestCase):
+    """
+    Test sfreplay
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.dbh = SpiderFootDb({'__database': os.path.join(self.tmpDir.name, 'replay.db')})
+
+        self.scanId = str(uuid.uuid4())
+        self.dbh.scanInstanceCreate(self.scanId, "replay", "example.com")
+
+        rootEvent = SpiderFootEvent('ROOT', 'example.com', '', None)
+        targetEvent = SpiderFootEvent('INTERNET_NAME', 'example.com', 'SpiderFoot UI', rootEvent)
+        ipEvent = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', targetEvent)
+        urlEvent = SpiderFootEvent('LINKED_URL_INTERNAL', 'http://example.com/', 'sfp_spider', targetEvent)
+        contentEvent = SpiderFootEvent('TARGET_WEB_CONTENT', 'Contact: info@example.com', 'sfp_spider', urlEvent)
+        emailEvent = SpiderFootEvent('EMAILADDR', 'info@example.com', 'sfp_email', contentEvent)
+
+        for sfEvent in [rootEvent, targetEvent, ipEvent, urlEvent, contentEvent, emailEvent]:
+            self.dbh.scanEventStore(self.scanId, sfEvent)
+
+    def tearDown(self):
+        self.dbh.close()
+        self.tmpDir.cleanup()
+
+    def test_load_scan_events_should_link_events_to_source_events(self):
+        """
+        Test loadScanEvents(dbh, scanId)
+        """
+        events = sfreplay.loadScanEvents(self.dbh, self.scanId)
+
+        self.assertEqual(['ROOT', 'INTERNET_NAME', 'IP_ADDRESS', 'LINKED_URL_INTERNAL', 'TARGET_WEB_CONTENT', 'EMAILADDR'],
+                         [e.eventType for e in events])
+        self.assertIs(events[4], events[5].sourceEvent)
+        self.assertEqual(events[4].hash, events[5].sourceEventHash)
+
+    def test_replay_should_answer_requests_from_scan_results(self):
+        """
+        Test SpiderFootReplay(options, events)
+        """
+        events = sfreplay.loadScanEvents(self.dbh, self.scanId)
+        sf = sfreplay.SpiderFootReplay(sfreplay.BENCH_CONFIG, events)
+
+        self.assertEqual(['1.2.3.4'], sf.resolveHost('example.com'))
+        self.assertEqual('Contact: info@example.com', sf.fetchUrl('http://example.com/')['content'])
+        self.assertIsNone(sf.fetchUrl('http://example.com/missing')['code'])
+        self.assertEqual([], sf.resolveHost('missing.example.com'))
+        self.assertEqual([], sf.resolveIP('1.2.3.4'))
+        self.assertEqual(2, sf.replayed)
+        self.assertEqual(3, sf.missed)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            sf.getSession().get('http://example.com/')
+
+    def test_replay_modules_should_time_modules(self):
+        """
+        Test replayModules(config, events, moduleList, scanId)
+        """
+        events = sfreplay.loadScanEvents(self.dbh, self.scanId)
+        config = sfreplay.replayConfig(self.dbh, self.scanId, ['sfp_email'])
+
+        replay = sfreplay.replayModules(config, events, ['sfp_email'], self.scanId)
+
+        result = replay['modules']['sfp_email']
+        self.assertEqual(1, result['handled'])
+        self.assertEqual({'TARGET_WEB_CONTENT': 1}, result['received'])
+        self.assertEqual(1, result['produced'])
+        self.assertEqual(1, result['recorded'])
+        self.assertEqual(1, result['reproduced'])
+        self.assertEqual(0, result['errors'])
+        self.assertGreater(result['wallTime'], 0)
+
+    def test_scan_modules_should_skip_storage_modules(self):
+        """
+        Test scanModules(events)
+        """
+        events = sfreplay.loadScanEvents(self.dbh, self.scanId)
+        self.assertEqual(['sfp_dnsresolve', 'sfp_email', 'sfp_spider'], sfreplay.scanModules(events))
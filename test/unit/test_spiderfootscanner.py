@@ -1,8 +1,17 @@
 # test_spiderfootscanner.py
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
 import unittest
 import uuid
+from unittest import mock
 
-from sfscan import SpiderFootScanner
+from sfscan import SpiderFootScanner, SpiderFootScanWorkerPool, runScanWorker
+from sflib import SpiderFoot
+from spiderfoot import SpiderFootBrokerWorker, SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootSqliteBroker
 
 
 class TestSpiderFootScanner(unittest.TestCase):
@@ -54,6 +63,254 @@ class TestSpiderFootScanner(unittest.TestCase):
         self.assertIsInstance(sfscan, SpiderFootScanner)
         self.assertEqual(sfscan.status, "FINISHED")
 
+    def test_init_argument_start_true_should_dispatch_events_to_module_threads(self):
+        opts = self.default_options
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        sfdb = SpiderFootDb(opts)
+        event_types = [row[4] for row in sfdb.scanResultEvent(scan_id)]
+        self.assertIn("ROOT", event_types)
+        self.assertIn("IP_ADDRESS", event_types)
+
+    def test_init_argument_start_true_with_small_queue_and_worker_budget_should_dispatch_all_events(self):
+        opts = dict(self.default_options)
+        opts['_queuesize'] = 1
+        opts['_maxworkers'] = 1
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True, 'maxinflight': 2, 'priority': 0}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "spiderfoot.net", "INTERNET_NAME", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        sfdb = SpiderFootDb(opts)
+        event_types = [row[4] for row in sfdb.scanResultEvent(scan_id)]
+        self.assertIn("ROOT", event_types)
+        self.assertIn("INTERNET_NAME", event_types)
+
+    def test_init_argument_start_true_should_share_global_config_between_modules(self):
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+            'sfp__stor_stdout': {'opts': {'_format': 'tab', '_requested': [], '_showonlyrequested': False}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db', 'sfp__stor_stdout']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        modconfig = sfscan._SpiderFootScanner__modconfig
+        self.assertEqual(1024, modconfig['sfp__stor_db']['maxstorage'])
+        self.assertEqual('tab', modconfig['sfp__stor_stdout']['_format'])
+        self.assertNotIn('maxstorage', modconfig['sfp__stor_stdout'])
+        self.assertIs(modconfig['sfp__stor_db']['__modules__'], modconfig['sfp__stor_stdout']['__modules__'])
+
+        with self.assertRaises(TypeError):
+            modconfig['sfp__stor_db']['maxstorage'] = 0
+
+    def test_init_argument_start_true_should_give_global_options_precedence_over_module_options(self):
+        opts = dict(self.default_options)
+        opts['_debug'] = False
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True, '_debug': True}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        modconfig = sfscan._SpiderFootScanner__modconfig
+        self.assertFalse(modconfig['sfp__stor_db']['_debug'])
+        self.assertEqual(1024, modconfig['sfp__stor_db']['maxstorage'])
+
+    def test_init_argument_start_true_should_route_events_by_module_options_of_modules_not_set_up(self):
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+            'sfp_dnsbrute': {'opts': {'domainonly': True, 'numbersuffix': False}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db', 'sfp_dnsbrute']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        dnsbrute = sfscan._SpiderFootScanner__moduleInstances['sfp_dnsbrute']
+        self.assertIsNotNone(dnsbrute._deferredSetup)
+
+        routing = sfscan._SpiderFootScanner__eventRouting
+        self.assertIn(dnsbrute, routing['DOMAIN_NAME'])
+        self.assertNotIn(dnsbrute, routing.get('INTERNET_NAME', []))
+        self.assertTrue(type(dnsbrute).opts['numbersuffix'])
+
+    def test_init_argument_start_true_should_only_set_up_modules_sent_events(self):
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+            'sfp_names': {'opts': {}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db', 'sfp_names']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        modules = sfscan._SpiderFootScanner__moduleInstances
+        self.assertIsNotNone(modules['sfp__stor_db'].sf)
+        self.assertIsNone(modules['sfp_names'].d)
+
+    def test_init_argument_start_true_should_handle_events_of_cpu_bound_modules_in_process_pool(self):
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+            'sfp_names': {'opts': {}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db', 'sfp_names']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "john.smith@spiderfoot.net", "EMAILADDR", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        self.assertEqual(['sfp_names'], sfscan._SpiderFootScanner__processPool.modules)
+
+        # Set up in its process rather than by the scanner
+        modules = sfscan._SpiderFootScanner__moduleInstances
+        self.assertIsNone(modules['sfp_names'].d)
+        self.assertIsNone(modules['sfp__stor_db'].__processPool__)
+
+    def test_init_argument_start_true_should_save_module_stats(self):
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+            'sfp_names': {'opts': {}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db', 'sfp_names']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "john.smith@spiderfoot.net", "EMAILADDR", module_list, opts, start=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        module_stats = SpiderFootDb(opts).scanModuleStatsGet(scan_id)
+        self.assertEqual(['sfp__stor_db', 'sfp_names'], sorted(module_stats.keys()))
+        self.assertEqual({'ROOT': 1, 'EMAILADDR': 1}, module_stats['sfp__stor_db']['received'])
+        self.assertEqual({'EMAILADDR': 1}, module_stats['sfp_names']['received'])
+        self.assertEqual(1, module_stats['sfp_names']['handled'])
+
+    def test_init_argument_start_true_with_tracescan_should_write_trace(self):
+        opts = dict(self.default_options)
+        opts['_tracescan'] = True
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        data_path = os.environ.get('SPIDERFOOT_DATA')
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.environ['SPIDERFOOT_DATA'] = data_dir
+            try:
+                sfscan = SpiderFootScanner("example scan name", scan_id, "spiderfoot.net", "INTERNET_NAME", module_list, opts, start=True)
+                self.assertEqual(sfscan.status, "FINISHED")
+
+                with open(SpiderFoot.tracePath(scan_id)) as f:
+                    trace_events = json.load(f)
+            finally:
+                if data_path is None:
+                    del os.environ['SPIDERFOOT_DATA']
+                else:
+                    os.environ['SPIDERFOOT_DATA'] = data_path
+
+        spans = [(e['cat'], e['name']) for e in trace_events if e['ph'] == 'X']
+        self.assertIn(('handleEvent', 'sfp__stor_db'), spans)
+        self.assertIn(('db', 'scanEventStore'), spans)
+        self.assertIn(('dispatch', 'dispatch'), spans)
+
+    def test_init_argument_start_true_with_broker_should_handle_events_in_module_workers(self):
+        with tempfile.TemporaryDirectory() as broker_dir:
+            opts = dict(self.default_options)
+            opts['_broker'] = os.path.join(broker_dir, 'broker.db')
+            opts['__modules__'] = {
+                'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}},
+                'sfp_names': {'opts': {}}
+            }
+            scan_id = str(uuid.uuid4())
+            module_list = ['sfp__stor_db', 'sfp_names']
+
+            broker = SpiderFootSqliteBroker(opts['_broker'])
+            worker = SpiderFootBrokerWorker(broker)
+            stop_event = threading.Event()
+            worker_thread = threading.Thread(target=worker.run, args=(stop_event,))
+            worker_thread.start()
+
+            try:
+                sfscan = SpiderFootScanner("example scan name", scan_id, "john.smith@spiderfoot.net", "EMAILADDR", module_list, opts, start=True)
+            finally:
+                stop_event.set()
+                worker_thread.join()
+                broker.close()
+
+        self.assertEqual(sfscan.status, "FINISHED")
+        self.assertEqual(['sfp_names'], sfscan._SpiderFootScanner__brokerPool.modules)
+        self.assertIsNone(sfscan._SpiderFootScanner__processPool)
+
+    def test_init_argument_stopEvent_set_should_abort_the_scan(self):
+        opts = self.default_options
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        stop_event = threading.Event()
+        stop_event.set()
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True, stopEvent=stop_event)
+        self.assertEqual(sfscan.status, "ABORTED")
+
+    def test_init_argument_resume_true_without_checkpoint_should_raise_ValueError(self):
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        with self.assertRaises(ValueError):
+            SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=False, resume=True)
+
+    def test_init_argument_resume_true_should_resume_the_scan_from_the_checkpoint(self):
+        opts = self.default_options
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=False)
+        self.assertEqual(sfscan.status, "INITIALIZING")
+
+        sfdb = SpiderFootDb(opts)
+        root_event = SpiderFootEvent('ROOT', '1.1.1.1', '', None)
+        event = SpiderFootEvent('IP_ADDRESS', '1.1.1.1', 'SpiderFoot UI', root_event)
+        sfdb.scanEventStore(scan_id, root_event)
+        sfdb.scanCheckpointSet(scan_id, dict(), [root_event, event], [(event.hash, '', False)])
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "1.1.1.1", "IP_ADDRESS", module_list, opts, start=True, resume=True)
+        self.assertEqual(sfscan.status, "FINISHED")
+
+        event_types = [row[4] for row in sfdb.scanResultEvent(scan_id)]
+        self.assertEqual(["ROOT", "IP_ADDRESS"], sorted(event_types, key=lambda t: t != "ROOT"))
+        self.assertIsNone(sfdb.scanCheckpointGet(scan_id))
+
     def test_init_argument_scanName_of_invalid_type_should_raise_TypeError(self):
         """
         Test __init__(self, scanName, scanId, scanTarget, targetType, moduleList, globalOpts, start=True)
@@ -245,3 +502,184 @@ class TestSpiderFootScanner(unittest.TestCase):
         sfscan = SpiderFootScanner("example scan name", scan_id, "spiderfoot.net", "IP_ADDRESS", module_list, opts, start=False)
         with self.assertRaises(ValueError):
             sfscan._SpiderFootScanner__setStatus("example invalid scan status")
+
+    def test__buildEventRouting_should_route_event_types_to_watching_modules_in_priority_order(self):
+        """
+        Test __buildEventRouting(self)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        scan_id = str(uuid.uuid4())
+        module_list = ['sfp__stor_db']
+
+        sfscan = SpiderFootScanner("example scan name", scan_id, "spiderfoot.net", "IP_ADDRESS", module_list, opts, start=False)
+
+        def module(watched_events, priority):
+            mod = SpiderFootPlugin()
+            mod.watchedEvents = lambda: watched_events
+            mod._priority = priority
+            return mod
+
+        storage = module(['*'], 0)
+        dns = module(['INTERNET_NAME', 'DOMAIN_NAME'], 2)
+        ip = module(['IP_ADDRESS'], 1)
+        unwatched = module(None, 1)
+
+        sfscan._SpiderFootScanner__moduleInstances = {
+            'dns': dns,
+            'ip': ip,
+            'storage': storage,
+            'unwatched': unwatched
+        }
+        sfscan._SpiderFootScanner__buildEventRouting()
+
+        routing = sfscan._SpiderFootScanner__eventRouting
+        self.assertEqual([storage, dns], routing['INTERNET_NAME'])
+        self.assertEqual([storage, dns], routing['DOMAIN_NAME'])
+        self.assertEqual([storage, ip], routing['IP_ADDRESS'])
+        self.assertEqual([storage], sfscan._SpiderFootScanner__wildcardListeners)
+
+    def test_scan_worker_pool_init_argument_size_of_invalid_type_should_raise_TypeError(self):
+        """
+        Test SpiderFootScanWorkerPool.__init__(self, config, size)
+        """
+        invalid_types = [None, "", list(), dict(), float()]
+        for invalid_type in invalid_types:
+            with self.subTest(invalid_type=invalid_type):
+                with self.assertRaises(TypeError):
+                    SpiderFootScanWorkerPool(self.default_options, invalid_type)
+
+    def test_scan_worker_pool_init_argument_size_invalid_value_should_raise_ValueError(self):
+        """
+        Test SpiderFootScanWorkerPool.__init__(self, config, size)
+        """
+        with self.assertRaises(ValueError):
+            SpiderFootScanWorkerPool(self.default_options, 0)
+
+    def test_scan_worker_pool_stopScan_should_return_false_when_not_started(self):
+        """
+        Test SpiderFootScanWorkerPool.stopScan(self, scanId)
+        """
+        pool = SpiderFootScanWorkerPool(self.default_options, 1)
+        self.assertEqual(1, pool.size)
+        self.assertIn(pool.startMethod, ["forkserver", "spawn"])
+        self.assertFalse(pool.stopScan("example scan id"))
+
+    def test_runScanWorker_should_run_queued_scans(self):
+        """
+        Test runScanWorker(workerId, config, stopEvent, shutdownEvent, stopScanId)
+        """
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+
+        sfdb = SpiderFootDb(opts)
+        sfdb.scanInstanceCreate(scan_id, "example scan name", "1.1.1.1")
+        scan_config = dict(opts, _modulesenabled=['sfp__stor_db'])
+        sfdb.scanConfigSet(scan_id, SpiderFoot(opts).configSerialize(scan_config))
+        sfdb.scanQueueAdd(scan_id, "IP_ADDRESS")
+
+        stop_event = threading.Event()
+        shutdown_event = threading.Event()
+        stop_scan_id = multiprocessing.Array('c', 64)
+        worker = threading.Thread(target=runScanWorker, args=("example worker", opts, stop_event, shutdown_event, stop_scan_id))
+        worker.start()
+
+        for i in range(100):
+            if sfdb.scanQueueGet(scan_id) is None:
+                break
+            time.sleep(0.1)
+
+        shutdown_event.set()
+        worker.join()
+
+        self.assertIsNone(sfdb.scanQueueGet(scan_id))
+        self.assertEqual("FINISHED", sfdb.scanInstanceGet(scan_id)[5])
+        self.assertIn("IP_ADDRESS", [row[4] for row in sfdb.scanResultEvent(scan_id)])
+
+    def test_runScanWorker_should_ignore_stop_requests_for_other_scans(self):
+        """
+        Test runScanWorker(workerId, config, stopEvent, shutdownEvent, stopScanId)
+        """
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+
+        sfdb = SpiderFootDb(opts)
+        sfdb.scanInstanceCreate(scan_id, "example scan name", "1.1.1.1")
+        scan_config = dict(opts, _modulesenabled=['sfp__stor_db'])
+        sfdb.scanConfigSet(scan_id, SpiderFoot(opts).configSerialize(scan_config))
+
+        stop_event = threading.Event()
+        shutdown_event = threading.Event()
+        stop_scan_id = multiprocessing.Array('c', 64)
+        worker = threading.Thread(target=runScanWorker, args=("example worker", opts, stop_event, shutdown_event, stop_scan_id))
+        worker.start()
+
+        # A request to stop the scan the worker ran before this one
+        sfdb.scanQueueAdd(scan_id, "IP_ADDRESS")
+        with stop_scan_id.get_lock():
+            stop_scan_id.value = str(uuid.uuid4()).encode()
+            stop_event.set()
+
+        for i in range(100):
+            if sfdb.scanQueueGet(scan_id) is None:
+                break
+            time.sleep(0.1)
+
+        shutdown_event.set()
+        worker.join()
+
+        self.assertEqual("FINISHED", sfdb.scanInstanceGet(scan_id)[5])
+
+    def test_runScanWorker_should_stop_the_scan_requested(self):
+        """
+        Test runScanWorker(workerId, config, stopEvent, shutdownEvent, stopScanId)
+        """
+        opts = dict(self.default_options)
+        opts['__modules__'] = {
+            'sfp__stor_db': {'opts': {'maxstorage': 1024, '_store': True}}
+        }
+        scan_id = str(uuid.uuid4())
+
+        sfdb = SpiderFootDb(opts)
+        sfdb.scanInstanceCreate(scan_id, "example scan name", "1.1.1.1")
+        scan_config = dict(opts, _modulesenabled=['sfp__stor_db'])
+        sfdb.scanConfigSet(scan_id, SpiderFoot(opts).configSerialize(scan_config))
+        sfdb.scanQueueAdd(scan_id, "IP_ADDRESS")
+
+        stopped = list()
+
+        def scanner(*args, stopEvent=None, **kwargs):
+            stopped.append(stopEvent.wait(10))
+
+        stop_event = threading.Event()
+        shutdown_event = threading.Event()
+        stop_scan_id = multiprocessing.Array('c', 64)
+        with mock.patch('sfscan.SpiderFootScanner', side_effect=scanner):
+            worker = threading.Thread(target=runScanWorker, args=("example worker", opts, stop_event, shutdown_event, stop_scan_id))
+            worker.start()
+
+            for i in range(100):
+                job = sfdb.scanQueueGet(scan_id)
+                if job and job[3]:
+                    break
+                time.sleep(0.1)
+
+            with stop_scan_id.get_lock():
+                stop_scan_id.value = scan_id.encode()
+                stop_event.set()
+
+            for i in range(100):
+                if sfdb.scanQueueGet(scan_id) is None:
+                    break
+                time.sleep(0.1)
+
+            shutdown_event.set()
+            worker.join()
+
+        self.assertEqual([True], stopped)
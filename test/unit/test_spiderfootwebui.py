@@ -1,7 +1,9 @@
 # test_spiderfootwebui.py
 import unittest
+import uuid
 
 from sfwebui import SpiderFootWebUi
+from spiderfoot import SpiderFootDb
 
 
 class TestSpiderFootWebUi(unittest.TestCase):
@@ -167,6 +169,17 @@ class TestSpiderFootWebUi(unittest.TestCase):
         scan_viz_multi = sfwebui.scanvizmulti(None, None)
         self.assertIsInstance(scan_viz_multi, str)
 
+    def test_scantrace_unknown_scan_should_return_a_string(self):
+        """
+        Test scantrace(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+        scan_trace = sfwebui.scantrace("../example scan instance")
+        self.assertIsInstance(scan_trace, str)
+        self.assertIn("Scan ID not found", scan_trace)
+
     @unittest.skip("todo")
     def test_scanopts(self):
         """
@@ -368,6 +381,34 @@ class TestSpiderFootWebUi(unittest.TestCase):
         """
         self.assertEqual('TBD', 'TBD')
 
+    def test_signalScanStop_should_not_fail_for_scans_not_run_by_scan_workers(self):
+        """
+        Test signalScanStop(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+        self.assertIsNone(sfwebui.signalScanStop('example unknown scan id'))
+
+    def test_queueScan_should_create_a_queued_scan(self):
+        """
+        Test queueScan(self, scanname, scanId, scantarget, targetType, modlist, cfg)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+
+        scan_id = str(uuid.uuid4())
+        sfwebui.queueScan("example scan name", scan_id, "spiderfoot.net", "INTERNET_NAME", ['sfp__stor_db'], sfwebui.config)
+
+        sfdb = SpiderFootDb(sfwebui.config)
+        self.assertEqual("QUEUED", sfdb.scanInstanceGet(scan_id)[5])
+        self.assertEqual("sfp__stor_db", sfdb.scanConfigGet(scan_id)['_modulesenabled'])
+        self.assertEqual("INTERNET_NAME", sfdb.scanQueueGet(scan_id)[0])
+
+        sfdb.scanInstanceDelete(scan_id)
+        self.assertIsNone(sfdb.scanQueueGet(scan_id))
+
     def test_stopscanmulti(self):
         """
         Test stopscanmulti(self, ids)
@@ -389,6 +430,38 @@ class TestSpiderFootWebUi(unittest.TestCase):
         stop_scan = sfwebui.stopscan("example scan id")
         self.assertIsInstance(stop_scan, str)
 
+    def test_resumescan_invalid_scan_should_return_error(self):
+        """
+        Test resumescan(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+        resume_scan = sfwebui.resumescan("example scan id")
+        self.assertIsInstance(resume_scan, str)
+        self.assertIn("Invalid scan ID", resume_scan)
+
+    def test_resumescan_scan_not_interrupted_should_return_error(self):
+        """
+        Test resumescan(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+
+        dbh = SpiderFootDb(opts)
+        scan_id = str(uuid.uuid4())
+        dbh.scanInstanceCreate(scan_id, "example scan name", "spiderfoot.net")
+
+        for status in ["RUNNING", "STARTING", "STARTED", "INITIALIZING", "ABORT-REQUESTED", "FINISHED"]:
+            with self.subTest(status=status):
+                dbh.scanInstanceSet(scan_id, status=status)
+                resume_scan = sfwebui.resumescan(scan_id)
+                self.assertIsInstance(resume_scan, str)
+                self.assertIn("Only aborted or failed scans can be resumed", resume_scan)
+
+        dbh.scanInstanceDelete(scan_id)
+
     def test_scanlog_should_return_bytes(self):
         """
         Test scanlog(self, id, limit=None, rowId=None, reverse=None)
@@ -439,6 +512,16 @@ class TestSpiderFootWebUi(unittest.TestCase):
         scan_summary = sfwebui.scansummary(None, None)
         self.assertIsInstance(scan_summary, bytes)
 
+    def test_scanmodulestats_should_return_bytes(self):
+        """
+        Test scanmodulestats(self, id)
+        """
+        opts = self.default_options
+        opts['__modules__'] = dict()
+        sfwebui = SpiderFootWebUi(self.default_web_options, opts)
+        module_stats = sfwebui.scanmodulestats(None)
+        self.assertIsInstance(module_stats, bytes)
+
     def test_scaneventresults_should_return_bytes(self):
         """
         Test scaneventresults(self, id, eventType, filterfp=False)